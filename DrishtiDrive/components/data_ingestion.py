@@ -1,16 +1,25 @@
 import os
 import sys
+import time
+import zlib
 import zipfile
+import threading
 import gdown
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from DrishtiDrive.logger import logging
 from DrishtiDrive.exception import AppException
 from DrishtiDrive.entity.config_entity import DataIngestionConfig
 from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact
+from DrishtiDrive.utils.download_utils import download_file, verify_checksum
 
 import shutil
 
 
+# Buffer size used when copying and checksumming extracted files
+EXTRACT_CHUNK_SIZE = 1 << 20
+
+
 class DataIngestion:
     """
     Class to handle data ingestion process.
@@ -32,17 +41,47 @@ class DataIngestion:
             raise AppException(e, sys)
     
     
+    def _is_complete_download(self, zip_file_path: str) -> bool:
+        """
+        Checks that an existing zip file is a complete download.
+
+        With a configured checksum the file must match it; otherwise the zip must at least
+        have its central directory, which a truncated download lacks.
+        """
+        if self.data_ingestion_config.data_sha256:
+            return verify_checksum(zip_file_path, self.data_ingestion_config.data_sha256)
+        return zipfile.is_zipfile(zip_file_path)
+
+    def _download_from_drive(self, url: str, zip_file_path: str) -> None:
+        """
+        Downloads a Google Drive share link with gdown, resuming a partial download.
+        """
+        # Extract the file ID from the URL
+        file_id = url.split('/')[-2]
+        # Construct the prefix for the download URL
+        prefix = f'https://drive.google.com/uc?export=download&id='
+        part_path = zip_file_path + '.part'
+        # Download the file using gdown
+        gdown.download(prefix + file_id, part_path, quiet=False, resume=True)
+        if not verify_checksum(part_path, self.data_ingestion_config.data_sha256):
+            os.remove(part_path)
+            raise ValueError(f"Checksum mismatch for {url}")
+        os.replace(part_path, zip_file_path)
+
     def download_data(self) -> str:
         """
-        Downloads data from the specified URL and saves it as a zip file.
+        Downloads data from the configured mirrors or the download URL and saves it as a zip file.
+
+        Mirrors (file:// or http(s)://) are tried first, in order, then the download URL.
+        Google Drive links go through gdown; every other URL is fetched in chunks with
+        resume and parallel byte ranges. An existing zip is only reused if it is complete.
 
         Returns:
             str: Path to the downloaded zip file.
         """
         try:
-            # Get the URL and download directory from the configuration
-            url = self.data_ingestion_config.data_download_url
-            download_dir = self.data_ingestion_config.data_ingestion_dir
+            config = self.data_ingestion_config
+            download_dir = config.data_ingestion_dir
 
             # Create the download directory if it doesn't exist
             os.makedirs(download_dir, exist_ok=True)
@@ -52,35 +91,103 @@ class DataIngestion:
             # Construct the path to the zip file
             zip_file_path = os.path.join(download_dir, data_file_name)
 
-            # Check if the file already exists
+            # Check if a complete file already exists
             if os.path.exists(zip_file_path):
-                # If the file exists, log a message and return the path to the file
-                logging.info(f"File already exists at : [{zip_file_path}]. Skipping download.")
+                if self._is_complete_download(zip_file_path):
+                    logging.info(f"File already exists at : [{zip_file_path}]. Skipping download.")
+                    return zip_file_path
+                logging.warning(f"Existing file [{zip_file_path}] is incomplete or corrupt, downloading it again")
+                os.remove(zip_file_path)
+
+            urls = [url for url in config.data_mirror_urls + [config.data_download_url] if url]
+            if not urls:
+                raise ValueError("No dataset source configured, set DRISHTI_DATA_URL or DRISHTI_DATA_MIRRORS")
+            errors = []
+            for url in urls:
+                # Log the download operation
+                logging.info(f"Downloading file from : [{url}] into : [{zip_file_path}]")
+                try:
+                    if 'drive.google.com' in url:
+                        self._download_from_drive(url, zip_file_path)
+                    else:
+                        download_file(
+                            url,
+                            zip_file_path,
+                            sha256=config.data_sha256,
+                            num_connections=config.download_num_connections,
+                            timeout=config.download_timeout,
+                            retries=config.download_retries,
+                        )
+                except Exception as e:
+                    logging.warning(f"Download from [{url}] failed: {e}")
+                    errors.append(f"{url}: {e}")
+                    continue
+
+                # Log the successful download
+                logging.info(f"File : [{zip_file_path}] has been downloaded successfully.")
+                # Return the path to the downloaded zip file
                 return zip_file_path
-            
-            # Log the download operation
-            logging.info(f"Downloading file from : [{url}] into : [{zip_file_path}]")
-            
-            # Extract the file ID from the URL
-            file_id = url.split('/')[-2]
-            # Construct the prefix for the download URL
-            prefix = f'https://drive.google.com/uc?export=download&id='
-            # Download the file using gdown
-            gdown.download(prefix + file_id, zip_file_path, quiet=False)
-            # Log the successful download
-            logging.info(f"File : [{zip_file_path}] has been downloaded successfully.")
-            # Return the path to the downloaded zip file
-            return zip_file_path
+
+            raise ConnectionError(f"Could not download the data from any source: {errors}")
 
         except Exception as e:
             # If an exception occurs, raise an AppException with the given exception and sys
             raise AppException(e, sys)
         
     
+    @staticmethod
+    def _is_extracted(info: zipfile.ZipInfo, target_path: str) -> bool:
+        """
+        Checks whether a zip member is already on disk with the same size and CRC32.
+
+        Args:
+            info (zipfile.ZipInfo): The zip member.
+            target_path (str): Where the member is extracted to.
+
+        Returns:
+            bool: True if the file on disk matches the member.
+        """
+        try:
+            if os.path.getsize(target_path) != info.file_size:
+                return False
+        except OSError:
+            return False
+
+        crc = 0
+        with open(target_path, 'rb') as target:
+            while chunk := target.read(EXTRACT_CHUNK_SIZE):
+                crc = zlib.crc32(chunk, crc)
+        return crc == info.CRC
+
+    def _extract_member(self, zip_file_path: str, info: zipfile.ZipInfo, target_path: str, handles: threading.local,
+                        opened: list) -> bool:
+        """
+        Extracts one zip member unless an identical copy is already on disk.
+
+        Every worker thread reads through its own ZipFile handle, so members decompress in parallel.
+
+        Returns:
+            bool: True if the member was extracted, False if it was skipped.
+        """
+        if self._is_extracted(info, target_path):
+            return False
+
+        zip_ref = getattr(handles, 'zip_ref', None)
+        if zip_ref is None:
+            zip_ref = handles.zip_ref = zipfile.ZipFile(zip_file_path, 'r')
+            opened.append(zip_ref)
+
+        with zip_ref.open(info) as source, open(target_path, 'wb') as target:
+            shutil.copyfileobj(source, target, EXTRACT_CHUNK_SIZE)
+        return True
+
     def extract_zip_file(self, zip_file_path: str) -> str:
         """
         Extracts the contents of the specified zip file to the specified directory.
 
+        Members are extracted on a thread pool, and members whose size and CRC32 already match
+        the file on disk are skipped, so re-running on an unchanged dataset only verifies it.
+
         Args:
             zip_file_path (str): Path to the zip file.
 
@@ -92,26 +199,58 @@ class DataIngestion:
             feature_store_path = self.data_ingestion_config.feature_store_file_path
             # Create the feature store directory if it doesn't exist
             os.makedirs(feature_store_path, exist_ok=True)
-            
-            # Open the zip file for reading
+            start = time.perf_counter()
+
             with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
-                # Extract all files from the zip file
-                for member in zip_ref.namelist():
+                members = []
+                for info in zip_ref.infolist():
                     # Strip the leading directory if it exists
-                    member_name = member.split('/', 1)[-1]  # this will remove the top-level directory
+                    member_name = info.filename.split('/', 1)[-1]  # this will remove the top-level directory
                     # Construct the target file path
                     target_path = os.path.join(feature_store_path, member_name)
-                    # Check if it's a directory
-                    if member.endswith('/'):
+                    # Create directories up front so the workers only write files
+                    if info.is_dir():
                         os.makedirs(target_path, exist_ok=True)
                     else:
-                        # Extract the file
-                        with zip_ref.open(member) as source, open(target_path, 'wb') as target:
-                            shutil.copyfileobj(source, target)
-                        logging.info(f"Extracted {member} to {target_path}")
-            
+                        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                        members.append((info, target_path))
+
+            total_bytes = sum(info.file_size for info, _ in members)
+            logging.info(
+                f"Extracting {len(members)} files ({total_bytes / 2 ** 20:.1f} MB) from {zip_file_path} "
+                f"with {self.data_ingestion_config.extract_num_workers} workers"
+            )
+
+            handles, opened = threading.local(), []
+            extracted = skipped = extracted_bytes = 0
+            next_report = 0.1
+            try:
+                with ThreadPoolExecutor(max_workers=self.data_ingestion_config.extract_num_workers,
+                                        thread_name_prefix='Extract') as executor:
+                    futures = {
+                        executor.submit(self._extract_member, zip_file_path, info, target_path, handles, opened): info
+                        for info, target_path in members
+                    }
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        if future.result():
+                            extracted += 1
+                            extracted_bytes += futures[future].file_size
+                        else:
+                            skipped += 1
+                        # Progress every tenth of the members instead of one line per file
+                        if done >= next_report * len(members):
+                            logging.info(f"Extraction progress: {done}/{len(members)} files")
+                            next_report += 0.1
+            finally:
+                for handle in opened:
+                    handle.close()
+
             # Log the successful extraction
-            logging.info(f"Data has been extracted successfully to {feature_store_path}")
+            logging.info(
+                f"Data has been extracted successfully to {feature_store_path}: {extracted} files "
+                f"({extracted_bytes / 2 ** 20:.1f} MB) extracted, {skipped} unchanged files skipped "
+                f"in {time.perf_counter() - start:.1f}s"
+            )
             # Return the path to the extracted directory
             return feature_store_path
 
@@ -1,16 +1,207 @@
+import io
 import os
 import sys
+import time
 import shutil
+import hashlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image
 
 from DrishtiDrive.exception import AppException
 from DrishtiDrive.logger import logging
 from DrishtiDrive.entity.config_entity import DataValidationConfig
 from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact, DataValidationArtifact
+from DrishtiDrive.utils.main_utils import (read_yaml_file, write_yaml_file, list_image_files, resolve_split_dir,
+                                           image_to_label_path, IMAGE_EXTENSIONS)
+from DrishtiDrive.utils.manifest_utils import DatasetManifest, MANIFEST_VERSION
+
+
+# data.yaml keys of the dataset splits, in report order
+SPLIT_KEYS = ('train', 'val', 'test')
+
+# Samples sent to a worker process at a time
+VALIDATION_CHUNK_SIZE = 64
+
+
+def file_stat(file_path: str) -> tuple:
+    """
+    Returns the size and nanosecond mtime of a file, or (-1, 0) if it does not exist.
+    """
+    try:
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+    except FileNotFoundError:
+        return -1, 0
+
+
+def check_sample(image_path: str, num_classes: int, known_hash: str = '') -> dict:
+    """
+    Checks one image and its YOLO label file.
+
+    The image is fully entropy-decoded, at reduced scale where the format allows it, so
+    truncated or corrupt files are caught without paying for a full-resolution decode.
+    When the content hash of the image and label equals `known_hash`, the checks are
+    skipped and the result is marked `unchanged`.
+
+    Args:
+        image_path (str): The path to the image file.
+        num_classes (int): The number of classes, `nc` in data.yaml.
+        known_hash (str, optional): The content hash recorded in the manifest. Defaults to ''.
+
+    Returns:
+        dict: The image and label paths with their sizes and mtimes, the content hash, the image
+        width and height, the parsed label boxes and a list of error messages, empty for a valid sample.
+    """
+    label_path = image_to_label_path(image_path)
+    (image_size, image_mtime), (label_size, label_mtime) = file_stat(image_path), file_stat(label_path)
+    result = {'image': image_path, 'label': label_path, 'image_size': image_size, 'image_mtime': image_mtime,
+              'label_size': label_size, 'label_mtime': label_mtime, 'width': 0, 'height': 0, 'boxes': [],
+              'errors': [], 'unchanged': False}
+    errors = result['errors']
+
+    try:
+        with open(image_path, 'rb') as image_file:
+            image_bytes = image_file.read()
+    except OSError as e:
+        # Vanished or unreadable, nothing further to check
+        errors.append(f"image file cannot be read: {e}")
+        result['hash'] = ''
+        return result
+    label_bytes = b''
+    if label_size >= 0:
+        try:
+            with open(label_path, 'rb') as label_file:
+                label_bytes = label_file.read()
+        except OSError as e:
+            errors.append(f"label file cannot be read: {e}")
+
+    digest = hashlib.blake2b(image_bytes, digest_size=16)
+    digest.update(label_bytes)
+    result['hash'] = digest.hexdigest()
+    if result['hash'] == known_hash:
+        result['unchanged'] = True
+        return result
+
+    try:
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            width, height = image.size
+            image.draft('L', (max(width // 8, 1), max(height // 8, 1)))
+            image.load()
+        result['width'], result['height'] = width, height
+    except Exception as e:
+        errors.append(f"image does not decode: {e}")
+        width = height = 0
+
+    # Images without a label file are background samples with no lines
+    try:
+        lines = [line.split() for line in label_bytes.decode().splitlines() if line.strip()]
+    except UnicodeDecodeError:
+        errors.append("label file is not text")
+        lines = []
+
+    for number, fields in enumerate(lines, start=1):
+        if len(fields) != 5:
+            errors.append(f"line {number}: expected 5 values, got {len(fields)}")
+            continue
+        try:
+            cls, cx, cy, w, h = (float(field) for field in fields)
+        except ValueError:
+            errors.append(f"line {number}: non-numeric value")
+            continue
+        result['boxes'].append((cls, cx, cy, w, h))
+
+        if not cls.is_integer() or not 0 <= cls < num_classes:
+            errors.append(f"line {number}: class {fields[0]} is not an integer in [0, {num_classes})")
+        if not all(0.0 <= value <= 1.0 for value in (cx, cy, w, h)):
+            errors.append(f"line {number}: coordinates are not normalised to [0, 1]")
+        elif w <= 0 or h <= 0:
+            errors.append(f"line {number}: box has zero width or height")
+        elif width and height:
+            # Allow one pixel of rounding at the image border
+            tolerance_x, tolerance_y = 1.0 / width, 1.0 / height
+            if (cx - w / 2 < -tolerance_x or cx + w / 2 > 1 + tolerance_x or
+                    cy - h / 2 < -tolerance_y or cy + h / 2 > 1 + tolerance_y):
+                errors.append(f"line {number}: box extends outside the image")
+
+    return result
+
+
+def content_hash(file_paths: list) -> str:
+    """
+    Hashes the concatenated content of some files the way `check_sample` hashes an image and its label.
+    Missing files are skipped.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for file_path in file_paths:
+        if not os.path.exists(file_path):
+            continue
+        with open(file_path, 'rb') as source:
+            for chunk in iter(lambda: source.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def feature_store_digest(feature_store_path: str, manifest_file_path: str) -> str:
+    """
+    Digests the content of every file in the feature store, for the data validation fingerprint.
+
+    An image and its label file count as one sample with the content hash `check_sample` computes.
+    Samples whose image and label size and mtime still match the manifest reuse the hash recorded
+    there, so only new or changed files are read.
+
+    Args:
+        feature_store_path (str): The extracted dataset directory.
+        manifest_file_path (str): The manifest of the last validation run, which may not exist.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    known = {}
+    if os.path.exists(manifest_file_path):
+        try:
+            columns = DatasetManifest.load(manifest_file_path).columns
+            for row, path in enumerate(columns['paths'].tolist()):
+                known[path] = ((int(columns['image_sizes'][row]), int(columns['image_mtimes'][row]),
+                                int(columns['label_sizes'][row]), int(columns['label_mtimes'][row])),
+                               str(columns['hashes'][row]))
+        except Exception as e:
+            logging.warning(f"Could not read manifest {manifest_file_path}, hashing the whole feature store: {e}")
+
+    file_paths = sorted(
+        os.path.join(root, name) for root, _, files in os.walk(feature_store_path) for name in files
+    )
+    image_labels = {
+        file_path: image_to_label_path(file_path) for file_path in file_paths
+        if file_path.lower().endswith(IMAGE_EXTENSIONS)
+    }
+    sample_labels = set(image_labels.values())
+
+    digest = hashlib.sha256()
+    for file_path in file_paths:
+        if file_path in sample_labels and file_path not in image_labels:
+            # Hashed together with its image
+            continue
+        try:
+            if file_path in image_labels:
+                label_path = image_labels[file_path]
+                stats, known_hash = known.get(file_path, (None, ''))
+                if known_hash and stats == file_stat(file_path) + file_stat(label_path):
+                    file_hash = known_hash
+                else:
+                    file_hash = content_hash([file_path, label_path])
+            else:
+                file_hash = content_hash([file_path])
+        except OSError:
+            # Unreadable files still change the digest when their size or mtime does
+            file_hash = '{}:{}'.format(*file_stat(file_path))
+        digest.update(f"{os.path.relpath(file_path, feature_store_path)}\0{file_hash}\n".encode())
+    return digest.hexdigest()
 
 
 class DataValidation:
     """
-    This class performs data validation by checking if all the required files exist in the feature store directory.
+    This class validates the dataset: the required files must exist and every image and label must be usable for training.
     """
 
     def __init__(self,
@@ -18,7 +209,7 @@ class DataValidation:
                  data_validation_config: DataValidationConfig):
         """
         Initialize the DataValidation class.
-        
+
         Args:
             data_ingestion_artifact (DataIngestionArtifact): The artifacts produced by the data ingestion process.
             data_validation_config (DataValidationConfig): The configuration for data validation.
@@ -30,31 +221,143 @@ class DataValidation:
         except Exception as e:
             raise AppException(e, sys)
 
-    def validate_all_files_exist(self)-> bool:
+    def find_missing_files(self) -> list:
+        """
+        Lists the required files that are missing from the feature store directory.
+
+        Returns:
+            list: The names of the missing required files.
+        """
+        all_files = set(os.listdir(self.data_ingestion_artifact.feature_store_file_path))
+        return [file for file in self.data_validation_config.required_file_list if file not in all_files]
+
+    def validate_all_files_exist(self) -> bool:
         """
         Validate if all the required files exist in the feature store directory.
-        
+
         Returns:
             bool: True if all the required files exist, False otherwise.
         """
         try:
-            validation_status = None  # Initialize the validation status to None
+            return not self.find_missing_files()
 
-            all_files = os.listdir(self.data_ingestion_artifact.feature_store_file_path)  # Get all files in the feature store directory
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _load_manifest(self, num_classes: int) -> DatasetManifest:
+        """
+        Loads the manifest of the previous run, or an empty one if it is missing or was built with other checks.
+        """
+        manifest_path = self.data_validation_config.manifest_file_path
+        if os.path.exists(manifest_path):
+            try:
+                manifest = DatasetManifest.load(manifest_path)
+                if manifest.version == MANIFEST_VERSION and manifest.num_classes == num_classes:
+                    return manifest
+                logging.info("Manifest was built with other checks or classes, revalidating every sample")
+            except Exception as e:
+                logging.warning(f"Could not read manifest {manifest_path}, revalidating every sample: {e}")
+        return DatasetManifest.empty(num_classes)
 
-            for file in all_files:  # Iterate over each file
-                if file not in self.data_validation_config.required_file_list:  # Check if the file is not in the required file list
-                    validation_status = False  # Set the validation status to False
-                    os.makedirs(self.data_validation_config.data_validation_dir, exist_ok=True)  # Create the data validation directory if it doesn't exist
-                    with open(self.data_validation_config.valid_status_file_dir, 'w') as f:  # Write the validation status to the status file
-                        f.write(f"Validation status: {validation_status}")
+    def build_manifest(self) -> DatasetManifest:
+        """
+        Brings the dataset manifest up to date, checking only new and changed samples on a process pool.
+
+        A sample whose image and label size and mtime match the manifest is reused as is. A sample
+        whose stat changed is hashed first and only fully checked when its content changed too.
+
+        Returns:
+            DatasetManifest: The manifest of every sample of every split in data.yaml, also saved to disk.
+        """
+        feature_store_path = self.data_ingestion_artifact.feature_store_file_path
+        data = read_yaml_file(os.path.join(feature_store_path, 'data.yaml'))
+        num_classes = int(data['nc'])
+        previous = self._load_manifest(num_classes)
+        index = previous.index()
+        columns = previous.columns
+
+        reused_rows, reused_stats, pending = [], [], []
+        for split in SPLIT_KEYS:
+            if not data.get(split):
+                continue
+            for image_path in list_image_files(resolve_split_dir(feature_store_path, data[split])):
+                stats = file_stat(image_path) + file_stat(image_to_label_path(image_path))
+                row = index.get(image_path)
+                if row is None or columns['splits'][row] != split:
+                    pending.append((split, image_path, ''))
+                elif stats == (columns['image_sizes'][row], columns['image_mtimes'][row],
+                               columns['label_sizes'][row], columns['label_mtimes'][row]):
+                    reused_rows.append(row)
+                    reused_stats.append(stats)
                 else:
-                    validation_status = True  # Set the validation status to True
-                    os.makedirs(self.data_validation_config.data_validation_dir, exist_ok=True)  # Create the data validation directory if it doesn't exist
-                    with open(self.data_validation_config.valid_status_file_dir, 'w') as f:  # Write the validation status to the status file
-                        f.write(f"Validation status: {validation_status}")
+                    pending.append((split, image_path, str(columns['hashes'][row])))
+
+        logging.info(
+            f"{len(reused_rows)} samples unchanged, checking {len(pending)} new or modified samples "
+            f"with {self.data_validation_config.num_workers} processes"
+        )
+        records = []
+        if pending:
+            with ProcessPoolExecutor(max_workers=self.data_validation_config.num_workers) as executor:
+                results = executor.map(
+                    check_sample,
+                    [image_path for _, image_path, _ in pending],
+                    [num_classes] * len(pending),
+                    [known_hash for _, _, known_hash in pending],
+                    chunksize=VALIDATION_CHUNK_SIZE,
+                )
+                for (split, _, _), result in zip(pending, results):
+                    if result['unchanged']:
+                        # Touched but identical: keep the row, refresh its stat
+                        reused_rows.append(index[result['image']])
+                        reused_stats.append((result['image_size'], result['image_mtime'],
+                                             result['label_size'], result['label_mtime']))
+                    else:
+                        result['split'] = split
+                        records.append(result)
+
+        reused = previous.take(np.array(reused_rows, dtype=np.int64))
+        if reused_stats:
+            stats = np.array(reused_stats, dtype=np.int64)
+            for column, name in enumerate(('image_sizes', 'image_mtimes', 'label_sizes', 'label_mtimes')):
+                reused.columns[name] = stats[:, column]
+        manifest = DatasetManifest.concatenate([reused, DatasetManifest.from_records(records, num_classes)])
+        manifest.save(self.data_validation_config.manifest_file_path)
+        return manifest
+
+    def validate_samples(self) -> dict:
+        """
+        Validates every sample against the up-to-date manifest and summarises the dataset.
+
+        Returns:
+            dict: Per-split counts of images, labelled boxes, background images and invalid samples,
+            class frequencies and box sizes, and the errors of every invalid sample.
+        """
+        try:
+            manifest = self.build_manifest()
+            columns = manifest.columns
+            box_counts = np.diff(manifest.box_offsets)
+            invalid = columns['errors'] != ''
+
+            summary = {}
+            for split in SPLIT_KEYS:
+                in_split = columns['splits'] == split
+                if not in_split.any():
+                    continue
+                summary[split] = {
+                    'images': int(in_split.sum()),
+                    'instances': int(box_counts[in_split].sum()),
+                    'background': int((in_split & (columns['label_sizes'] < 0)).sum()),
+                    'invalid': int((in_split & invalid).sum()),
+                    'class_counts': manifest.class_counts(split).tolist(),
+                    'box_sizes': manifest.box_size_stats(split),
+                }
 
-            return validation_status  # Return the validation status
+            invalid_samples = [
+                {'image': str(columns['paths'][row]), 'errors': str(columns['errors'][row]).split('\n')}
+                for row in np.flatnonzero(invalid)
+            ]
+            return {'num_classes': manifest.num_classes, 'splits': summary, 'invalid_samples': invalid_samples}
 
         except Exception as e:
             raise AppException(e, sys)
@@ -62,15 +365,40 @@ class DataValidation:
     def initiate_data_validation(self) -> DataValidationArtifact:
         """
         Initiate the data validation process.
-        
+
+        Checks that the required files exist, then validates every sample and writes one
+        report with the status, per-split statistics and the errors of every invalid sample.
+
         Returns:
             DataValidationArtifact: The artifacts produced by the data validation process.
         """
         logging.info("Entered initiate_data_validation method of DataValidation class")
         try:
-            status = self.validate_all_files_exist()  # Validate if all the required files exist
+            start = time.perf_counter()
+            missing_files = self.find_missing_files()
+            report = {'missing_files': missing_files}
+            if missing_files:
+                logging.error(f"Missing required files: {missing_files}")
+            else:
+                report.update(self.validate_samples())
+
+            status = not missing_files and not report['invalid_samples']
+            report['validation_status'] = status
+            report['duration_s'] = round(time.perf_counter() - start, 2)
+
+            os.makedirs(self.data_validation_config.data_validation_dir, exist_ok=True)
+            write_yaml_file(self.data_validation_config.report_file_path, report, replace=True)
+            with open(self.data_validation_config.valid_status_file_dir, 'w') as f:  # Write the validation status to the status file
+                f.write(f"Validation status: {status}")
+
+            if report.get('invalid_samples'):
+                logging.error(
+                    f"{len(report['invalid_samples'])} invalid samples, see {self.data_validation_config.report_file_path}"
+                )
+
             data_validation_artifact = DataValidationArtifact(
-                validation_status=status
+                validation_status=status,
+                manifest_file_path=None if missing_files else self.data_validation_config.manifest_file_path,
             )
             logging.info("Exited initiate_data_validation method of DataValidation class")
             logging.info(f"Data validation artifact: {data_validation_artifact}")
@@ -81,4 +409,3 @@ class DataValidation:
 
         except Exception as e:
             raise AppException(e, sys)
-
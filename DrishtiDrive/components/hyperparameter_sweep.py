@@ -0,0 +1,285 @@
+import os
+import sys
+import json
+import queue
+import random
+import itertools
+import threading
+import dataclasses
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import HyperparameterSweepConfig, ModelTrainerConfig
+from DrishtiDrive.entity.artifacts_entity import ImageStoreArtifact, HyperparameterSweepArtifact
+from DrishtiDrive.components.model_trainer import ModelTrainer
+from DrishtiDrive.utils.main_utils import write_yaml_file
+
+
+# Trainers a sweep can run trials with
+SWEEP_TRAINERS = ('yolov5', 'stub')
+
+
+class AshaScheduler:
+    """
+    Asynchronous successive halving (ASHA): decides after every epoch whether a trial keeps training.
+
+    Rungs sit at min_epochs, min_epochs * reduction_factor, min_epochs * reduction_factor ** 2, ...
+    below max_epochs. A trial reaching a rung goes on only if its metric is in the top
+    1 / reduction_factor of the trials that reached that rung before it, so no trial ever
+    waits for others to finish and free cores are always given to new trials.
+    """
+
+    def __init__(self, min_epochs: int, max_epochs: int, reduction_factor: int):
+        """
+        Args:
+            min_epochs (int): The epochs of the first rung.
+            max_epochs (int): The epochs of a trial that is never stopped.
+            reduction_factor (int): The ratio between successive rungs, at least 2.
+        """
+        if reduction_factor < 2:
+            raise ValueError(f"reduction_factor must be at least 2, got {reduction_factor}")
+        self.reduction_factor = reduction_factor
+        self.rungs = []
+        epochs = max(min_epochs, 1)
+        while epochs < max_epochs:
+            self.rungs.append(epochs)
+            epochs *= reduction_factor
+        self.results = {rung: {} for rung in self.rungs}
+        self._lock = threading.Lock()
+
+    def on_result(self, trial_id: str, epochs: int, value: float) -> bool:
+        """
+        Records the metric of a trial after some epochs.
+
+        Args:
+            trial_id (str): The trial.
+            epochs (int): The epochs the trial has completed.
+            value (float): Its metric, higher is better.
+
+        Returns:
+            bool: Whether the trial keeps training.
+        """
+        with self._lock:
+            for rung in reversed(self.rungs):
+                if epochs < rung or trial_id in self.results[rung]:
+                    continue
+                recorded = list(self.results[rung].values())
+                self.results[rung][trial_id] = value
+                if recorded:
+                    cutoff = np.percentile(recorded, (1 - 1 / self.reduction_factor) * 100)
+                    return bool(value >= cutoff)
+                return True
+            return True
+
+
+class HyperparameterSweep:
+    """
+    Trains several short trials in parallel on disjoint CPU cores and stops the weak ones early with ASHA.
+    """
+
+    def __init__(self, hyperparameter_sweep_config: HyperparameterSweepConfig,
+                 model_trainer_config: ModelTrainerConfig, feature_store_file_path: str,
+                 image_store_artifact: ImageStoreArtifact = None):
+        """
+        Initialize the HyperparameterSweep class.
+
+        Args:
+            hyperparameter_sweep_config (HyperparameterSweepConfig): The configuration for the sweep.
+            model_trainer_config (ModelTrainerConfig): The base configuration of every trial.
+            feature_store_file_path (str): The path to the feature store file.
+            image_store_artifact (ImageStoreArtifact, optional): The image store trials train from. Defaults to None.
+        """
+        try:
+            if hyperparameter_sweep_config.trainer not in SWEEP_TRAINERS:
+                raise ValueError(
+                    f"Unknown trainer '{hyperparameter_sweep_config.trainer}', expected one of {SWEEP_TRAINERS}"
+                )
+            self.hyperparameter_sweep_config = hyperparameter_sweep_config
+            self.model_trainer_config = model_trainer_config
+            self.feature_store_file_path = feature_store_file_path
+            self.image_store_artifact = image_store_artifact
+            # Preparing a trial rewrites data.yaml and the model configuration, one trial at a time
+            self._prepare_lock = threading.Lock()
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def sample_trials(self) -> list:
+        """
+        Samples distinct hyperparameter settings from the search space.
+
+        Returns:
+            list: Up to `num_trials` settings, fewer if the search space is smaller.
+        """
+        config = self.hyperparameter_sweep_config
+        names = sorted(config.search_space)
+        grid = list(itertools.product(*(config.search_space[name] for name in names)))
+        chosen = random.Random(config.seed).sample(grid, min(config.num_trials, len(grid)))
+        return [dict(zip(names, values)) for values in chosen]
+
+    def cpu_slots(self) -> list:
+        """
+        Splits the cores this process may use into one disjoint set per concurrently running trial.
+        """
+        cores_per_trial = max(self.hyperparameter_sweep_config.cores_per_trial, 1)
+        cpus = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else \
+            list(range(os.cpu_count() or 1))
+        if len(cpus) < cores_per_trial:
+            return [cpus]
+        return [cpus[start:start + cores_per_trial]
+                for start in range(0, len(cpus) - cores_per_trial + 1, cores_per_trial)]
+
+    def _trial_trainer(self, name: str, params: dict, cpu_ids: list) -> ModelTrainer:
+        """
+        A ModelTrainer for one trial, training in its own run directory under the sweep directory.
+        """
+        config = self.hyperparameter_sweep_config
+        trial_dir = os.path.join(config.sweep_dir, name)
+        fields = {field.name for field in dataclasses.fields(ModelTrainerConfig)}
+        trainer_config = dataclasses.replace(
+            self.model_trainer_config,
+            model_trainer_dir=trial_dir,
+            metrics_file_path=os.path.join(trial_dir, os.path.basename(self.model_trainer_config.metrics_file_path)),
+            log_file_path=os.path.join(trial_dir, os.path.basename(self.model_trainer_config.log_file_path)),
+            project_dir=config.sweep_dir,
+            run_name=name,
+            no_epochs=config.max_epochs,
+            # Dataloader workers count against the core budget of the trial
+            num_workers=min(self.model_trainer_config.num_workers, len(cpu_ids)),
+            cpu_ids=cpu_ids,
+            # Every trial is a single process on its own cores
+            nproc_per_node=1,
+            nnodes=1,
+            node_rank=0,
+            hyp_overrides={**self.model_trainer_config.hyp_overrides,
+                           **{key: value for key, value in params.items() if key not in fields}},
+            **{key: value for key, value in params.items() if key in fields},
+        )
+        return ModelTrainer(
+            model_trainer_config=trainer_config,
+            feature_store_file_path=self.feature_store_file_path,
+            image_store_artifact=self.image_store_artifact
+        )
+
+    def run_trial(self, trial: dict, scheduler: AshaScheduler, cpu_slots: queue.Queue) -> dict:
+        """
+        Trains one trial on a free set of cores until it completes or the scheduler stops it.
+
+        Args:
+            trial (dict): The trial, with its `name` and `params`; updated with its results.
+            scheduler (AshaScheduler): Decides whether the trial keeps training after every epoch.
+            cpu_slots (queue.Queue): The free core sets.
+
+        Returns:
+            dict: The trial.
+        """
+        config = self.hyperparameter_sweep_config
+        cpu_ids = cpu_slots.get()
+        try:
+            trainer = self._trial_trainer(trial['name'], trial['params'], cpu_ids)
+            if config.trainer == 'stub':
+                command = [sys.executable, '-m', 'DrishtiDrive.pipeline.stub_train',
+                           '--epochs', str(config.max_epochs), '--params', json.dumps(trial['params']),
+                           '--cpus', ','.join(map(str, cpu_ids))]
+            else:
+                with self._prepare_lock:
+                    command = trainer.prepare_training_command()
+
+            trial.update(cpus=cpu_ids, epochs=0, history=[], run_dir=trainer.model_trainer_config.model_trainer_dir)
+            logging.info(f"Starting {trial['name']} on CPUs {cpu_ids}: {trial['params']}")
+
+            def on_record(record: dict) -> bool:
+                if record.get('event') != 'epoch':
+                    return True
+                value = float(record['metrics'].get(config.metric, 0.0))
+                trial['epochs'] = record['epoch'] + 1
+                trial['history'].append(value)
+                keep = scheduler.on_result(trial['name'], trial['epochs'], value)
+                if not keep:
+                    trial['status'] = 'stopped'
+                return keep
+
+            exit_code = trainer.run_training(command, on_record=on_record, echo=False)
+            if trial.get('status') != 'stopped':
+                trial['status'] = 'completed' if exit_code == 0 else 'failed'
+            trial['exit_code'] = exit_code
+            trial['best_metric'] = max(trial['history']) if trial['history'] else None
+            best_model_path = trainer.best_model_path
+            trial['best_model_file_path'] = best_model_path if os.path.exists(best_model_path) else None
+            logging.info(
+                f"{trial['name']} {trial['status']} after {trial['epochs']} epochs, best {config.metric} "
+                f"{trial['best_metric']}"
+            )
+            return trial
+
+        except Exception as e:
+            trial.update(status='failed', error=str(e))
+            logging.error(f"{trial['name']} failed: {e}")
+            return trial
+        finally:
+            cpu_slots.put(cpu_ids)
+
+    def initiate_hyperparameter_sweep(self) -> HyperparameterSweepArtifact:
+        """
+        Runs the sweep.
+
+        1. Samples the trials from the search space.
+        2. Runs as many trials at a time as there are disjoint core sets, stopping weak trials at every rung.
+        3. Writes the report of every trial and returns the best one.
+
+        Returns:
+            HyperparameterSweepArtifact: The best hyperparameters, their metric and weights, and the report path.
+        """
+        logging.info("Entered initiate_hyperparameter_sweep method of HyperparameterSweep class")
+        try:
+            config = self.hyperparameter_sweep_config
+            os.makedirs(config.sweep_dir, exist_ok=True)
+            trials = [{'name': f'trial_{index:03d}', 'params': params}
+                      for index, params in enumerate(self.sample_trials())]
+            scheduler = AshaScheduler(config.min_epochs, config.max_epochs, config.reduction_factor)
+            slots = self.cpu_slots()
+            cpu_slots = queue.Queue()
+            for slot in slots:
+                cpu_slots.put(slot)
+            logging.info(
+                f"Sweeping {len(trials)} trials of up to {config.max_epochs} epochs, {len(slots)} at a time, "
+                f"rungs at epochs {scheduler.rungs}"
+            )
+
+            with ThreadPoolExecutor(max_workers=len(slots), thread_name_prefix='SweepTrial') as executor:
+                list(executor.map(lambda trial: self.run_trial(trial, scheduler, cpu_slots), trials))
+
+            finished = [trial for trial in trials if trial.get('best_metric') is not None]
+            if not finished:
+                raise RuntimeError(f"Every trial of the sweep failed, see the logs in {config.sweep_dir}")
+            ranked = sorted(finished, key=lambda trial: trial['best_metric'], reverse=True)
+            best = ranked[0]
+
+            write_yaml_file(config.report_file_path, {
+                'metric': config.metric,
+                'trainer': config.trainer,
+                'max_epochs': config.max_epochs,
+                'rungs': scheduler.rungs,
+                'epochs_trained': sum(trial.get('epochs', 0) for trial in trials),
+                'epochs_without_early_stopping': len(trials) * config.max_epochs,
+                'best_trial': best['name'],
+                'trials': ranked + [trial for trial in trials if trial.get('best_metric') is None],
+            }, replace=True)
+
+            hyperparameter_sweep_artifact = HyperparameterSweepArtifact(
+                best_params=best['params'],
+                best_metric=best['best_metric'],
+                best_model_file_path=best.get('best_model_file_path'),
+                report_file_path=config.report_file_path,
+            )
+
+            logging.info("Exited initiate_hyperparameter_sweep method of HyperparameterSweep class")
+            logging.info(f"Hyperparameter sweep artifact: {hyperparameter_sweep_artifact}")
+
+            return hyperparameter_sweep_artifact
+
+        except Exception as e:
+            logging.error(f"Error in initiate_hyperparameter_sweep: {str(e)}")
+            raise AppException(e, sys)
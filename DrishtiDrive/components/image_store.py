@@ -0,0 +1,184 @@
+import os
+import sys
+import math
+import time
+import cv2
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import ImageStoreConfig
+from DrishtiDrive.entity.artifacts_entity import DataValidationArtifact, ImageStoreArtifact
+from DrishtiDrive.utils.manifest_utils import DatasetManifest
+from DrishtiDrive.utils.image_store_utils import ImageStoreReader, STORE_FORMAT_VERSION
+
+
+class ImageStore:
+    """
+    Writes every valid training, validation and test image, letterboxed to the training size, into one memory-mapped file.
+    """
+
+    def __init__(self, image_store_config: ImageStoreConfig, data_validation_artifact: DataValidationArtifact):
+        """
+        Initialize the ImageStore class.
+
+        Args:
+            image_store_config (ImageStoreConfig): The configuration for the image store.
+            data_validation_artifact (DataValidationArtifact): The output of data validation, with the dataset manifest.
+        """
+        try:
+            self.image_store_config = image_store_config
+            self.data_validation_artifact = data_validation_artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _open_previous(self):
+        """
+        Opens the store of the previous run if it exists and has the configured image size and format.
+        """
+        config = self.image_store_config
+        if not (os.path.exists(config.store_file_path) and os.path.exists(config.index_file_path)):
+            return None
+        try:
+            reader = ImageStoreReader(config.store_file_path, config.index_file_path)
+        except Exception as e:
+            logging.warning(f"Could not open the previous image store, rebuilding it: {e}")
+            return None
+        if reader.image_size != config.image_size or reader.format_version != STORE_FORMAT_VERSION:
+            return None
+        return reader
+
+    def _letterbox_into(self, image_path: str, out: np.ndarray, augment: bool) -> tuple:
+        """
+        Decodes an image and letterboxes it straight into its row of the store.
+
+        The content is resized exactly as yolov5's `load_image` resizes it, since the trainer
+        hands it out in place of that function's output: the longest side becomes the image
+        size, both sides are rounded up, and shrinking uses INTER_AREA unless the dataset
+        augments, as yolov5's training split does.
+
+        Args:
+            image_path (str): The image file.
+            out (np.ndarray): The row of the store, of shape (S, S, 3).
+            augment (bool): Whether yolov5 loads the image for an augmenting dataset.
+
+        Returns:
+            tuple: The original height and width, the resize factor, the left and top padding
+            and the resized height and width.
+        """
+        image = cv2.imread(image_path)
+        if image is None:
+            raise ValueError(f"Image does not decode: {image_path}")
+        height, width = image.shape[:2]
+        size = self.image_store_config.image_size
+        scale = size / max(height, width)
+        # Rounding up a float error can make yolov5's longest side one pixel too long; such rows are
+        # clamped to the store and the trainer decodes those images itself
+        new_width, new_height = min(math.ceil(width * scale), size), min(math.ceil(height * scale), size)
+        left, top = (size - new_width) // 2, (size - new_height) // 2
+
+        out.fill(self.image_store_config.pad_value)
+        content = out[top:top + new_height, left:left + new_width]
+        if scale == 1:
+            content[...] = image
+        else:
+            interpolation = cv2.INTER_LINEAR if augment or scale > 1 else cv2.INTER_AREA
+            cv2.resize(image, (new_width, new_height), dst=content, interpolation=interpolation)
+        return (height, width), scale, (left, top), (new_height, new_width)
+
+    def initiate_image_store(self) -> ImageStoreArtifact:
+        """
+        Builds the image store from the dataset manifest.
+
+        Images whose content hash matches the previous store are copied from it instead of
+        being decoded again, and an unchanged dataset skips the build entirely.
+
+        Returns:
+            ImageStoreArtifact: The paths to the store and its index.
+        """
+        logging.info("Entered initiate_image_store method of ImageStore class")
+        try:
+            config = self.image_store_config
+            manifest = DatasetManifest.load(self.data_validation_artifact.manifest_file_path)
+            valid = np.flatnonzero(manifest.columns['errors'] == '')
+            paths = np.array([os.path.realpath(path) for path in manifest.columns['paths'][valid].tolist()], dtype=str)
+            splits = manifest.columns['splits'][valid]
+            hashes = manifest.columns['hashes'][valid]
+
+            artifact = ImageStoreArtifact(
+                store_file_path=config.store_file_path,
+                index_file_path=config.index_file_path,
+            )
+
+            previous = self._open_previous()
+            if previous is not None and np.array_equal(previous.columns['paths'], paths) and \
+                    np.array_equal(previous.columns['hashes'], hashes):
+                logging.info(f"Image store is up to date with {len(paths)} images, skipping the build")
+                return artifact
+
+            size = config.image_size
+            count = len(paths)
+            start = time.perf_counter()
+            os.makedirs(config.image_store_dir, exist_ok=True)
+            temp_store_path = config.store_file_path + '.tmp'
+            images = np.memmap(temp_store_path, dtype=np.uint8, mode='w+', shape=(count, size, size, 3)) \
+                if count else np.zeros((0, size, size, 3), dtype=np.uint8)
+
+            shapes = np.zeros((count, 2), dtype=np.int64)
+            scales = np.zeros(count, dtype=np.float64)
+            pads = np.zeros((count, 2), dtype=np.int64)
+            content_shapes = np.zeros((count, 2), dtype=np.int64)
+
+            def fill(row: int) -> bool:
+                previous_row = previous.find(paths[row]) if previous is not None else None
+                # The split decides the interpolation, so a row is only reused within the same split
+                if previous_row is not None and previous.columns['hashes'][previous_row] == hashes[row] and \
+                        previous.columns['splits'][previous_row] == splits[row]:
+                    images[row] = previous[previous_row]
+                    shapes[row] = previous.columns['shapes'][previous_row]
+                    scales[row] = previous.columns['scales'][previous_row]
+                    pads[row] = previous.columns['pads'][previous_row]
+                    content_shapes[row] = previous.columns['content_shapes'][previous_row]
+                    return False
+                shapes[row], scales[row], pads[row], content_shapes[row] = self._letterbox_into(
+                    paths[row], images[row], augment=splits[row] == 'train')
+                return True
+
+            # Decoding and resizing release the GIL, and every row is written by exactly one thread
+            with ThreadPoolExecutor(max_workers=config.num_workers, thread_name_prefix='ImageStore') as executor:
+                decoded = sum(executor.map(fill, range(count)))
+            if count:
+                images.flush()
+            del images
+
+            temp_index_path = config.index_file_path + '.tmp.npz'
+            np.savez(
+                temp_index_path,
+                image_size=size,
+                format_version=STORE_FORMAT_VERSION,
+                paths=paths,
+                splits=splits,
+                hashes=hashes,
+                offsets=np.arange(count, dtype=np.int64) * size * size * 3,
+                shapes=shapes,
+                scales=scales,
+                pads=pads,
+                content_shapes=content_shapes,
+            )
+            if count:
+                os.replace(temp_store_path, config.store_file_path)
+            elif os.path.exists(config.store_file_path):
+                os.remove(config.store_file_path)
+            os.replace(temp_index_path, config.index_file_path)
+
+            logging.info(
+                f"Image store built with {count} images ({count * size * size * 3 / 2 ** 20:.1f} MB): "
+                f"{decoded} decoded, {count - decoded} reused in {time.perf_counter() - start:.1f}s"
+            )
+            logging.info("Exited initiate_image_store method of ImageStore class")
+            return artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
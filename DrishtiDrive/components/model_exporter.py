@@ -0,0 +1,289 @@
+import os
+import sys
+import time
+import shutil
+import subprocess
+import cv2
+import numpy as np
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import ModelExporterConfig, InferenceConfig
+from DrishtiDrive.entity.artifacts_entity import ModelTrainerArtifact, ModelExporterArtifact
+from DrishtiDrive.inference.detector import Detector
+from DrishtiDrive.inference.preprocessing import LetterboxPreprocessor
+from DrishtiDrive.utils.main_utils import (read_yaml_file, write_yaml_file, list_image_files, resolve_split_dir,
+                                           image_to_label_path, read_yolo_labels)
+from DrishtiDrive.utils.evaluation_utils import compute_map, yolo_to_xyxy
+
+
+# Thresholds used for accuracy evaluation, as in yolov5's val.py
+EVAL_CONF_THRESHOLD = 0.001
+EVAL_IOU_THRESHOLD = 0.6
+EVAL_MAX_DETECTIONS = 300
+EVAL_BATCH_SIZE = 8
+
+
+class ModelExporter:
+    def __init__(self, model_exporter_config: ModelExporterConfig, model_trainer_artifact: ModelTrainerArtifact,
+                 feature_store_file_path: str):
+        """
+        Initializes a new instance of the `ModelExporter` class.
+
+        Args:
+            model_exporter_config (ModelExporterConfig): The configuration for the model exporter.
+            model_trainer_artifact (ModelTrainerArtifact): The output of the model trainer.
+            feature_store_file_path (str): The path to the feature store file.
+
+        Raises:
+            AppException: If an error occurs during initialization.
+        """
+        try:
+            self.model_exporter_config = model_exporter_config
+            self.model_trainer_artifact = model_trainer_artifact
+            self.feature_store_file_path = feature_store_file_path
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _split_images(self, split: str) -> list:
+        """
+        Returns the image files of a dataset split named in data.yaml.
+        """
+        data = read_yaml_file(os.path.join(self.feature_store_file_path, 'data.yaml'))
+        return list_image_files(resolve_split_dir(self.feature_store_file_path, data[split]))
+
+    @staticmethod
+    def _subset(items: list, count: int) -> list:
+        """
+        Picks `count` items spread evenly over the list, or all of them when `count` is 0.
+        """
+        if count <= 0 or count >= len(items):
+            return items
+        return [items[i] for i in np.linspace(0, len(items) - 1, count).astype(int)]
+
+    def export_onnx(self) -> str:
+        """
+        Exports the trained model to ONNX with yolov5's export.py, with a dynamic batch dimension.
+
+        Returns:
+            str: The path to the FP32 ONNX model in the model exporter directory.
+        """
+        config = self.model_exporter_config
+        weights_path = os.path.abspath(self.model_trainer_artifact.trained_model_file_path)
+        export_command = [
+            sys.executable, 'export.py',
+            '--weights', weights_path,
+            '--include', 'onnx',
+            '--imgsz', str(config.image_size),
+            '--opset', str(config.opset),
+            '--dynamic',
+        ]
+        logging.info(f"Export command: {' '.join(export_command)}")
+        subprocess.run(export_command, cwd='yolov5', check=True)
+
+        exported_path = os.path.splitext(weights_path)[0] + '.onnx'
+        if not os.path.exists(exported_path):
+            raise FileNotFoundError(f"ONNX export not found: {exported_path}")
+
+        onnx_model_path = os.path.join(config.model_exporter_dir, 'model_fp32.onnx')
+        shutil.copy(exported_path, onnx_model_path)
+        return onnx_model_path
+
+    def quantize_dynamic(self, onnx_model_path: str) -> str:
+        """
+        Builds an INT8 model with dynamically quantized activations; it needs no calibration data.
+        """
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        output_path = os.path.join(self.model_exporter_config.model_exporter_dir, 'model_int8_dynamic.onnx')
+        quantize_dynamic(onnx_model_path, output_path, weight_type=QuantType.QUInt8)
+        return output_path
+
+    def quantize_static(self, onnx_model_path: str) -> str:
+        """
+        Builds an INT8 model with activation ranges calibrated on a subset of the training images.
+        """
+        import onnx
+        from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+
+        config = self.model_exporter_config
+        calibration_files = self._subset(self._split_images('train'), config.calibration_images)
+        logging.info(f"Calibrating static quantization on {len(calibration_files)} images")
+        preprocessor = LetterboxPreprocessor(config.image_size)
+
+        class LetterboxCalibrationReader(CalibrationDataReader):
+            def __init__(self, input_name: str):
+                self.input_name = input_name
+                self.files = iter(calibration_files)
+
+            def get_next(self):
+                for file_path in self.files:
+                    image = cv2.imread(file_path)
+                    if image is not None:
+                        batch, _ = preprocessor([image])
+                        return {self.input_name: batch.copy()}
+                return None
+
+        # Shape inference and graph cleanup make the quantized graph cover more operators
+        prepared_path = os.path.join(config.model_exporter_dir, 'model_fp32_prepared.onnx')
+        quant_pre_process(onnx_model_path, prepared_path, skip_symbolic_shape=True)
+        input_name = onnx.load(prepared_path, load_external_data=False).graph.input[0].name
+
+        output_path = os.path.join(config.model_exporter_dir, 'model_int8_static.onnx')
+        quantize_static(
+            prepared_path,
+            output_path,
+            LetterboxCalibrationReader(input_name),
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+        )
+        os.remove(prepared_path)
+        return output_path
+
+    def _load_evaluation_set(self) -> tuple:
+        """
+        Loads the validation images and their ground truth boxes in pixels.
+        """
+        image_files = self._subset(self._split_images('val'), self.model_exporter_config.evaluation_images)
+        images, ground_truths = [], []
+        for file_path in image_files:
+            image = cv2.imread(file_path)
+            if image is None:
+                logging.warning(f"Skipping unreadable validation image: {file_path}")
+                continue
+            images.append(image)
+            ground_truths.append(yolo_to_xyxy(read_yolo_labels(image_to_label_path(file_path)), image.shape))
+        return images, ground_truths
+
+    def evaluate(self, backend: str, weights_path: str, images: list, ground_truths: list) -> dict:
+        """
+        Measures the size, single-image latency and accuracy of one model variant.
+
+        Args:
+            backend (str): The inference backend that runs the model.
+            weights_path (str): The model file.
+            images (list): The validation images.
+            ground_truths (list): The ground truth boxes of each image, rows of class, x1, y1, x2, y2.
+
+        Returns:
+            dict: The model path, size in MB, median and p90 latency in ms and the mAP metrics.
+        """
+        config = self.model_exporter_config
+        detector = Detector(InferenceConfig(
+            backend=backend,
+            weights_path=weights_path,
+            image_size=config.image_size,
+            conf_threshold=EVAL_CONF_THRESHOLD,
+            iou_threshold=EVAL_IOU_THRESHOLD,
+            max_detections=EVAL_MAX_DETECTIONS,
+        ))
+
+        # Latency of the forward pass alone, the part that differs between variants
+        batch, _ = detector.preprocessor(images[:1])
+        timings = []
+        for _ in range(config.benchmark_runs):
+            start = time.perf_counter()
+            detector.backend.forward(batch)
+            timings.append((time.perf_counter() - start) * 1000.0)
+
+        detections = []
+        for start in range(0, len(images), EVAL_BATCH_SIZE):
+            detections.extend(detector.predict_batch(images[start:start + EVAL_BATCH_SIZE]))
+        metrics = compute_map(detections, ground_truths)
+
+        return {
+            'backend': backend,
+            'model_file_path': weights_path,
+            'size_mb': round(os.path.getsize(weights_path) / 2 ** 20, 2),
+            'latency_ms': round(float(np.median(timings)), 2),
+            'latency_p90_ms': round(float(np.percentile(timings, 90)), 2),
+            'map50': round(metrics['map50'], 4),
+            'map50_95': round(metrics['map50_95'], 4),
+        }
+
+    def select_variant(self, results: dict) -> str:
+        """
+        Picks the fastest variant whose mAP@0.5:0.95 is within the accuracy budget of the PyTorch model.
+        """
+        reference = results['pytorch']['map50_95']
+        eligible = [
+            name for name, result in results.items()
+            if result['map50_95'] >= reference - self.model_exporter_config.max_map_drop
+        ]
+        return min(eligible, key=lambda name: results[name]['latency_ms'])
+
+    def initiate_model_exporter(self) -> ModelExporterArtifact:
+        """
+        Exports the trained model and picks the variant to serve by performing the following steps:
+
+        1. Exports the trained weights to an FP32 ONNX model.
+        2. Builds the configured INT8 variants with ONNX Runtime quantization.
+        3. Measures latency, size and mAP of the PyTorch model and every ONNX variant on the validation set.
+        4. Selects the fastest variant within the accuracy budget and writes the report.
+        5. Copies an ONNX selection to `yolov5/best.onnx`, where the ONNX serving backend loads it.
+
+        Returns:
+            ModelExporterArtifact: The exported models, the selected variant and the report path.
+
+        Raises:
+            AppException: If an error occurs during export, quantization or evaluation.
+        """
+        logging.info("Entered initiate_model_exporter method of ModelExporter class")
+        try:
+            config = self.model_exporter_config
+            os.makedirs(config.model_exporter_dir, exist_ok=True)
+
+            onnx_model_path = self.export_onnx()
+            variants = {
+                'pytorch': ('torch', self.model_trainer_artifact.trained_model_file_path),
+                'onnx_fp32': ('onnx', onnx_model_path),
+            }
+            quantizers = {'dynamic': self.quantize_dynamic, 'static': self.quantize_static}
+            for mode in config.quantization_modes:
+                if mode not in quantizers:
+                    raise ValueError(f"Unknown quantization mode '{mode}', expected one of {sorted(quantizers)}")
+                logging.info(f"Building {mode} INT8 model")
+                variants[f'onnx_int8_{mode}'] = ('onnx', quantizers[mode](onnx_model_path))
+
+            images, ground_truths = self._load_evaluation_set()
+            if not images:
+                raise FileNotFoundError("No readable validation images to evaluate the exported models on")
+            logging.info(f"Evaluating {len(variants)} variants on {len(images)} validation images")
+
+            results = {}
+            for name, (backend, weights_path) in variants.items():
+                results[name] = self.evaluate(backend, weights_path, images, ground_truths)
+                logging.info(f"{name}: {results[name]}")
+
+            selected_variant = self.select_variant(results)
+            selected_model_path = results[selected_variant]['model_file_path']
+            logging.info(f"Selected variant: {selected_variant}")
+
+            write_yaml_file(config.report_file_path, {
+                'evaluation_images': len(images),
+                'max_map_drop': config.max_map_drop,
+                'selected_variant': selected_variant,
+                'variants': results,
+            }, replace=True)
+
+            if results[selected_variant]['backend'] == 'onnx':
+                shutil.copy(selected_model_path, os.path.join('yolov5', 'best.onnx'))
+
+            model_exporter_artifact = ModelExporterArtifact(
+                onnx_model_file_path=onnx_model_path,
+                selected_variant=selected_variant,
+                selected_model_file_path=selected_model_path,
+                report_file_path=config.report_file_path,
+            )
+
+            logging.info("Exited initiate_model_exporter method of ModelExporter class")
+            logging.info(f"Model exporter artifact: {model_exporter_artifact}")
+
+            return model_exporter_artifact
+
+        except Exception as e:
+            logging.error(f"Error in initiate_model_exporter: {str(e)}")
+            raise AppException(e, sys)
@@ -1,21 +1,35 @@
 import os
 import sys
+import json
 import yaml
+import shutil
 import subprocess
-from DrishtiDrive.utils.main_utils import read_yaml_file
+import dataclasses
+from DrishtiDrive.utils.main_utils import read_yaml_file, write_yaml_file
+from DrishtiDrive.utils.resource_utils import total_memory, PeakMemorySampler
+from DrishtiDrive.utils.training_metrics_utils import parse_metrics_line, read_metrics, summarize_epochs
 from DrishtiDrive.exception import AppException
 from DrishtiDrive.logger import logging
 from DrishtiDrive.entity.config_entity import ModelTrainerConfig
-from DrishtiDrive.entity.artifacts_entity import ModelTrainerArtifact
+from DrishtiDrive.constant.training_pipeline import MODEL_TRAINER_BASE_HYP_FILE
+from DrishtiDrive.entity.artifacts_entity import ModelTrainerArtifact, ImageStoreArtifact
+
+
+# Extra memory a probed setting must leave free, for validation and the rest of training
+PROBE_MEMORY_HEADROOM = 0.2
+
 
 class ModelTrainer:
-    def __init__(self, model_trainer_config: ModelTrainerConfig, feature_store_file_path: str):
+    def __init__(self, model_trainer_config: ModelTrainerConfig, feature_store_file_path: str,
+                 image_store_artifact: ImageStoreArtifact = None):
         """
         Initializes a new instance of the `ModelTrainer` class.
 
         Args:
             model_trainer_config (ModelTrainerConfig): The configuration for the model trainer.
             feature_store_file_path (str): The path to the feature store file.
+            image_store_artifact (ImageStoreArtifact, optional): A memory-mapped image store to train from
+                instead of yolov5's in-RAM `--cache`. Defaults to None.
 
         Raises:
             AppException: If an error occurs during initialization.
@@ -23,29 +37,89 @@ class ModelTrainer:
         try:
             self.model_trainer_config = model_trainer_config
             self.feature_store_file_path = feature_store_file_path
+            self.image_store_artifact = image_store_artifact
         except Exception as e:
             raise AppException(e, sys)
 
-    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+    @property
+    def best_model_path(self) -> str:
         """
-        Initializes the model trainer by performing the following steps:
-        
-        1. Checks for the existence of the data.yaml file in the specified feature store file path.
-        2. Reads and updates the data.yaml file by updating the paths to be absolute.
-        3. Prepares the model configuration by reading the corresponding YAML file and updating the number of classes.
-        4. Prepares the training command by constructing the command string using the specified parameters.
-        5. Executes the training command using the `os.system()` function.
-        6. Checks for the existence of the best.pt file in the specified path.
-        7. Copies the best model to the specified model trainer directory.
-        
+        The path where yolov5 saves the best weights of the training run.
+        """
+        config = self.model_trainer_config
+        return os.path.join(config.project_dir, config.run_name, 'weights', 'best.pt')
+
+    @property
+    def world_size(self) -> int:
+        """
+        The number of training processes across all hosts.
+        """
+        config = self.model_trainer_config
+        return max(config.nproc_per_node, 1) * max(config.nnodes, 1)
+
+    def run_training(self, command: list, on_record=None, echo: bool = True) -> int:
+        """
+        Runs the training process and parses its output as it arrives.
+
+        The output is passed through to stdout unchanged and saved to the training log. Every
+        metrics record it carries is appended to the metrics file and logged.
+
+        Args:
+            command (list): The training command.
+            on_record (Callable, optional): Called with every metrics record; returning False stops training.
+                Defaults to None.
+            echo (bool, optional): Whether the output is passed through to stdout. Defaults to True.
+
         Returns:
-            ModelTrainerArtifact: An instance of the ModelTrainerArtifact class containing the path to the trained model file.
-        
+            int: The exit code of the training process.
+        """
+        config = self.model_trainer_config
+        os.makedirs(os.path.dirname(config.metrics_file_path), exist_ok=True)
+        with open(config.log_file_path, 'wb') as log_file, open(config.metrics_file_path, 'w') as metrics_file:
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                       env=dict(os.environ, PYTHONUNBUFFERED='1'))
+            pending = b''
+            stopping = False
+            # Read whatever is available rather than whole lines, so progress bars still show up live
+            while chunk := os.read(process.stdout.fileno(), 2 ** 16):
+                if echo:
+                    sys.stdout.buffer.write(chunk)
+                    sys.stdout.flush()
+                log_file.write(chunk)
+                *lines, pending = (pending + chunk).split(b'\n')
+                for line in lines:
+                    record = parse_metrics_line(line)
+                    if record is None:
+                        continue
+                    metrics_file.write(json.dumps(record) + '\n')
+                    metrics_file.flush()
+                    if record.get('event') == 'epoch':
+                        logging.info(
+                            f"{config.run_name} epoch {record['epoch'] + 1}/{record['epochs']}: "
+                            f"{record['images_per_sec']:.1f} images/s, {record['epoch_time']:.1f}s, "
+                            f"dataloader wait {record['dataloader_wait_fraction']:.0%}, "
+                            f"mAP@0.5:0.95 {record['metrics'].get('map50_95', 0.0):.4f}"
+                        )
+                    if on_record is not None and not stopping and on_record(record) is False:
+                        logging.info(f"Stopping training {config.run_name} after epoch {record.get('epoch', 0) + 1}")
+                        process.terminate()
+                        stopping = True
+            process.stdout.close()
+            return process.wait()
+
+    def prepare_training_command(self, launcher_args: list = None) -> list:
+        """
+        Prepares the dataset and model configuration for yolov5 and returns the training command.
+
+        Args:
+            launcher_args (list, optional): Extra options of the DrishtiDrive launcher. Defaults to None.
+
+        Returns:
+            list: The command running train.py through the DrishtiDrive launcher.
+
         Raises:
-            FileNotFoundError: If the data.yaml file or the best.pt file is not found.
-            AppException: If an error occurs during the initialization process.
+            FileNotFoundError: If the data.yaml file is not found.
         """
-        logging.info("Entered initiate_model_trainer method of ModelTrainer class")
         try:
             # 1. Check for data.yaml file
             data_yaml_path = os.path.join(self.feature_store_file_path, 'data.yaml')
@@ -83,29 +157,244 @@ class ModelTrainer:
                 yaml.dump(config, outfile)
             
             # 4. Prepare training command
-            train_command = (
-                f'cd yolov5/ && python train.py '
-                f'--img 416 '
-                f'--batch {self.model_trainer_config.batch_size} '
-                f'--epochs {self.model_trainer_config.no_epochs} '
-                f'--data {os.path.abspath(data_yaml_path)} '
-                f'--cfg {os.path.abspath(custom_model_config_path)} '
-                f'--weights {self.model_trainer_config.weight_name} '
-                f'--name yolov5s_results '
-                f'--cache'
+            train_args = [
+                '--img', '416',
+                '--batch', str(self.model_trainer_config.batch_size),
+                '--epochs', str(self.model_trainer_config.no_epochs),
+                '--data', os.path.abspath(data_yaml_path),
+                '--cfg', os.path.abspath(custom_model_config_path),
+                '--weights', self.model_trainer_config.weight_name,
+                '--workers', str(self.model_trainer_config.num_workers),
+                '--project', os.path.abspath(self.model_trainer_config.project_dir),
+                '--name', self.model_trainer_config.run_name,
+                # Reuse the run directory, so best.pt is always that of the latest run
+                '--exist-ok',
+            ]
+            if self.model_trainer_config.hyp_overrides:
+                hyp = read_yaml_file(MODEL_TRAINER_BASE_HYP_FILE)
+                hyp.update(self.model_trainer_config.hyp_overrides)
+                hyp_path = os.path.join(self.model_trainer_config.model_trainer_dir, 'hyp.yaml')
+                os.makedirs(self.model_trainer_config.model_trainer_dir, exist_ok=True)
+                with open(hyp_path, 'w') as outfile:
+                    yaml.dump(hyp, outfile)
+                train_args += ['--hyp', os.path.abspath(hyp_path)]
+            # train.py runs through the launcher, which installs the metrics callbacks
+            train_command = [sys.executable, '-m', 'DrishtiDrive.pipeline.yolov5_train']
+            if self.world_size > 1:
+                config = self.model_trainer_config
+                if config.batch_size % self.world_size:
+                    raise ValueError(
+                        f"Batch size {config.batch_size} must be a multiple of the {self.world_size} training processes"
+                    )
+                # One launcher per rank, joined into a gloo process group on host 0
+                train_command = [
+                    sys.executable, '-m', 'torch.distributed.run',
+                    '--nproc_per_node', str(config.nproc_per_node),
+                    '--nnodes', str(config.nnodes),
+                    '--node_rank', str(config.node_rank),
+                    '--master_addr', config.master_addr,
+                    '--master_port', str(config.master_port),
+                    '-m', 'DrishtiDrive.pipeline.yolov5_train',
+                ]
+                train_args += ['--device', 'cpu']
+            if self.model_trainer_config.cpu_ids:
+                train_command += ['--cpus', ','.join(map(str, self.model_trainer_config.cpu_ids))]
+            train_command += launcher_args or []
+            if self.image_store_artifact is not None:
+                # Images come zero-copy from the memory-mapped store, so yolov5's RAM cache is not needed
+                train_command += [
+                    '--image-store', os.path.abspath(self.image_store_artifact.store_file_path),
+                    '--image-store-index', os.path.abspath(self.image_store_artifact.index_file_path),
+                    '--', *train_args,
+                ]
+            else:
+                train_command += ['--', *train_args, '--cache']
+            return train_command
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def memory_limit(self) -> int:
+        """
+        The memory training may use in bytes, 0 if it is unknown.
+        """
+        config = self.model_trainer_config
+        if config.memory_limit_mb:
+            return config.memory_limit_mb * 2 ** 20
+        return int(total_memory() * config.memory_fraction)
+
+    def probe(self, batch_size: int, num_workers: int) -> dict:
+        """
+        Trains for a few batches with one batch size and worker count and measures throughput and peak memory.
+
+        Returns:
+            dict: The setting with its images/s, dataloader wait fraction, peak memory and exit code.
+        """
+        config = self.model_trainer_config
+        name = f'probe_b{batch_size}_w{num_workers}'
+        probe_dir = os.path.join(config.model_trainer_dir, 'probe', name)
+        probe_trainer = ModelTrainer(
+            model_trainer_config=dataclasses.replace(
+                config,
+                model_trainer_dir=probe_dir,
+                metrics_file_path=os.path.join(probe_dir, os.path.basename(config.metrics_file_path)),
+                log_file_path=os.path.join(probe_dir, os.path.basename(config.log_file_path)),
+                project_dir=os.path.dirname(probe_dir),
+                run_name=name,
+                batch_size=batch_size,
+                num_workers=num_workers,
+                no_epochs=1,
+            ),
+            feature_store_file_path=self.feature_store_file_path,
+            image_store_artifact=self.image_store_artifact
+        )
+        command = probe_trainer.prepare_training_command(launcher_args=[
+            '--probe-batches', str(config.probe_batches),
+            '--probe-warmup', str(config.probe_warmup_batches),
+        ])
+        # The yolov5 RAM cache would make every probe decode the whole dataset first
+        if command[-1] == '--cache':
+            command = command[:-1]
+
+        records = []
+        with PeakMemorySampler() as sampler:
+            exit_code = probe_trainer.run_training(command, on_record=records.append, echo=False)
+        # A dataset smaller than the probe ends with an epoch record instead
+        measured = next((record for record in reversed(records) if record.get('event') in ('probe', 'epoch')), {})
+        result = {
+            'batch_size': batch_size,
+            'num_workers': num_workers,
+            'images_per_sec': measured.get('images_per_sec', 0.0),
+            'dataloader_wait_fraction': measured.get('dataloader_wait_fraction', 0.0),
+            'peak_memory_mb': sampler.peak_bytes / 2 ** 20 if sampler.supported else None,
+            'exit_code': exit_code,
+        }
+        logging.info(f"Probe {name}: {result}")
+        return result
+
+    def probe_training_settings(self) -> dict:
+        """
+        Picks the fastest batch size and dataloader worker count that fit in the memory limit.
+
+        Batch sizes are probed in increasing order until one does not fit, with the configured
+        workers; worker counts are then probed at the fastest batch size that fit. A setting
+        fits if its probe succeeds and its peak memory, plus headroom for the rest of training,
+        stays under the limit. The report of every probe is written to `probe_report_file_path`.
+
+        Returns:
+            dict: The chosen `batch_size` and `num_workers`.
+        """
+        config = self.model_trainer_config
+        limit = self.memory_limit()
+        cpus = len(config.cpu_ids) or os.cpu_count() or 1
+        default_workers = min(config.num_workers, cpus)
+        probes = {}
+
+        def fits(result: dict) -> bool:
+            if result['exit_code'] != 0 or not result['images_per_sec']:
+                return False
+            peak = result['peak_memory_mb']
+            return not limit or peak is None or peak * 2 ** 20 * (1 + PROBE_MEMORY_HEADROOM) <= limit
+
+        def run(batch_size: int, num_workers: int) -> dict:
+            if (batch_size, num_workers) not in probes:
+                result = self.probe(batch_size, num_workers)
+                result['fits'] = fits(result)
+                probes[batch_size, num_workers] = result
+            return probes[batch_size, num_workers]
+
+        for batch_size in sorted(config.probe_batch_sizes):
+            # Memory grows with the batch size, so larger ones will not fit either
+            if not run(batch_size, default_workers)['fits']:
+                break
+        fitting = [result for result in probes.values() if result['fits']]
+        if fitting:
+            batch_size = max(fitting, key=lambda result: result['images_per_sec'])['batch_size']
+            for num_workers in sorted(set(min(workers, cpus) for workers in config.probe_num_workers)):
+                run(batch_size, num_workers)
+            fitting = [result for result in probes.values() if result['fits']]
+            chosen = max(fitting, key=lambda result: result['images_per_sec'])
+        else:
+            chosen = {'batch_size': min(config.probe_batch_sizes), 'num_workers': 0}
+            logging.warning(
+                f"No probed setting fits in {limit / 2 ** 20:.0f} MB, training with batch size "
+                f"{chosen['batch_size']} and no dataloader workers"
             )
-            logging.info(f"Training command: {train_command}")
-            
-            os.system(train_command)
-            
 
+        write_yaml_file(config.probe_report_file_path, {
+            'memory_limit_mb': limit / 2 ** 20,
+            'memory_headroom': PROBE_MEMORY_HEADROOM,
+            'chosen': {'batch_size': chosen['batch_size'], 'num_workers': chosen['num_workers']},
+            'probes': list(probes.values()),
+        }, replace=True)
+        shutil.rmtree(os.path.join(config.model_trainer_dir, 'probe'), ignore_errors=True)
+        logging.info(f"Training with batch size {chosen['batch_size']} and {chosen['num_workers']} dataloader workers")
+        return {'batch_size': chosen['batch_size'], 'num_workers': chosen['num_workers']}
+
+    def initiate_model_trainer(self) -> ModelTrainerArtifact:
+        """
+        Initializes the model trainer by performing the following steps:
+        
+        0. Probes a few batch sizes and worker counts and picks the fastest that fits in memory, if `auto_tune` is set.
+        1. Checks for the existence of the data.yaml file in the specified feature store file path.
+        2. Reads and updates the data.yaml file by updating the paths to be absolute.
+        3. Prepares the model configuration by reading the corresponding YAML file and updating the number of classes.
+        4. Prepares the training command by constructing the command string using the specified parameters.
+        5. Runs the training command as a subprocess, recording its per-epoch metrics.
+        6. Checks for the existence of the best.pt file in the specified path.
+        7. Copies the best model to the specified model trainer directory.
+        
+        Returns:
+            ModelTrainerArtifact: An instance of the ModelTrainerArtifact class containing the path to the trained model file.
+        
+        Raises:
+            FileNotFoundError: If the data.yaml file or the best.pt file is not found.
+            AppException: If an error occurs during the initialization process.
+        """
+        logging.info("Entered initiate_model_trainer method of ModelTrainer class")
+        try:
+            # 0. Pick the batch size and dataloader workers for this machine
+            probe_report_file_path = None
+            if self.model_trainer_config.auto_tune and self.world_size > 1:
+                logging.info("Skipping the batch size probe, it measures single-process training")
+            elif self.model_trainer_config.auto_tune:
+                settings = self.probe_training_settings()
+                self.model_trainer_config = dataclasses.replace(self.model_trainer_config, **settings)
+                probe_report_file_path = self.model_trainer_config.probe_report_file_path
+
+            # 1-4. Prepare the dataset, model configuration and training command
+            train_command = self.prepare_training_command()
+            logging.info(f"Training command: {subprocess.list2cmdline(train_command)}")
+
+            # 5. Run training
+            exit_code = self.run_training(train_command)
+            summary = summarize_epochs(read_metrics(self.model_trainer_config.metrics_file_path))
+            logging.info(f"Training finished with exit code {exit_code}: {summary}")
+            if exit_code != 0:
+                raise RuntimeError(
+                    f"Training exited with code {exit_code}, see {self.model_trainer_config.log_file_path}"
+                )
+
+            # Only rank 0, on host 0, writes checkpoints
+            on_host_0 = self.model_trainer_config.node_rank == 0
+            model_trainer_artifact = ModelTrainerArtifact(
+                trained_model_file_path="yolov5/best.pt" if on_host_0 else None,
+                metrics_file_path=self.model_trainer_config.metrics_file_path,
+                batch_size=self.model_trainer_config.batch_size,
+                num_workers=self.model_trainer_config.num_workers,
+                probe_report_file_path=probe_report_file_path,
+            )
+            if not on_host_0:
+                logging.info(f"Training finished on host {self.model_trainer_config.node_rank}, "
+                             f"the trained model is on host 0")
+                return model_trainer_artifact
 
             # 6. Check for best.pt file
-            best_model_path = "yolov5/runs/train/yolov5s_results/weights/best.pt"
+            best_model_path = self.best_model_path
             if not os.path.exists(best_model_path):
                 logging.error(f"Best model not found: {best_model_path}")
-                logging.info("Contents of yolov5/runs/train/yolov5s_results/weights/:")
                 weights_dir = os.path.dirname(best_model_path)
+                logging.info(f"Contents of {weights_dir}/:")
                 if os.path.exists(weights_dir):
                     for item in os.listdir(weights_dir):
                         logging.info(item)
@@ -117,10 +406,6 @@ class ModelTrainer:
             os.system(f"cp {best_model_path} yolov5/")
             os.makedirs(self.model_trainer_config.model_trainer_dir, exist_ok=True)
             os.system(f"cp {best_model_path} {self.model_trainer_config.model_trainer_dir}/")
-            
-            model_trainer_artifact = ModelTrainerArtifact(
-                trained_model_file_path="yolov5/best.pt",
-            )
 
             logging.info("Exited initiate_model_trainer method of ModelTrainer class")
             logging.info(f"Model trainer artifact: {model_trainer_artifact}")
@@ -0,0 +1,118 @@
+import os
+
+
+# Address and port the Flask server listens on
+APP_HOST: str = os.getenv("DRISHTI_APP_HOST", "0.0.0.0")
+APP_PORT: int = int(os.getenv("DRISHTI_APP_PORT", "8080"))
+
+# Directory of the local yolov5 checkout used for model code and weights
+YOLOV5_DIR: str = "yolov5"
+
+# Inference backend: "torch" for .pt checkpoints, "onnx" for ONNX Runtime or "stub" for tests
+INFERENCE_BACKEND: str = os.getenv("DRISHTI_INFERENCE_BACKEND", "torch")
+
+# Trained weights served by the application, .pt for torch and .onnx for onnx
+INFERENCE_WEIGHTS_PATH: str = os.getenv(
+    "DRISHTI_INFERENCE_WEIGHTS",
+    os.path.join(YOLOV5_DIR, "best.onnx" if INFERENCE_BACKEND == "onnx" else "best.pt"),
+)
+
+# Square input size the model was trained with
+INFERENCE_IMAGE_SIZE: int = 416
+
+# Minimum confidence for a detection to be kept
+INFERENCE_CONF_THRESHOLD: float = 0.5
+
+# IoU threshold used by non-max suppression
+INFERENCE_IOU_THRESHOLD: float = 0.45
+
+# Upper bound on detections returned per image
+INFERENCE_MAX_DETECTIONS: int = 1000
+
+# Torch device used for serving
+INFERENCE_DEVICE: str = "cpu"
+
+# Number of dummy forward passes run at startup
+INFERENCE_WARMUP_RUNS: int = 2
+
+# Largest number of requests coalesced into one forward pass
+INFERENCE_MAX_BATCH_SIZE: int = 8
+
+# Longest time the oldest queued request waits for a batch to fill, in milliseconds
+INFERENCE_MAX_WAIT_MS: float = 5.0
+
+# Seconds a request waits for its prediction before giving up
+INFERENCE_REQUEST_TIMEOUT: float = 30.0
+
+# Largest request body accepted by the prediction endpoints, in bytes
+INFERENCE_MAX_UPLOAD_BYTES: int = 16 * 1024 * 1024
+
+# Default /predict response: "annotated" image or bare "detections"
+PREDICT_DEFAULT_FORMAT: str = "annotated"
+
+# Default /predict body encoding: base64 inside "json" or raw "binary"
+PREDICT_DEFAULT_ENCODING: str = "json"
+
+# Default image format and quality of annotated responses
+PREDICT_DEFAULT_IMAGE_FORMAT: str = "jpeg"
+PREDICT_DEFAULT_QUALITY: int = 90
+
+# Default longest side of annotated responses, 0 keeps the input size
+PREDICT_DEFAULT_MAX_SIDE: int = 0
+
+# Number of batches that run inference at the same time
+INFERENCE_NUM_WORKERS: int = 2
+
+# Requests allowed to wait for inference before new ones are rejected
+INFERENCE_MAX_QUEUE_SIZE: int = 256
+
+# Intra-op threads per worker, 0 splits the cores evenly across the workers
+INFERENCE_NUM_THREADS: int = 0
+
+# Default /live source: a device index, a video file or a stream URL
+LIVE_SOURCE: str = os.getenv("DRISHTI_LIVE_SOURCE", "0")
+
+# Other sources clients may pick with ?source=, comma-separated; clients cannot name arbitrary files or URLs
+LIVE_ALLOWED_SOURCES: list = [source for source in os.getenv("DRISHTI_LIVE_SOURCES", "").split(",") if source]
+
+# Capacity of each queue between /live stages; older frames are dropped beyond it
+LIVE_QUEUE_SIZE: int = 2
+
+# Longest side of the streamed frames
+LIVE_MAX_SIDE: int = 640
+
+# JPEG quality of the streamed frames
+LIVE_JPEG_QUALITY: int = 80
+
+# Pace video files at their native frame rate
+LIVE_REALTIME: bool = True
+
+# Frames per forward pass for offline video inference
+VIDEO_BATCH_SIZE: int = 8
+
+# Process one frame out of every VIDEO_FRAME_STRIDE
+VIDEO_FRAME_STRIDE: int = 1
+
+# Directory /predict/video may read server-side videos from by `path`, empty disables `path`
+VIDEO_LOCAL_DIR: str = os.getenv("DRISHTI_VIDEO_DIR", "")
+
+# Largest video upload accepted by /predict/video, in bytes
+VIDEO_MAX_UPLOAD_BYTES: int = 4 * 1024 * 1024 * 1024
+
+# Cache detections of repeated images
+PREDICTION_CACHE_ENABLED: bool = True
+
+# Memory budget of the prediction cache, in bytes
+PREDICTION_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
+# Simulated compute time per image of the stub backend, in milliseconds
+INFERENCE_STUB_LATENCY_MS: float = float(os.getenv("DRISHTI_STUB_LATENCY_MS", "0"))
+
+# Collect serving metrics and expose them on /metrics in the Prometheus text format
+METRICS_ENABLED: bool = os.getenv("DRISHTI_METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# Upper bounds of the latency histogram buckets, in seconds
+METRICS_LATENCY_BUCKETS: list = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+# Upper bounds of the batch size histogram buckets
+METRICS_BATCH_SIZE_BUCKETS: list = [1, 2, 4, 8, 16, 32, 64]
@@ -0,0 +1,232 @@
+import os
+
+
+"""
+COMMON constants
+"""
+# Directory every pipeline stage writes its artifacts under
+ARTIFACTS_DIR: str = "artifacts"
+
+
+"""
+DATA INGESTION related constants
+"""
+# Directory name for data ingestion
+DATA_INGESTION_DIR_NAME: str = "data_ingestion"
+
+# Directory name the dataset zip is extracted into
+DATA_INGESTION_FEATURE_STORE_DIR: str = "feature_store"
+
+# URL of the dataset zip, an http(s)://, file:// or Google Drive link
+DATA_DOWNLOAD_URL: str = os.getenv("DRISHTI_DATA_URL", "")
+
+# Mirrors tried before the primary download URL, e.g. file:///data/drishti.zip or http://mirror.local/drishti.zip
+DATA_DOWNLOAD_MIRRORS: list = [url for url in os.getenv("DRISHTI_DATA_MIRRORS", "").split(",") if url]
+
+# Expected SHA-256 of the dataset zip; empty only checks that the zip is complete
+DATA_DOWNLOAD_SHA256: str = os.getenv("DRISHTI_DATA_SHA256", "")
+
+# Concurrent byte-range requests for large downloads
+DATA_DOWNLOAD_CONNECTIONS: int = 4
+
+# Socket timeout of download requests in seconds
+DATA_DOWNLOAD_TIMEOUT: float = 60.0
+
+# Retries per connection after a network error
+DATA_DOWNLOAD_RETRIES: int = 5
+
+# Threads extracting the dataset zip; decompression and file writes release the GIL
+DATA_INGESTION_EXTRACT_WORKERS: int = min(32, (os.cpu_count() or 1) * 2)
+
+
+"""
+DATA VALIDATION related constants
+"""
+# Directory name for data validation
+DATA_VALIDATION_DIR_NAME: str = "data_validation"
+
+# File name of the validation status
+DATA_VALIDATION_STATUS_FILE: str = "status.txt"
+
+# Files and directories the extracted dataset must contain
+DATA_VALIDATION_ALL_REQUIRED_FILES: list = ["train", "valid", "data.yaml"]
+
+# File name of the structured validation report
+DATA_VALIDATION_REPORT_FILE: str = "validation_report.yaml"
+
+# File name of the array-backed dataset manifest
+DATA_VALIDATION_MANIFEST_FILE: str = "manifest.npz"
+
+# Processes checking images and labels
+DATA_VALIDATION_NUM_WORKERS: int = os.cpu_count() or 1
+
+
+"""
+IMAGE STORE related constants
+"""
+# Directory name for the memory-mapped image store
+IMAGE_STORE_DIR_NAME: str = "image_store"
+
+# File name of the uint8 tensor holding every letterboxed image
+IMAGE_STORE_FILE: str = "images.bin"
+
+# File name of the index of the image store
+IMAGE_STORE_INDEX_FILE: str = "index.npz"
+
+# Side of the letterboxed images, the --img of training
+IMAGE_STORE_IMAGE_SIZE: int = 416
+
+# Grey level of the letterbox padding, as in yolov5
+IMAGE_STORE_PAD_VALUE: int = 114
+
+# Threads decoding and resizing images
+IMAGE_STORE_NUM_WORKERS: int = os.cpu_count() or 1
+
+
+"""
+MODEL TRAINER related constants
+"""
+# File name of the per-epoch training metrics, one JSON record per line
+MODEL_TRAINER_METRICS_FILE: str = "metrics.jsonl"
+
+# File name of the full output of the training process
+MODEL_TRAINER_LOG_FILE: str = "train.log"
+
+# Directory of yolov5 training runs
+MODEL_TRAINER_PROJECT_DIR: str = "yolov5/runs/train"
+
+# Name of the yolov5 training run
+MODEL_TRAINER_RUN_NAME: str = "yolov5s_results"
+
+# yolov5 hyperparameter file that hyperparameter overrides are applied to
+MODEL_TRAINER_BASE_HYP_FILE: str = "yolov5/data/hyps/hyp.scratch-low.yaml"
+
+# Dataloader workers of training, yolov5's default
+MODEL_TRAINER_NUM_WORKERS: int = 8
+
+# Whether a short probe picks the batch size and dataloader workers before training
+MODEL_TRAINER_AUTO_TUNE: bool = True
+
+# Batch sizes tried by the probe, in increasing order
+MODEL_TRAINER_PROBE_BATCH_SIZES: list = [8, 16, 32, 64]
+
+# Dataloader worker counts tried by the probe
+MODEL_TRAINER_PROBE_NUM_WORKERS: list = [0, 2, 4, 8]
+
+# Batches timed by each probe run, after the warm-up batches
+MODEL_TRAINER_PROBE_BATCHES: int = 10
+
+# Batches run before a probe run starts timing
+MODEL_TRAINER_PROBE_WARMUP_BATCHES: int = 3
+
+# Memory training may use in MB, 0 for MODEL_TRAINER_MEMORY_FRACTION of the machine's memory
+MODEL_TRAINER_MEMORY_LIMIT_MB: int = int(os.getenv("DRISHTI_TRAINING_MEMORY_LIMIT_MB", "0"))
+
+# Fraction of the machine's (or container's) memory training may use when no limit is set
+MODEL_TRAINER_MEMORY_FRACTION: float = 0.8
+
+# File name of the probe report
+MODEL_TRAINER_PROBE_REPORT_FILE: str = "probe_report.yaml"
+
+# Training processes (ranks) on this host, more than 1 for CPU data-parallel training
+MODEL_TRAINER_NPROC_PER_NODE: int = int(os.getenv("DRISHTI_TRAINING_NPROC_PER_NODE", "1"))
+
+# Hosts taking part in distributed training
+MODEL_TRAINER_NNODES: int = int(os.getenv("DRISHTI_TRAINING_NNODES", "1"))
+
+# Index of this host among them; host 0 holds rank 0, which writes the checkpoints
+MODEL_TRAINER_NODE_RANK: int = int(os.getenv("DRISHTI_TRAINING_NODE_RANK", "0"))
+
+# Address and port of host 0, where the ranks meet
+MODEL_TRAINER_MASTER_ADDR: str = os.getenv("DRISHTI_TRAINING_MASTER_ADDR", "127.0.0.1")
+MODEL_TRAINER_MASTER_PORT: int = int(os.getenv("DRISHTI_TRAINING_MASTER_PORT", "29500"))
+
+
+"""
+HYPERPARAMETER SWEEP related constants
+"""
+# Directory name for hyperparameter sweeps, one subdirectory per trial
+HYPERPARAMETER_SWEEP_DIR_NAME: str = "hyperparameter_sweep"
+
+# Values tried for each hyperparameter; ModelTrainerConfig fields or yolov5 hyp keys
+HYPERPARAMETER_SWEEP_SEARCH_SPACE: dict = {
+    "weight_name": ["yolov5n.pt", "yolov5s.pt"],
+    "batch_size": [8, 16, 32],
+    "lr0": [0.001, 0.003, 0.01, 0.03],
+    "momentum": [0.8, 0.9, 0.937],
+    "weight_decay": [0.0001, 0.0005, 0.001],
+}
+
+# Trials sampled from the search space
+HYPERPARAMETER_SWEEP_NUM_TRIALS: int = 16
+
+# Epochs of a trial that is never stopped
+HYPERPARAMETER_SWEEP_MAX_EPOCHS: int = 30
+
+# Epochs of the first rung, where the first trials are stopped
+HYPERPARAMETER_SWEEP_MIN_EPOCHS: int = 3
+
+# Only the best 1 / reduction factor of the trials reaching a rung go on to the next one
+HYPERPARAMETER_SWEEP_REDUCTION_FACTOR: int = 3
+
+# Per-epoch metric trials are ranked by, higher is better
+HYPERPARAMETER_SWEEP_METRIC: str = "map50_95"
+
+# CPU cores given to each trial; trials run in parallel on disjoint cores
+HYPERPARAMETER_SWEEP_CORES_PER_TRIAL: int = 2
+
+# Trainer run by trials, "yolov5" or "stub" for synthetic learning curves
+HYPERPARAMETER_SWEEP_TRAINER: str = "yolov5"
+
+# Seed of the trial sampling
+HYPERPARAMETER_SWEEP_SEED: int = 0
+
+# File name of the sweep report
+HYPERPARAMETER_SWEEP_REPORT_FILE: str = "sweep_report.yaml"
+
+
+"""
+MODEL EXPORTER related constants
+"""
+# Directory name for model export artifacts
+MODEL_EXPORTER_DIR_NAME: str = "model_exporter"
+
+# INT8 variants built next to the FP32 ONNX export, any of "dynamic" and "static"
+MODEL_EXPORTER_QUANTIZATION_MODES: list = ["dynamic", "static"]
+
+# ONNX opset used for the export
+MODEL_EXPORTER_OPSET: int = 12
+
+# Training images fed through the model to calibrate static quantization
+MODEL_EXPORTER_CALIBRATION_IMAGES: int = 100
+
+# Validation images used to compare the accuracy of the variants, 0 for all of them
+MODEL_EXPORTER_EVALUATION_IMAGES: int = 0
+
+# Timed forward passes per variant when measuring latency
+MODEL_EXPORTER_BENCHMARK_RUNS: int = 50
+
+# Largest mAP@0.5:0.95 drop from the PyTorch model that a shipped variant may have
+MODEL_EXPORTER_MAX_MAP_DROP: float = 0.01
+
+# File name of the latency, size and accuracy report
+MODEL_EXPORTER_REPORT_FILE: str = "export_report.yaml"
+
+
+"""
+TRAINING JOB related constants
+"""
+# Directory name for background training jobs, one subdirectory per job
+TRAINING_JOB_DIR_NAME: str = "training_jobs"
+
+# Training jobs running at the same time
+TRAINING_JOB_MAX_CONCURRENT: int = 1
+
+# Jobs waiting for a free slot before new ones are rejected
+TRAINING_JOB_MAX_QUEUED: int = 8
+
+# CPU cores kept free of training for the server's predictions
+TRAINING_JOB_RESERVED_CPUS: int = max((os.cpu_count() or 1) // 2, 1)
+
+# Niceness added to training processes, so predictions win the cores they share
+TRAINING_JOB_NICE: int = 10
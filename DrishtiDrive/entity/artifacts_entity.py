@@ -13,16 +13,76 @@ class DataIngestionArtifact:
 
 
 # This dataclass represents the artifacts produced by the data validation process.
-# It contains a boolean indicating whether all the required files exist or not.
+# It contains the validation status and the path to the dataset manifest.
 @dataclass
 class DataValidationArtifact:
-    # Boolean indicating whether all the required files exist or not.
+    # Boolean indicating whether all the required files exist and every sample is valid.
     validation_status: bool
 
+    # Path to the dataset manifest, None if validation stopped before building it.
+    manifest_file_path: str = None
+
+
+# This dataclass represents the artifacts produced by the image store process.
+# It contains the paths to the memory-mapped image store and its index.
+@dataclass
+class ImageStoreArtifact:
+    # Path to the uint8 tensor file with every letterboxed image.
+    store_file_path: str
+
+    # Path to the index of the store.
+    index_file_path: str
+
 
 # This dataclass represents the artifacts produced by the model training process.
 # It contains the path to the trained model file.
 @dataclass
 class ModelTrainerArtifact:
-    # Path to the trained model file.
+    # Path to the trained model file, None on the hosts other than host 0 of a distributed run.
     trained_model_file_path: str
+
+    # Path to the per-epoch training metrics (JSONL).
+    metrics_file_path: str = None
+
+    # Batch size training ran with, as picked by the probe or configured.
+    batch_size: int = None
+
+    # Dataloader workers training ran with, as picked by the probe or configured.
+    num_workers: int = None
+
+    # Path to the report of the batch size and worker probe, None if training was not probed.
+    probe_report_file_path: str = None
+
+
+# This dataclass represents the artifacts produced by the model export process.
+# It contains the exported and selected models and the comparison report.
+@dataclass
+class ModelExporterArtifact:
+    # Path to the FP32 ONNX export.
+    onnx_model_file_path: str
+
+    # Name of the variant selected for serving, e.g. "onnx_int8_dynamic".
+    selected_variant: str
+
+    # Path to the model file of the selected variant.
+    selected_model_file_path: str
+
+    # Path to the latency, size and accuracy report.
+    report_file_path: str
+
+
+# This dataclass represents the artifacts produced by a hyperparameter sweep.
+# It contains the best trial and the sweep report.
+@dataclass
+class HyperparameterSweepArtifact:
+    # Hyperparameters of the best trial.
+    best_params: dict
+
+    # Best value of the sweep metric reached by that trial.
+    best_metric: float
+
+    # Path to the best weights of that trial, None for the stub trainer.
+    best_model_file_path: str
+
+    # Path to the report of every trial.
+    report_file_path: str
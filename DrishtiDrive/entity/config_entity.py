@@ -2,6 +2,12 @@ import os
 from dataclasses import dataclass, field
 from datetime import datetime
 from DrishtiDrive.constant.training_pipeline import *
+from DrishtiDrive.constant.application import *
+
+
+# Field metadata of settings that only change how a stage runs, never what it produces;
+# they are left out of the stage fingerprint
+RUNTIME_ONLY = {'fingerprint': False}
 
 
 @dataclass
@@ -27,6 +33,12 @@ class DataIngestionConfig:
         data_ingestion_dir (str): The directory for data ingestion.
         feature_store_file_path (str): The file path for the feature store.
         data_download_url (str): The URL for downloading the data.
+        data_mirror_urls (list): The file:// or http(s):// mirrors tried before the download URL.
+        data_sha256 (str): The expected SHA-256 of the dataset zip, empty to skip the check.
+        download_num_connections (int): The concurrent byte-range requests for large downloads.
+        download_timeout (float): The socket timeout of download requests in seconds.
+        download_retries (int): The retries per connection after a network error.
+        extract_num_workers (int): The number of threads extracting the dataset zip.
     """
     # Create the directory for data ingestion
     data_ingestion_dir: str = os.path.join(
@@ -41,6 +53,24 @@ class DataIngestionConfig:
     # Set the URL for downloading the data
     data_download_url: str = DATA_DOWNLOAD_URL
 
+    def _get_mirror_urls():
+        """Returns a copy of the mirror URL list."""
+        return DATA_DOWNLOAD_MIRRORS.copy()
+
+    # Mirrors tried before the download URL
+    data_mirror_urls: list = field(default_factory=_get_mirror_urls)
+
+    # Expected SHA-256 of the dataset zip
+    data_sha256: str = DATA_DOWNLOAD_SHA256
+
+    # Download connections, timeout and retries
+    download_num_connections: int = field(default=DATA_DOWNLOAD_CONNECTIONS, metadata=RUNTIME_ONLY)
+    download_timeout: float = field(default=DATA_DOWNLOAD_TIMEOUT, metadata=RUNTIME_ONLY)
+    download_retries: int = field(default=DATA_DOWNLOAD_RETRIES, metadata=RUNTIME_ONLY)
+
+    # Number of threads extracting the dataset zip
+    extract_num_workers: int = field(default=DATA_INGESTION_EXTRACT_WORKERS, metadata=RUNTIME_ONLY)
+
 
 
 
@@ -53,6 +83,9 @@ class DataValidationConfig:
         data_validation_dir (str): The directory for data validation.
         valid_status_file_dir (str): The file path for the status file.
         required_file_list (list): A list of all the required files for data validation.
+        report_file_path (str): The file path for the structured validation report.
+        manifest_file_path (str): The file path for the dataset manifest.
+        num_workers (int): The number of processes checking images and labels.
     """
 
     def _get_required_file_list():
@@ -70,8 +103,44 @@ class DataValidationConfig:
     # List of all the required files for data validation
     required_file_list: list = field(default_factory=_get_required_file_list) 
 
+    # File path for the structured validation report
+    report_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_REPORT_FILE)
+
+    # File path for the dataset manifest
+    manifest_file_path: str = os.path.join(data_validation_dir, DATA_VALIDATION_MANIFEST_FILE)
+
+    # Number of processes checking images and labels
+    num_workers: int = field(default=DATA_VALIDATION_NUM_WORKERS, metadata=RUNTIME_ONLY)
+
 
     
+@dataclass
+class ImageStoreConfig:
+    """
+    Configuration class for the memory-mapped image store.
+
+    Attributes:
+        image_store_dir (str): The directory for the image store.
+        store_file_path (str): The file path for the uint8 tensor of letterboxed images.
+        index_file_path (str): The file path for the index of the store.
+        image_size (int): The side of the letterboxed images.
+        pad_value (int): The grey level of the letterbox padding.
+        num_workers (int): The number of threads decoding and resizing images.
+    """
+    # Directory for the image store
+    image_store_dir: str = os.path.join(
+        training_pipeline_config.artifacts_dir, IMAGE_STORE_DIR_NAME
+    )
+
+    # File paths for the store and its index
+    store_file_path: str = os.path.join(image_store_dir, IMAGE_STORE_FILE)
+    index_file_path: str = os.path.join(image_store_dir, IMAGE_STORE_INDEX_FILE)
+
+    image_size: int = IMAGE_STORE_IMAGE_SIZE
+    pad_value: int = IMAGE_STORE_PAD_VALUE
+    num_workers: int = field(default=IMAGE_STORE_NUM_WORKERS, metadata=RUNTIME_ONLY)
+
+
 @dataclass
 class ModelTrainerConfig:
     """
@@ -82,11 +151,312 @@ class ModelTrainerConfig:
         weight_name (str): The name of the weight file.
         no_epochs (int): The number of epochs for training.
         batch_size (int): The batch size for training.
+        metrics_file_path (str): The file path for the per-epoch training metrics.
+        log_file_path (str): The file path for the output of the training process.
+        project_dir (str): The directory of yolov5 training runs.
+        run_name (str): The name of the yolov5 training run.
+        hyp_overrides (dict): yolov5 hyperparameters replacing those of the base hyperparameter file.
+        num_workers (int): The number of dataloader workers.
+        cpu_ids (list): The CPU cores training is pinned to, all of them if empty.
+        auto_tune (bool): Whether a probe picks the batch size and dataloader workers before training.
+        probe_batch_sizes (list): The batch sizes tried by the probe.
+        probe_num_workers (list): The dataloader worker counts tried by the probe.
+        probe_batches (int): The batches timed by each probe run.
+        probe_warmup_batches (int): The batches run before a probe run starts timing.
+        memory_limit_mb (int): The memory training may use, 0 for `memory_fraction` of the machine's memory.
+        memory_fraction (float): The fraction of the machine's memory training may use when no limit is set.
+        probe_report_file_path (str): The file path for the probe report.
+        nproc_per_node (int): The training processes on this host, more than 1 for data-parallel training.
+        nnodes (int): The hosts taking part in distributed training.
+        node_rank (int): The index of this host, host 0 writes the checkpoints.
+        master_addr (str): The address of host 0.
+        master_port (int): The port ranks meet on at host 0.
     """
+
+    def _get_hyp_overrides():
+        """Returns an empty set of hyperparameter overrides."""
+        return {}
+
+    def _get_cpu_ids():
+        """Returns an empty list of CPU cores."""
+        return []
+
+    def _get_probe_batch_sizes():
+        """Returns a copy of the probed batch sizes."""
+        return MODEL_TRAINER_PROBE_BATCH_SIZES.copy()
+
+    def _get_probe_num_workers():
+        """Returns a copy of the probed worker counts."""
+        return MODEL_TRAINER_PROBE_NUM_WORKERS.copy()
+
     model_trainer_dir: str = os.path.join(
         training_pipeline_config.artifacts_dir, 'model_trainer'
     )
-    weight_name = 'yolov5s.pt'
-    no_epochs = 500
-    batch_size = 32
+    weight_name: str = 'yolov5s.pt'
+    no_epochs: int = 500
+    batch_size: int = 32
+    project_dir: str = MODEL_TRAINER_PROJECT_DIR
+    run_name: str = MODEL_TRAINER_RUN_NAME
+    hyp_overrides: dict = field(default_factory=_get_hyp_overrides)
+    num_workers: int = field(default=MODEL_TRAINER_NUM_WORKERS, metadata=RUNTIME_ONLY)
+    cpu_ids: list = field(default_factory=_get_cpu_ids, metadata=RUNTIME_ONLY)
+    auto_tune: bool = MODEL_TRAINER_AUTO_TUNE
+    probe_batch_sizes: list = field(default_factory=_get_probe_batch_sizes)
+    probe_num_workers: list = field(default_factory=_get_probe_num_workers)
+    probe_batches: int = MODEL_TRAINER_PROBE_BATCHES
+    probe_warmup_batches: int = MODEL_TRAINER_PROBE_WARMUP_BATCHES
+    memory_limit_mb: int = MODEL_TRAINER_MEMORY_LIMIT_MB
+    memory_fraction: float = MODEL_TRAINER_MEMORY_FRACTION
+    nproc_per_node: int = MODEL_TRAINER_NPROC_PER_NODE
+    nnodes: int = MODEL_TRAINER_NNODES
+    node_rank: int = field(default=MODEL_TRAINER_NODE_RANK, metadata=RUNTIME_ONLY)
+    master_addr: str = field(default=MODEL_TRAINER_MASTER_ADDR, metadata=RUNTIME_ONLY)
+    master_port: int = field(default=MODEL_TRAINER_MASTER_PORT, metadata=RUNTIME_ONLY)
+
+    # File path for the per-epoch training metrics
+    metrics_file_path: str = field(
+        default=os.path.join(model_trainer_dir, MODEL_TRAINER_METRICS_FILE), metadata=RUNTIME_ONLY
+    )
+
+    # File path for the output of the training process
+    log_file_path: str = field(
+        default=os.path.join(model_trainer_dir, MODEL_TRAINER_LOG_FILE), metadata=RUNTIME_ONLY
+    )
+
+    # File path for the batch size and worker probe report
+    probe_report_file_path: str = os.path.join(model_trainer_dir, MODEL_TRAINER_PROBE_REPORT_FILE)
+
+
+@dataclass
+class ModelExporterConfig:
+    """
+    Configuration class for model export and quantization.
+
+    Attributes:
+        model_exporter_dir (str): The directory for the exported models.
+        quantization_modes (list): The INT8 variants to build, any of "dynamic" and "static".
+        image_size (int): The square input size of the exported model.
+        opset (int): The ONNX opset of the export.
+        calibration_images (int): The number of training images used to calibrate static quantization.
+        evaluation_images (int): The number of validation images used for mAP, 0 for all of them.
+        benchmark_runs (int): The number of timed forward passes per variant.
+        max_map_drop (float): The largest mAP@0.5:0.95 drop from the PyTorch model a shipped variant may have.
+        report_file_path (str): The file path for the export report.
+    """
+
+    def _get_quantization_modes():
+        """Returns a copy of the quantization modes."""
+        return MODEL_EXPORTER_QUANTIZATION_MODES.copy()
+
+    # Directory for model export
+    model_exporter_dir: str = os.path.join(
+        training_pipeline_config.artifacts_dir, MODEL_EXPORTER_DIR_NAME
+    )
+
+    quantization_modes: list = field(default_factory=_get_quantization_modes)
+    image_size: int = INFERENCE_IMAGE_SIZE
+    opset: int = MODEL_EXPORTER_OPSET
+    calibration_images: int = MODEL_EXPORTER_CALIBRATION_IMAGES
+    evaluation_images: int = MODEL_EXPORTER_EVALUATION_IMAGES
+    benchmark_runs: int = MODEL_EXPORTER_BENCHMARK_RUNS
+    max_map_drop: float = MODEL_EXPORTER_MAX_MAP_DROP
+
+    # File path for the export report
+    report_file_path: str = os.path.join(model_exporter_dir, MODEL_EXPORTER_REPORT_FILE)
+
+
+@dataclass
+class HyperparameterSweepConfig:
+    """
+    Configuration class for hyperparameter sweeps.
+
+    Attributes:
+        sweep_dir (str): The directory for the sweep, with one run directory per trial.
+        search_space (dict): The values tried for each hyperparameter.
+        num_trials (int): The number of trials sampled from the search space.
+        max_epochs (int): The epochs of a trial that is never stopped.
+        min_epochs (int): The epochs of the first rung.
+        reduction_factor (int): The fraction 1 / reduction_factor of trials promoted at every rung.
+        metric (str): The per-epoch metric trials are ranked by, higher is better.
+        cores_per_trial (int): The CPU cores given to each trial.
+        trainer (str): The trainer run by trials, "yolov5" or "stub".
+        seed (int): The seed of the trial sampling.
+        report_file_path (str): The file path for the sweep report.
+    """
+
+    def _get_search_space():
+        """Returns a copy of the search space."""
+        return {name: list(values) for name, values in HYPERPARAMETER_SWEEP_SEARCH_SPACE.items()}
+
+    # Directory for the sweep
+    sweep_dir: str = os.path.join(
+        training_pipeline_config.artifacts_dir, HYPERPARAMETER_SWEEP_DIR_NAME
+    )
+
+    search_space: dict = field(default_factory=_get_search_space)
+    num_trials: int = HYPERPARAMETER_SWEEP_NUM_TRIALS
+    max_epochs: int = HYPERPARAMETER_SWEEP_MAX_EPOCHS
+    min_epochs: int = HYPERPARAMETER_SWEEP_MIN_EPOCHS
+    reduction_factor: int = HYPERPARAMETER_SWEEP_REDUCTION_FACTOR
+    metric: str = HYPERPARAMETER_SWEEP_METRIC
+    cores_per_trial: int = HYPERPARAMETER_SWEEP_CORES_PER_TRIAL
+    trainer: str = HYPERPARAMETER_SWEEP_TRAINER
+    seed: int = HYPERPARAMETER_SWEEP_SEED
+
+    # File path for the sweep report
+    report_file_path: str = os.path.join(sweep_dir, HYPERPARAMETER_SWEEP_REPORT_FILE)
+
+
+@dataclass
+class TrainingJobConfig:
+    """
+    Configuration class for background training jobs.
+
+    Attributes:
+        jobs_dir (str): The directory holding the state and log of every job.
+        max_concurrent_jobs (int): The number of jobs running at the same time.
+        max_queued_jobs (int): The number of waiting jobs before new ones are rejected.
+        reserved_serving_cpus (int): The CPU cores training jobs leave to the server.
+        nice (int): The niceness added to job processes.
+    """
+    # Directory for training jobs
+    jobs_dir: str = os.path.join(
+        training_pipeline_config.artifacts_dir, TRAINING_JOB_DIR_NAME
+    )
+
+    max_concurrent_jobs: int = TRAINING_JOB_MAX_CONCURRENT
+    max_queued_jobs: int = TRAINING_JOB_MAX_QUEUED
+    reserved_serving_cpus: int = TRAINING_JOB_RESERVED_CPUS
+    nice: int = TRAINING_JOB_NICE
     
+
+
+
+@dataclass
+class InferenceConfig:
+    """
+    Configuration class for in-process inference.
+
+    Attributes:
+        backend (str): The inference backend, one of "torch", "onnx" or "stub".
+        yolov5_dir (str): The directory of the local yolov5 checkout.
+        weights_path (str): The path to the trained weights.
+        image_size (int): The square input size of the model.
+        conf_threshold (float): The minimum confidence for a detection.
+        iou_threshold (float): The IoU threshold for non-max suppression.
+        max_detections (int): The maximum number of detections per image.
+        device (str): The torch device to run the model on.
+        warmup_runs (int): The number of warm-up forward passes at startup.
+        num_threads (int): The intra-op threads of the backend, 0 keeps its default.
+        stub_latency_ms (float): The simulated compute time per image of the stub backend.
+    """
+    backend: str = INFERENCE_BACKEND
+    yolov5_dir: str = YOLOV5_DIR
+    weights_path: str = INFERENCE_WEIGHTS_PATH
+    image_size: int = INFERENCE_IMAGE_SIZE
+    conf_threshold: float = INFERENCE_CONF_THRESHOLD
+    iou_threshold: float = INFERENCE_IOU_THRESHOLD
+    max_detections: int = INFERENCE_MAX_DETECTIONS
+    device: str = INFERENCE_DEVICE
+    warmup_runs: int = INFERENCE_WARMUP_RUNS
+    num_threads: int = INFERENCE_NUM_THREADS
+    stub_latency_ms: float = INFERENCE_STUB_LATENCY_MS
+
+
+@dataclass
+class BatchSchedulerConfig:
+    """
+    Configuration class for request micro-batching.
+
+    Attributes:
+        max_batch_size (int): The largest number of requests run in one forward pass.
+        max_wait_ms (float): The longest time the oldest request waits for a batch to fill.
+        request_timeout (float): The seconds a request waits for its prediction.
+        num_workers (int): The number of batches run concurrently on the worker pool.
+        max_queue_size (int): The number of waiting requests before new ones are rejected.
+    """
+    max_batch_size: int = INFERENCE_MAX_BATCH_SIZE
+    max_wait_ms: float = INFERENCE_MAX_WAIT_MS
+    request_timeout: float = INFERENCE_REQUEST_TIMEOUT
+    num_workers: int = INFERENCE_NUM_WORKERS
+    max_queue_size: int = INFERENCE_MAX_QUEUE_SIZE
+
+
+@dataclass
+class StreamConfig:
+    """
+    Configuration class for the /live streaming pipeline.
+
+    Attributes:
+        source (str): The default device index, video file or stream URL.
+        allowed_sources (list): The other sources clients may choose.
+        queue_size (int): The capacity of each queue between stages.
+        max_side (int): The longest side of the streamed frames.
+        jpeg_quality (int): The JPEG quality of the streamed frames.
+        realtime (bool): Whether video files are paced at their native frame rate.
+    """
+
+    def _get_allowed_sources():
+        """Returns a copy of the allowed source list."""
+        return LIVE_ALLOWED_SOURCES.copy()
+
+    source: str = LIVE_SOURCE
+    allowed_sources: list = field(default_factory=_get_allowed_sources)
+    queue_size: int = LIVE_QUEUE_SIZE
+    max_side: int = LIVE_MAX_SIDE
+    jpeg_quality: int = LIVE_JPEG_QUALITY
+    realtime: bool = LIVE_REALTIME
+
+
+@dataclass
+class VideoInferenceConfig:
+    """
+    Configuration class for offline video inference.
+
+    Attributes:
+        batch_size (int): The number of frames per forward pass.
+        frame_stride (int): Process one frame out of every `frame_stride`.
+        max_upload_bytes (int): The largest accepted video upload.
+        local_dir (str): The directory server-side videos may be read from, empty to only accept uploads.
+    """
+    batch_size: int = VIDEO_BATCH_SIZE
+    frame_stride: int = VIDEO_FRAME_STRIDE
+    max_upload_bytes: int = VIDEO_MAX_UPLOAD_BYTES
+    local_dir: str = VIDEO_LOCAL_DIR
+
+
+@dataclass
+class PredictionCacheConfig:
+    """
+    Configuration class for the prediction cache.
+
+    Attributes:
+        enabled (bool): Whether detections of repeated images are cached.
+        max_bytes (int): The memory budget of the cache.
+    """
+    enabled: bool = PREDICTION_CACHE_ENABLED
+    max_bytes: int = PREDICTION_CACHE_MAX_BYTES
+
+
+@dataclass
+class MetricsConfig:
+    """
+    Configuration class for the serving metrics.
+
+    Attributes:
+        enabled (bool): Whether metrics are collected and served on /metrics.
+        latency_buckets (list): The upper bounds of the latency histogram buckets, in seconds.
+        batch_size_buckets (list): The upper bounds of the batch size histogram buckets.
+    """
+
+    def _get_latency_buckets():
+        """Returns a copy of the latency buckets."""
+        return METRICS_LATENCY_BUCKETS.copy()
+
+    def _get_batch_size_buckets():
+        """Returns a copy of the batch size buckets."""
+        return METRICS_BATCH_SIZE_BUCKETS.copy()
+
+    enabled: bool = METRICS_ENABLED
+    latency_buckets: list = field(default_factory=_get_latency_buckets)
+    batch_size_buckets: list = field(default_factory=_get_batch_size_buckets)
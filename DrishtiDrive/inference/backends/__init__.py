@@ -0,0 +1,28 @@
+import importlib
+
+from DrishtiDrive.entity.config_entity import InferenceConfig
+
+
+# Backend name -> (module, class); modules are imported lazily so each backend only needs its own dependencies
+BACKENDS = {
+    "torch": ("DrishtiDrive.inference.backends.torch_backend", "TorchBackend"),
+    "onnx": ("DrishtiDrive.inference.backends.onnx_backend", "OnnxRuntimeBackend"),
+    "stub": ("DrishtiDrive.inference.backends.stub_backend", "StubBackend"),
+}
+
+
+def create_backend(inference_config: InferenceConfig):
+    """
+    Creates the inference backend named by `inference_config.backend`.
+
+    Args:
+        inference_config (InferenceConfig): The configuration for inference.
+
+    Returns:
+        InferenceBackend: The loaded backend.
+    """
+    if inference_config.backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{inference_config.backend}', expected one of {sorted(BACKENDS)}")
+    module_name, class_name = BACKENDS[inference_config.backend]
+    backend_class = getattr(importlib.import_module(module_name), class_name)
+    return backend_class(inference_config)
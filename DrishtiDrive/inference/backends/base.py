@@ -0,0 +1,55 @@
+import hashlib
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+from DrishtiDrive.entity.config_entity import InferenceConfig
+
+
+class InferenceBackend(ABC):
+    """
+    Runs the raw detection model on preprocessed batches.
+
+    Every backend takes a float32 RGB batch of shape (B, 3, S, S) scaled to [0, 1] and returns
+    raw YOLOv5 output of shape (B, N, 5 + nc), so pre- and post-processing are shared by all of them.
+
+    Attributes:
+        names (list): The class names indexed by class id.
+        model_version (str): Identifies the weights, used to key cached results.
+    """
+
+    names: list
+    model_version: str
+
+    def __init__(self, inference_config: InferenceConfig):
+        self.inference_config = inference_config
+
+    @abstractmethod
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        """
+        Run the model on a preprocessed batch.
+
+        Args:
+            batch (np.ndarray): A float32 array of shape (B, 3, S, S).
+
+        Returns:
+            np.ndarray: Raw predictions of shape (B, N, 5 + nc) with rows of cx, cy, w, h, objectness, class scores.
+        """
+
+    @staticmethod
+    def hash_weights(weights_path: str) -> str:
+        """
+        Hash a weights file so results can be tied to the exact model that produced them.
+        """
+        digest = hashlib.sha256()
+        with open(weights_path, 'rb') as weights_file:
+            for chunk in iter(lambda: weights_file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()[:16]
+
+    @staticmethod
+    def normalise_names(names) -> list:
+        """
+        Class names are a dict in recent yolov5 releases and a list in older ones.
+        """
+        return [names[i] for i in sorted(names)] if isinstance(names, dict) else list(names)
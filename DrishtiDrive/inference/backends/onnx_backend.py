@@ -0,0 +1,51 @@
+import ast
+
+import numpy as np
+
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import InferenceConfig
+from DrishtiDrive.inference.backends.base import InferenceBackend
+
+
+class OnnxRuntimeBackend(InferenceBackend):
+    """
+    ONNX Runtime CPU backend for models exported with yolov5's export.py or the ModelExporter.
+    """
+
+    def __init__(self, inference_config: InferenceConfig):
+        super().__init__(inference_config)
+
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if inference_config.num_threads > 0:
+            options.intra_op_num_threads = inference_config.num_threads
+
+        logging.info(f"Loading ONNX model from: {inference_config.weights_path}")
+        self.session = onnxruntime.InferenceSession(
+            inference_config.weights_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        # Models exported without --dynamic only accept their export batch size
+        self.fixed_batch_size = model_input.shape[0] if isinstance(model_input.shape[0], int) else None
+
+        # yolov5 stores the class names as a Python literal in the model metadata
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        names = ast.literal_eval(metadata["names"]) if "names" in metadata else {}
+        self.names = self.normalise_names(names)
+        self.model_version = self.hash_weights(inference_config.weights_path)
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        if self.fixed_batch_size is None or len(batch) == self.fixed_batch_size:
+            return self.session.run(None, {self.input_name: batch})[0]
+        # Run fixed-batch models chunk by chunk, padding the last chunk
+        step = self.fixed_batch_size
+        outputs = []
+        for start in range(0, len(batch), step):
+            chunk = batch[start:start + step]
+            if len(chunk) < step:
+                chunk = np.concatenate([chunk, np.zeros((step - len(chunk),) + chunk.shape[1:], dtype=chunk.dtype)])
+            outputs.append(self.session.run(None, {self.input_name: chunk})[0])
+        return np.concatenate(outputs)[:len(batch)]
@@ -0,0 +1,46 @@
+import time
+
+import numpy as np
+
+from DrishtiDrive.entity.config_entity import InferenceConfig
+from DrishtiDrive.inference.backends.base import InferenceBackend
+
+
+class StubBackend(InferenceBackend):
+    """
+    Deterministic stand-in model for tests and benchmarks, no weights or deep learning framework needed.
+
+    The input is split into a grid of cells and every cell becomes one anchor covering it.
+    Its objectness is the mean of the brightest channel in the cell, so the same image
+    always gives the same detections and different images give different ones. Its class
+    is that dominant colour channel. An optional fixed delay per image imitates model compute time.
+    """
+
+    # Anchors per side of the grid
+    GRID = 4
+
+    def __init__(self, inference_config: InferenceConfig):
+        super().__init__(inference_config)
+        self.names = ["red", "green", "blue"]
+        self.model_version = "stub"
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        if self.inference_config.stub_latency_ms > 0:
+            time.sleep(self.inference_config.stub_latency_ms * len(batch) / 1000.0)
+
+        count, _, size, _ = batch.shape
+        grid = self.GRID
+        cell = size // grid
+        # Mean of every channel over every cell, shape (B, 3, grid, grid)
+        means = batch[:, :, :cell * grid, :cell * grid].reshape(count, 3, grid, cell, grid, cell).mean(axis=(3, 5))
+
+        centres = (np.arange(grid, dtype=np.float32) + 0.5) * cell
+        prediction = np.zeros((count, grid, grid, 5 + len(self.names)), dtype=np.float32)
+        prediction[..., 0] = centres[None, None, :]
+        prediction[..., 1] = centres[None, :, None]
+        prediction[..., 2:4] = cell * 0.8
+        brightest = means.max(axis=1)
+        prediction[..., 4] = brightest
+        # Channels are RGB, so class ids follow self.names and the dominant channel scores 1
+        prediction[..., 5:] = means.transpose(0, 2, 3, 1) / (brightest[..., None] + 1e-6)
+        return prediction.reshape(count, grid * grid, 5 + len(self.names))
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import InferenceConfig
+from DrishtiDrive.inference.backends.base import InferenceBackend
+
+
+class TorchBackend(InferenceBackend):
+    """
+    Eager PyTorch backend for yolov5 `.pt` checkpoints.
+    """
+
+    def __init__(self, inference_config: InferenceConfig):
+        super().__init__(inference_config)
+
+        # The pickled weights reference yolov5's `models` and `utils` packages,
+        # so the checkout has to be importable before the weights are loaded
+        yolov5_dir = os.path.abspath(inference_config.yolov5_dir)
+        if yolov5_dir not in sys.path:
+            sys.path.insert(0, yolov5_dir)
+
+        import torch
+        from models.common import DetectMultiBackend
+
+        self._torch = torch
+        if inference_config.num_threads > 0:
+            torch.set_num_threads(inference_config.num_threads)
+
+        logging.info(f"Loading PyTorch weights from: {inference_config.weights_path}")
+        self.device = torch.device(inference_config.device)
+        self.model = DetectMultiBackend(os.path.abspath(inference_config.weights_path), device=self.device, fuse=True)
+        self.model.eval()
+        self.names = self.normalise_names(self.model.names)
+        self.model_version = self.hash_weights(inference_config.weights_path)
+
+    def forward(self, batch: np.ndarray) -> np.ndarray:
+        with self._torch.no_grad():
+            # The tensor shares memory with the preprocessing buffer, no copy is made on CPU
+            prediction = self.model(self._torch.from_numpy(batch).to(self.device))
+        # Some yolov5 releases also return the per-level feature maps
+        if isinstance(prediction, (list, tuple)):
+            prediction = prediction[0]
+        return prediction.cpu().numpy()
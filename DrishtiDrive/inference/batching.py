@@ -0,0 +1,213 @@
+import sys
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import BatchSchedulerConfig, MetricsConfig
+from DrishtiDrive.inference.metrics import ServingMetrics
+
+
+class SchedulerFullError(RuntimeError):
+    """
+    Raised when a request arrives while the scheduler's queue is at capacity.
+    """
+
+
+class BatchScheduler:
+    """
+    Coalesces requests that arrive close together into batched forward passes run on a bounded worker pool.
+
+    Every request carries its own input array and Future, so concurrent requests share
+    no scratch state and each caller only ever sees its own result.
+    """
+
+    def __init__(self, predict_batch: Callable[[list], list], batch_scheduler_config: BatchSchedulerConfig,
+                 metrics: ServingMetrics = None):
+        """
+        Initialize the BatchScheduler, its worker pool and its dispatcher thread.
+
+        Args:
+            predict_batch (Callable[[list], list]): Function that maps a list of inputs to a list of results in the same order.
+            batch_scheduler_config (BatchSchedulerConfig): The configuration for batching.
+            metrics (ServingMetrics, optional): Records queue waits, batch sizes and queue depth. Defaults to None (no metrics).
+        """
+        try:
+            self.predict_batch = predict_batch
+            self.batch_scheduler_config = batch_scheduler_config
+            self._queue = queue.Queue(maxsize=batch_scheduler_config.max_queue_size)
+            self._closed = threading.Event()
+            # One slot per worker so the dispatcher only forms a batch when a worker can take it;
+            # while all workers are busy requests keep queueing and the next batch comes out fuller
+            self._slots = threading.BoundedSemaphore(batch_scheduler_config.num_workers)
+            self._workers = ThreadPoolExecutor(
+                max_workers=batch_scheduler_config.num_workers, thread_name_prefix="InferenceWorker"
+            )
+            self.metrics = metrics or ServingMetrics(MetricsConfig(enabled=False))
+            self.metrics.register("drishti_inference_queue_depth", "gauge", "Requests waiting for inference.",
+                                  self._queue.qsize)
+            self._thread = threading.Thread(target=self._run, name="BatchScheduler", daemon=True)
+            self._thread.start()
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def submit(self, item) -> Future:
+        """
+        Queue a single input for the next batch.
+
+        Args:
+            item: The input to run through `predict_batch`.
+
+        Returns:
+            Future: Resolves to the result for this input only.
+
+        Raises:
+            SchedulerFullError: If `max_queue_size` requests are already waiting.
+        """
+        if self._closed.is_set():
+            raise RuntimeError("BatchScheduler is closed")
+        future = Future()
+        if self.metrics.enabled:
+            future.enqueued_at = time.perf_counter()
+        try:
+            self._queue.put_nowait((item, future))
+        except queue.Full:
+            raise SchedulerFullError(f"{self._queue.maxsize} requests are already waiting for inference")
+        return future
+
+    def predict(self, item, timeout: float = None):
+        """
+        Queue a single input and block until its result is ready.
+
+        Args:
+            item: The input to run through `predict_batch`.
+            timeout (float, optional): Seconds to wait for the result. Defaults to None (wait forever).
+
+        Returns:
+            The result for this input.
+        """
+        future = self.submit(item)
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Drop the input if it has not reached a worker yet
+            future.cancel()
+            raise
+
+    def predict_many(self, items: list, timeout: float = None) -> list:
+        """
+        Queue several inputs and block until all their results are ready.
+
+        The inputs may be split across batches and run alongside other requests, so a
+        long job such as a video never runs more forward passes at once than the pool allows.
+
+        Args:
+            items (list): The inputs to run through `predict_batch`.
+            timeout (float, optional): Seconds to wait for each result. Defaults to None (wait forever).
+
+        Returns:
+            list: The results in the order of the inputs.
+        """
+        futures = []
+        try:
+            for item in items:
+                futures.append(self.submit(item))
+            return [future.result(timeout=timeout) for future in futures]
+        except BaseException:
+            # Drop the inputs that have not reached a worker yet
+            for future in futures:
+                future.cancel()
+            raise
+
+    def close(self) -> None:
+        """
+        Stop accepting new inputs and let the workers finish the queued ones.
+        """
+        self._closed.set()
+        try:
+            # Wakes a dispatcher blocked on an empty queue; a full queue is drained first and then seen closed
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._thread.join()
+        self._workers.shutdown(wait=True)
+
+    def _collect(self) -> list:
+        """
+        Block for the first pending input, then gather more until the batch is full or the wait budget is spent.
+        """
+        first = self._queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        max_batch_size = self.batch_scheduler_config.max_batch_size
+        # The wait budget starts with the oldest request so it bounds the added latency
+        deadline = time.monotonic() + self.batch_scheduler_config.max_wait_ms / 1000.0
+        while len(batch) < max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                # Take whatever is already queued without waiting, then wait out the remaining budget
+                entry = self._queue.get_nowait() if remaining <= 0 else self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if entry is None:
+                # Put the sentinel back so the loop exits after this batch
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _dispatch(self, batch: list) -> None:
+        """
+        Run one batched forward pass and hand every caller its own result.
+        """
+        # Skip inputs whose callers already gave up
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        if self.metrics.enabled:
+            dispatched_at = time.perf_counter()
+            for _, future in batch:
+                self.metrics.observe_stage("queue_wait", dispatched_at - future.enqueued_at)
+            self.metrics.observe_batch(len(batch))
+
+        try:
+            results = self.predict_batch([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"predict_batch returned {len(results)} results for {len(batch)} inputs")
+        except Exception as e:
+            logging.error(f"Batched prediction of {len(batch)} inputs failed: {e}")
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _dispatch_and_release(self, batch: list) -> None:
+        """
+        Run a batch on a worker thread and hand its slot back to the dispatcher.
+        """
+        try:
+            self._dispatch(batch)
+        finally:
+            self._slots.release()
+
+    def _run(self) -> None:
+        """
+        Dispatcher loop that forms batches and hands them to the worker pool until the scheduler is closed.
+        """
+        while True:
+            self._slots.acquire()
+            batch = self._collect()
+            if batch:
+                self._workers.submit(self._dispatch_and_release, batch)
+            else:
+                self._slots.release()
+            if self._closed.is_set() and self._queue.empty():
+                break
@@ -0,0 +1,122 @@
+import sys
+import hashlib
+import threading
+from collections import OrderedDict
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.entity.config_entity import PredictionCacheConfig
+
+
+# Rough per-entry bookkeeping cost (dict slot, key, tuple) added to the payload size
+_ENTRY_OVERHEAD_BYTES = 256
+
+
+class PredictionCache:
+    """
+    Content-addressed LRU cache of detections bounded by a memory budget.
+
+    Keys combine a hash of the image bytes with the model version and the inference
+    parameters, so a different model or threshold can never return a stale result.
+    """
+
+    def __init__(self, prediction_cache_config: PredictionCacheConfig):
+        """
+        Initialize the PredictionCache.
+
+        Args:
+            prediction_cache_config (PredictionCacheConfig): The configuration for the cache.
+        """
+        try:
+            self.prediction_cache_config = prediction_cache_config
+            self._entries = OrderedDict()
+            self._lock = threading.Lock()
+            self.size_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    @staticmethod
+    def make_key(image_bytes, model_version: str, params: tuple) -> bytes:
+        """
+        Builds the cache key of an image.
+
+        Args:
+            image_bytes (bytes | memoryview): The image file bytes as received.
+            model_version (str): Identifies the weights that produce the detections.
+            params (tuple): The inference parameters that change the result, e.g. image size and thresholds.
+
+        Returns:
+            bytes: A 32-byte digest.
+        """
+        digest = hashlib.blake2b(image_bytes, digest_size=16).digest()
+        context = hashlib.blake2b(repr((model_version, params)).encode(), digest_size=16).digest()
+        return digest + context
+
+    def get(self, key: bytes):
+        """
+        Returns the cached value for a key and marks it as recently used, or None on a miss.
+        """
+        if not self.prediction_cache_config.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: bytes, value, nbytes: int) -> None:
+        """
+        Stores a value, evicting least recently used entries until the cache fits its memory budget.
+
+        Args:
+            key (bytes): The key from `make_key`.
+            value: The value to cache; it must not be mutated afterwards.
+            nbytes (int): The memory held by the value.
+        """
+        if not self.prediction_cache_config.enabled:
+            return
+        size = nbytes + len(key) + _ENTRY_OVERHEAD_BYTES
+        budget = self.prediction_cache_config.max_bytes
+        if size > budget:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size_bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > budget:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Drops every entry, e.g. after the served model has been swapped.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns the hit/miss counters and the current memory use.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.prediction_cache_config.enabled,
+                "entries": len(self._entries),
+                "size_bytes": self.size_bytes,
+                "max_bytes": self.prediction_cache_config.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,122 @@
+import sys
+import threading
+import numpy as np
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import InferenceConfig, MetricsConfig
+from DrishtiDrive.inference.preprocessing import LetterboxPreprocessor
+from DrishtiDrive.inference.postprocessing import postprocess
+from DrishtiDrive.inference.backends import create_backend
+from DrishtiDrive.inference.metrics import ServingMetrics
+
+
+class Detector:
+    """
+    In-process YOLOv5 detector that loads the weights once and serves every request.
+
+    Preprocessing and post-processing are shared; the model itself runs on the backend
+    chosen by `InferenceConfig.backend`.
+    """
+
+    def __init__(self, inference_config: InferenceConfig, metrics: ServingMetrics = None):
+        """
+        Initialize the Detector by loading the model and running the warm-up passes.
+
+        Args:
+            inference_config (InferenceConfig): The configuration for inference.
+            metrics (ServingMetrics, optional): Times model loading and every stage of a batch. Defaults to None (no metrics).
+        """
+        try:
+            self.inference_config = inference_config
+            self.metrics = metrics or ServingMetrics(MetricsConfig(enabled=False))
+            # Each worker thread gets its own preallocated preprocessing buffers
+            self._local = threading.local()
+            self._load_model()
+            self._warmup()
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _load_model(self) -> None:
+        """
+        Load the backend selected by the configuration.
+        """
+        with self.metrics.stage("model_load"):
+            self.backend = create_backend(self.inference_config)
+        self.names = self.backend.names
+        self.model_version = self.backend.model_version
+        logging.info(
+            f"Loaded {self.inference_config.backend} backend, model {self.model_version} with {len(self.names)} classes"
+        )
+
+    @property
+    def inference_params(self) -> tuple:
+        """
+        The parameters besides the weights that change the detections of an image.
+        """
+        config = self.inference_config
+        return (config.image_size, config.conf_threshold, config.iou_threshold, config.max_detections)
+
+    def _warmup(self) -> None:
+        """
+        Run a few forward passes on a blank image so the first request does not pay for lazy initialisation.
+        """
+        size = self.inference_config.image_size
+        blank = np.zeros((size, size, 3), dtype=np.uint8)
+        for _ in range(self.inference_config.warmup_runs):
+            self.predict(blank)
+        logging.info(f"Model warmed up with {self.inference_config.warmup_runs} runs")
+
+    @property
+    def preprocessor(self) -> LetterboxPreprocessor:
+        """
+        The letterbox preprocessor of the calling thread, created on first use.
+        """
+        preprocessor = getattr(self._local, "preprocessor", None)
+        if preprocessor is None:
+            preprocessor = LetterboxPreprocessor(self.inference_config.image_size)
+            self._local.preprocessor = preprocessor
+        return preprocessor
+
+    def predict_batch(self, images: list) -> list:
+        """
+        Run detection on a batch of BGR images.
+
+        Args:
+            images (list): The BGR images as uint8 arrays of shape (H, W, 3).
+
+        Returns:
+            list: One float32 array of shape (N, 6) per image with rows of x1, y1, x2, y2, confidence, class.
+        """
+        try:
+            if len(images) == 0:
+                return []
+
+            with self.metrics.stage("preprocess"):
+                batch, meta = self.preprocessor(images)
+            with self.metrics.stage("forward"):
+                prediction = self.backend.forward(batch)
+            with self.metrics.stage("postprocess"):
+                return postprocess(
+                    prediction,
+                    meta,
+                    conf_threshold=self.inference_config.conf_threshold,
+                    iou_threshold=self.inference_config.iou_threshold,
+                    max_detections=self.inference_config.max_detections,
+                )
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def predict(self, image: np.ndarray) -> np.ndarray:
+        """
+        Run detection on a single BGR image.
+
+        Args:
+            image (np.ndarray): The BGR image as a uint8 array of shape (H, W, 3).
+
+        Returns:
+            np.ndarray: A float32 array of shape (N, 6) with rows of x1, y1, x2, y2, confidence, class.
+        """
+        return self.predict_batch([image])[0]
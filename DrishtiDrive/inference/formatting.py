@@ -0,0 +1,42 @@
+import numpy as np
+
+
+# Column order of the packed binary detections
+DETECTION_LAYOUT = "x1,y1,x2,y2,confidence,class"
+
+
+def detections_to_dict(detections: np.ndarray, names: list, image_shape: tuple) -> dict:
+    """
+    Converts detections into a compact JSON-serialisable dictionary.
+
+    Args:
+        detections (np.ndarray): An array of shape (N, 6) with rows of x1, y1, x2, y2, confidence, class.
+        names (list): The class names indexed by class id.
+        image_shape (tuple): The shape of the image the boxes refer to.
+
+    Returns:
+        dict: Parallel lists of boxes, scores and class ids plus the image size and the class names.
+    """
+    classes = detections[:, 5].astype(int)
+    return {
+        "width": int(image_shape[1]),
+        "height": int(image_shape[0]),
+        "boxes": detections[:, :4].round().astype(int).tolist(),
+        # Round in float64 so float32 scores serialise as e.g. 0.9 rather than 0.8999999761581421
+        "scores": np.round(detections[:, 4].astype(np.float64), 4).tolist(),
+        "classes": classes.tolist(),
+        "labels": [names[c] for c in classes],
+    }
+
+
+def pack_detections(detections: np.ndarray) -> bytes:
+    """
+    Packs detections into a little-endian float32 buffer of N rows laid out as DETECTION_LAYOUT.
+
+    Args:
+        detections (np.ndarray): An array of shape (N, 6) with rows of x1, y1, x2, y2, confidence, class.
+
+    Returns:
+        bytes: The packed detections, 24 bytes per row.
+    """
+    return np.ascontiguousarray(detections[:, :6], dtype="<f4").tobytes()
@@ -0,0 +1,210 @@
+import sys
+import time
+import bisect
+import threading
+from typing import Callable
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.entity.config_entity import MetricsConfig
+
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_labels(labelnames: tuple, labels: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing count per combination of label values.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """
+    Counts observations into cumulative buckets per combination of label values, with their sum and count.
+    """
+
+    def __init__(self, name: str, documentation: str, buckets: list, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = sorted(buckets)
+        self.labelnames = labelnames
+        # labels -> [count per bucket and +Inf, sum]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: tuple = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = sorted((labels, (list(counts), total)) for labels, (counts, total) in self._values.items())
+        for labels, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip([*map(_format_value, self.buckets), "+Inf"], counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _StageTimer:
+    """
+    Times a `with` block into the stage histogram.
+    """
+
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: Histogram, stage: str):
+        self.histogram = histogram
+        self.labels = (stage,)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, self.labels)
+        return False
+
+
+class _NullTimer:
+    """
+    Stands in for a stage timer while metrics are disabled.
+    """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class ServingMetrics:
+    """
+    Counters and histograms of the serving path, rendered in the Prometheus text format for /metrics.
+
+    Hot paths time their stages with `with metrics.stage("forward"): ...`. While metrics
+    are disabled every call returns at once without taking a lock or reading the clock,
+    so the instrumentation can stay in place in production.
+    """
+
+    def __init__(self, metrics_config: MetricsConfig = None):
+        """
+        Initialize the ServingMetrics.
+
+        Args:
+            metrics_config (MetricsConfig, optional): The configuration for metrics. Defaults to MetricsConfig().
+        """
+        try:
+            self.metrics_config = metrics_config or MetricsConfig()
+            self.enabled = self.metrics_config.enabled
+            self.requests = Counter(
+                "drishti_requests_total", "HTTP requests handled, by route and status code.", ("route", "status")
+            )
+            self.request_seconds = Histogram(
+                "drishti_request_duration_seconds", "Time to handle an HTTP request until its response is returned.",
+                self.metrics_config.latency_buckets, ("route",)
+            )
+            self.stage_seconds = Histogram(
+                "drishti_stage_duration_seconds", "Time spent in each stage of the serving path.",
+                self.metrics_config.latency_buckets, ("stage",)
+            )
+            self.batch_size = Histogram(
+                "drishti_batch_size", "Images per batched forward pass.", self.metrics_config.batch_size_buckets
+            )
+            # name -> (type, documentation, function returning the current value), read at scrape time
+            self._collectors = {}
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def stage(self, name: str):
+        """
+        Returns a context manager that times a stage of the serving path.
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self.stage_seconds, name)
+
+    def observe_stage(self, name: str, seconds: float) -> None:
+        """
+        Records a stage that was timed elsewhere, e.g. across threads.
+        """
+        if self.enabled:
+            self.stage_seconds.observe(seconds, (name,))
+
+    def observe_batch(self, size: int) -> None:
+        if self.enabled:
+            self.batch_size.observe(size)
+
+    def observe_request(self, route: str, status: int, seconds: float) -> None:
+        if self.enabled:
+            self.requests.inc((route, status))
+            self.request_seconds.observe(seconds, (route,))
+
+    def register(self, name: str, metric_type: str, documentation: str, function: Callable[[], float]) -> None:
+        """
+        Adds a gauge or counter whose value is read from `function` at scrape time, e.g. a queue depth.
+
+        Args:
+            name (str): The metric name.
+            metric_type (str): "gauge" or "counter".
+            documentation (str): The help text.
+            function (Callable[[], float]): Returns the current value.
+        """
+        self._collectors[name] = (metric_type, documentation, function)
+
+    def render(self) -> str:
+        """
+        Renders every metric in the Prometheus text exposition format.
+        """
+        lines = []
+        for metric in (self.requests, self.request_seconds, self.stage_seconds, self.batch_size):
+            lines += metric.render()
+        for name, (metric_type, documentation, function) in self._collectors.items():
+            lines += [f"# HELP {name} {documentation}", f"# TYPE {name} {metric_type}",
+                      f"{name} {_format_value(function())}"]
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,132 @@
+import numpy as np
+
+from DrishtiDrive.inference.preprocessing import LetterboxMeta
+
+
+# Larger than any box side, so offsetting by group * MAX_WH keeps groups from overlapping
+MAX_WH = 7680
+
+# Most candidates that enter NMS for a whole batch; the lowest scores beyond it are dropped
+MAX_NMS_CANDIDATES = 30000
+
+
+def xywh_to_xyxy(boxes: np.ndarray) -> np.ndarray:
+    """
+    Converts centre x, centre y, width, height boxes to corner x1, y1, x2, y2 boxes.
+    """
+    xyxy = np.empty_like(boxes)
+    half_wh = boxes[:, 2:4] / 2
+    np.subtract(boxes[:, 0:2], half_wh, out=xyxy[:, 0:2])
+    np.add(boxes[:, 0:2], half_wh, out=xyxy[:, 2:4])
+    return xyxy
+
+
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_threshold: float) -> np.ndarray:
+    """
+    Exact greedy non-max suppression over x1, y1, x2, y2 boxes.
+
+    Boxes are visited in descending score order and every kept box suppresses the
+    boxes it overlaps by more than `iou_threshold`. Instead of comparing each kept box
+    with all remaining ones, candidates are looked up in an x1-sorted index: only boxes
+    starting within one maximum box width to the left of the kept box can overlap it.
+    With group-offset boxes this window stays inside one image and class.
+
+    Args:
+        boxes (np.ndarray): Boxes of shape (N, 4).
+        scores (np.ndarray): Scores of shape (N,).
+        iou_threshold (float): Boxes overlapping a kept box by more than this are suppressed.
+
+    Returns:
+        np.ndarray: Indices of the kept boxes in descending score order.
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = (x2 - x1) * (y2 - y1)
+    by_x1 = np.argsort(x1, kind="stable")
+    sorted_x1 = x1[by_x1]
+    max_width = float((x2 - x1).max())
+
+    # Window bounds for every box, computed for all of them in one vectorised search
+    window_start = np.searchsorted(sorted_x1, x1 - max_width, side="left")
+    window_end = np.searchsorted(sorted_x1, x2, side="left")
+
+    suppressed = np.zeros(len(boxes), dtype=bool)
+    keep = []
+    for best in np.argsort(-scores, kind="stable").tolist():
+        if suppressed[best]:
+            continue
+        keep.append(best)
+        others = by_x1[window_start[best]:window_end[best]]
+        width = np.minimum(x2[best], x2[others]) - np.maximum(x1[best], x1[others])
+        height = np.minimum(y2[best], y2[others]) - np.maximum(y1[best], y1[others])
+        intersection = np.clip(width, 0, None) * np.clip(height, 0, None)
+        iou = intersection / (areas[best] + areas[others] - intersection + 1e-9)
+        suppressed[others[iou > iou_threshold]] = True
+    return np.array(keep, dtype=np.int64)
+
+
+def postprocess(prediction: np.ndarray, meta: LetterboxMeta, conf_threshold: float,
+                iou_threshold: float, max_detections: int) -> list:
+    """
+    Turns raw YOLOv5 output for a whole batch into per-image detections in original image coordinates.
+
+    Confidence filtering, class-aware NMS, top-k capping and rescaling all run on the
+    flattened candidates of the entire batch. Candidates of different images and classes
+    are shifted by multiples of MAX_WH so one NMS pass never lets them suppress each other.
+
+    Args:
+        prediction (np.ndarray): Raw output of shape (B, N, 5 + nc) with rows of cx, cy, w, h, objectness, class scores.
+        meta (LetterboxMeta): The letterbox geometry of the batch.
+        conf_threshold (float): Minimum objectness times class score.
+        iou_threshold (float): IoU above which a lower-scored box of the same class is suppressed.
+        max_detections (int): Most detections kept per image.
+
+    Returns:
+        list: One float32 array of shape (N, 6) per image with rows of x1, y1, x2, y2, confidence, class.
+    """
+    batch_size, _, channels = prediction.shape
+    num_classes = channels - 5
+
+    # Cheap objectness filter first, it removes the vast majority of anchors
+    image_index, anchor_index = np.nonzero(prediction[..., 4] > conf_threshold)
+    candidates = prediction[image_index, anchor_index]
+    class_scores = candidates[:, 5:] * candidates[:, 4:5]
+    classes = class_scores.argmax(1)
+    scores = class_scores[np.arange(len(candidates)), classes]
+
+    passed = scores > conf_threshold
+    candidates, image_index, classes, scores = candidates[passed], image_index[passed], classes[passed], scores[passed]
+    if len(scores) > MAX_NMS_CANDIDATES:
+        top = np.argpartition(-scores, MAX_NMS_CANDIDATES)[:MAX_NMS_CANDIDATES]
+        candidates, image_index, classes, scores = candidates[top], image_index[top], classes[top], scores[top]
+
+    boxes = xywh_to_xyxy(candidates[:, :4])
+    # float64 keeps the offset boxes exact even for large batches and class counts
+    offsets = ((image_index * num_classes + classes) * MAX_WH).astype(np.float64)[:, None]
+    keep = nms(boxes + offsets, scores, iou_threshold)
+
+    # Kept boxes come out in descending score order; a stable sort by image keeps that order within each image
+    keep = keep[np.argsort(image_index[keep], kind="stable")]
+    kept_images = image_index[keep]
+    starts = np.searchsorted(kept_images, np.arange(batch_size + 1))
+    rank = np.arange(len(keep)) - starts[kept_images]
+    keep, kept_images = keep[rank < max_detections], kept_images[rank < max_detections]
+
+    detections = np.empty((len(keep), 6), dtype=np.float32)
+    detections[:, :4] = boxes[keep]
+    detections[:, 4] = scores[keep]
+    detections[:, 5] = classes[keep]
+
+    # Undo the letterbox for every image at once
+    xs, ys = detections[:, 0:4:2], detections[:, 1:4:2]
+    xs -= meta.pads[kept_images, 0:1]
+    ys -= meta.pads[kept_images, 1:2]
+    detections[:, :4] /= meta.scales[kept_images, None]
+    np.clip(xs, 0, meta.shapes[kept_images, 1:2], out=xs)
+    np.clip(ys, 0, meta.shapes[kept_images, 0:1], out=ys)
+    np.round(detections[:, :4], out=detections[:, :4])
+
+    starts = np.searchsorted(kept_images, np.arange(batch_size + 1))
+    return [detections[starts[i]:starts[i + 1]] for i in range(batch_size)]
@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+
+import cv2
+import numpy as np
+
+
+@dataclass
+class LetterboxMeta:
+    """
+    Per-image geometry of a letterboxed batch, needed to map boxes back to the original images.
+
+    Attributes:
+        scales (np.ndarray): Resize factor of each image, shape (N,).
+        pads (np.ndarray): Left and top padding of each image in pixels, shape (N, 2).
+        shapes (np.ndarray): Original height and width of each image, shape (N, 2).
+    """
+    scales: np.ndarray
+    pads: np.ndarray
+    shapes: np.ndarray
+
+
+def letterbox_geometry(height: int, width: int, size: int) -> tuple:
+    """
+    Computes where an image lands when letterboxed into a square of side `size`.
+
+    Args:
+        height (int): The image height.
+        width (int): The image width.
+        size (int): The side of the square.
+
+    Returns:
+        tuple: The resize factor, the resized width and height, and the left and top padding.
+    """
+    scale = min(size / height, size / width)
+    new_width, new_height = max(round(width * scale), 1), max(round(height * scale), 1)
+    return scale, new_width, new_height, (size - new_width) // 2, (size - new_height) // 2
+
+
+class LetterboxPreprocessor:
+    """
+    Letterboxes and normalises whole batches into reusable preallocated buffers.
+
+    Each image is resized straight into its slot of a uint8 canvas, then a single ufunc
+    call converts the whole batch from BGR HWC uint8 to RGB CHW float32 in [0, 1].
+    The buffers are reused across calls, so one instance must not be shared between threads.
+    """
+
+    def __init__(self, image_size: int, max_batch_size: int = 1, pad_value: int = 114):
+        """
+        Initialize the LetterboxPreprocessor.
+
+        Args:
+            image_size (int): The square model input size.
+            max_batch_size (int, optional): Initial batch capacity; the buffers grow if a larger batch arrives. Defaults to 1.
+            pad_value (int, optional): Grey level of the padding. Defaults to 114 as in yolov5.
+        """
+        self.image_size = image_size
+        self.pad_value = pad_value
+        self._allocate(max_batch_size)
+
+    def _allocate(self, capacity: int) -> None:
+        size = self.image_size
+        self.capacity = capacity
+        self._canvas = np.full((capacity, size, size, 3), self.pad_value, dtype=np.uint8)
+        self._input = np.empty((capacity, 3, size, size), dtype=np.float32)
+        self._scales = np.empty(capacity, dtype=np.float32)
+        self._pads = np.empty((capacity, 2), dtype=np.float32)
+        self._shapes = np.empty((capacity, 2), dtype=np.int64)
+        # Content box of the previous image in each slot, so only stale pixels get re-padded
+        self._content = np.zeros((capacity, 4), dtype=np.int64)
+
+    def _place(self, slot: int, image: np.ndarray) -> None:
+        """
+        Resize one image into its canvas slot, centred, and pad the uncovered border.
+        """
+        height, width = image.shape[:2]
+        scale, new_width, new_height, left, top = letterbox_geometry(height, width, self.image_size)
+        right, bottom = left + new_width, top + new_height
+
+        canvas = self._canvas[slot]
+        # Re-pad whatever the previous image in this slot covered outside the new content box
+        old_left, old_top, old_right, old_bottom = self._content[slot]
+        if old_top < top:
+            canvas[old_top:top].fill(self.pad_value)
+        if old_bottom > bottom:
+            canvas[bottom:old_bottom].fill(self.pad_value)
+        if old_left < left:
+            canvas[:, old_left:left].fill(self.pad_value)
+        if old_right > right:
+            canvas[:, right:old_right].fill(self.pad_value)
+
+        destination = canvas[top:bottom, left:right]
+        if (height, width) == (new_height, new_width):
+            destination[...] = image
+        else:
+            cv2.resize(image, (new_width, new_height), dst=destination, interpolation=cv2.INTER_LINEAR)
+
+        self._content[slot] = (left, top, right, bottom)
+        self._scales[slot] = scale
+        self._pads[slot] = (left, top)
+        self._shapes[slot] = (height, width)
+
+    def __call__(self, images: list) -> tuple:
+        """
+        Letterbox and normalise a batch of BGR images.
+
+        Args:
+            images (list): BGR uint8 images of shape (H, W, 3), any sizes.
+
+        Returns:
+            tuple: A float32 array of shape (N, 3, S, S) that is a view of the internal buffer
+            and stays valid until the next call, and the LetterboxMeta of the batch.
+        """
+        count = len(images)
+        if count > self.capacity:
+            self._allocate(count)
+
+        for slot, image in enumerate(images):
+            self._place(slot, image)
+
+        # BGR -> RGB, HWC -> CHW and uint8 -> float32 / 255 in one pass over the batch
+        batch = self._input[:count]
+        np.multiply(self._canvas[:count, :, :, ::-1].transpose(0, 3, 1, 2), np.float32(1.0 / 255.0),
+                    out=batch, casting="unsafe")
+
+        meta = LetterboxMeta(
+            scales=self._scales[:count].copy(),
+            pads=self._pads[:count].copy(),
+            shapes=self._shapes[:count].copy(),
+        )
+        return batch, meta
+
+
+def decode_image_bytes(data) -> np.ndarray:
+    """
+    Decodes encoded image bytes straight into a BGR array without touching the filesystem.
+
+    Args:
+        data (bytes | bytearray | memoryview): The encoded image, e.g. a JPEG or PNG file body.
+
+    Returns:
+        np.ndarray: The decoded BGR image, or None if the bytes are not a valid image.
+    """
+    # Wrap the buffer without copying it and let OpenCV decode from memory
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    if buffer.size == 0:
+        return None
+    return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
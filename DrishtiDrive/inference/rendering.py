@@ -0,0 +1,99 @@
+import cv2
+import numpy as np
+
+
+# BGR colours cycled over the class ids
+PALETTE = np.array([
+    (56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207),
+    (10, 249, 72), (23, 204, 146), (134, 219, 61), (52, 147, 26), (187, 212, 0),
+    (168, 153, 44), (255, 194, 0), (147, 69, 52), (255, 115, 100), (236, 24, 0),
+    (255, 56, 132), (133, 0, 82), (255, 56, 203), (200, 149, 255), (199, 55, 255),
+], dtype=np.uint8)
+
+# File extension and quality flag for each supported output format
+IMAGE_FORMATS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+}
+
+
+def draw_boxes(image: np.ndarray, detections: np.ndarray, thickness: int = None) -> np.ndarray:
+    """
+    Draws the outline of every detection in place.
+
+    Args:
+        image (np.ndarray): The BGR image to draw on.
+        detections (np.ndarray): An array of shape (N, 6) with rows of x1, y1, x2, y2, confidence, class.
+        thickness (int, optional): The line thickness in pixels. Defaults to a size relative to the image.
+
+    Returns:
+        np.ndarray: The same image with the boxes drawn.
+    """
+    if thickness is None:
+        thickness = max(round((image.shape[0] + image.shape[1]) / 2 * 0.003), 2)
+    for x1, y1, x2, y2, _, cls in detections:
+        color = tuple(int(c) for c in PALETTE[int(cls) % len(PALETTE)])
+        cv2.rectangle(image, (int(x1), int(y1)), (int(x2), int(y2)), color, thickness)
+    return image
+
+
+def draw_labels(image: np.ndarray, detections: np.ndarray, names: list) -> np.ndarray:
+    """
+    Writes the class name and confidence above every detection in place.
+    """
+    scale = max((image.shape[0] + image.shape[1]) / 2 * 0.001, 0.4)
+    for x1, y1, _, _, confidence, cls in detections:
+        cv2.putText(image, f"{names[int(cls)]} {confidence:.2f}", (int(x1), max(int(y1) - 4, 10)),
+                    cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), 1, lineType=cv2.LINE_AA)
+    return image
+
+
+def draw_detections(image: np.ndarray, detections: np.ndarray, names: list,
+                    max_side: int = 0, labels: bool = True) -> np.ndarray:
+    """
+    Draws the detected boxes and their labels on a copy of the image, optionally downscaled first.
+
+    Args:
+        image (np.ndarray): The BGR image the detections belong to.
+        detections (np.ndarray): An array of shape (N, 6) with rows of x1, y1, x2, y2, confidence, class.
+        names (list): The class names indexed by class id.
+        max_side (int, optional): Longest side of the returned preview, 0 keeps the original size. Defaults to 0.
+        labels (bool, optional): Whether to write class names and scores. Defaults to True.
+
+    Returns:
+        np.ndarray: The annotated BGR image.
+    """
+    height, width = image.shape[:2]
+    scale = max_side / max(height, width) if max_side else 1.0
+    if scale < 1.0:
+        # Downscale before drawing so both drawing and encoding work on fewer pixels
+        annotated = cv2.resize(image, (max(round(width * scale), 1), max(round(height * scale), 1)),
+                               interpolation=cv2.INTER_AREA)
+        detections = detections.copy()
+        detections[:, :4] *= scale
+    else:
+        annotated = image.copy()
+
+    draw_boxes(annotated, detections)
+    if labels:
+        draw_labels(annotated, detections, names)
+    return annotated
+
+
+def encode_image(image: np.ndarray, image_format: str = "jpeg", quality: int = 90) -> bytes:
+    """
+    Encodes a BGR image in memory.
+
+    Args:
+        image (np.ndarray): The BGR image to encode.
+        image_format (str, optional): One of the keys of IMAGE_FORMATS. Defaults to "jpeg".
+        quality (int, optional): Encoder quality between 1 and 100. Defaults to 90.
+
+    Returns:
+        bytes: The encoded image.
+    """
+    extension, quality_flag = IMAGE_FORMATS[image_format]
+    ok, encoded = cv2.imencode(extension, image, [quality_flag, int(quality)])
+    if not ok:
+        raise ValueError(f"Could not encode image as {image_format}")
+    return encoded.tobytes()
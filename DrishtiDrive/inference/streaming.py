@@ -0,0 +1,224 @@
+import sys
+import time
+import queue
+import threading
+from typing import Callable, Iterable, Iterator
+
+import cv2
+import numpy as np
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+
+
+# Marks the end of the stream as it travels through the stage queues
+_END_OF_STREAM = object()
+
+
+class DropOldestQueue:
+    """
+    Bounded queue that discards its oldest item instead of blocking when it is full.
+
+    A real-time stage only ever wants the freshest frame, so a slow consumer makes
+    the producer skip frames rather than fall further and further behind.
+    """
+
+    def __init__(self, maxsize: int):
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def put(self, item) -> None:
+        with self._lock:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    return
+                except queue.Full:
+                    try:
+                        self._queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def get(self, timeout: float = None):
+        return self._queue.get(timeout=timeout)
+
+
+def open_video_source(source: str) -> cv2.VideoCapture:
+    """
+    Opens a camera index, a video file or a stream URL such as rtsp:// or http://.
+
+    Args:
+        source (str): A device index like "0", a file path or a URL.
+
+    Returns:
+        cv2.VideoCapture: The opened capture.
+    """
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        raise ValueError(f"Could not open video source: {source}")
+    return capture
+
+
+def _iter_capture(capture: cv2.VideoCapture, interval: float) -> Iterator[np.ndarray]:
+    """
+    Yields frames from an opened capture, sleeping `interval` seconds between them when it is positive.
+    """
+    try:
+        next_frame_at = time.monotonic()
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            yield frame
+            if interval:
+                next_frame_at += interval
+                delay = next_frame_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    # Running late: re-anchor instead of bursting to catch up
+                    next_frame_at = time.monotonic()
+    finally:
+        capture.release()
+
+
+def read_frames(source: str, realtime: bool = True) -> Iterator[np.ndarray]:
+    """
+    Opens a video source and returns an iterator over its decoded BGR frames.
+
+    The source is opened eagerly so a bad source fails here rather than inside a stage thread.
+
+    Args:
+        source (str): A device index like "0", a file path or a URL.
+        realtime (bool, optional): Pace files at their native frame rate like a live camera. Defaults to True.
+
+    Returns:
+        Iterator[np.ndarray]: The frames in order.
+    """
+    capture = open_video_source(source)
+    fps = capture.get(cv2.CAP_PROP_FPS)
+    # Devices and network streams are paced by the sender, only files need pacing here
+    is_file = not str(source).isdigit() and "://" not in str(source)
+    interval = 1.0 / fps if realtime and is_file and fps > 0 else 0.0
+    return _iter_capture(capture, interval)
+
+
+class StreamPipeline:
+    """
+    Runs a frame source and a chain of stages on their own threads, connected by bounded drop-oldest queues.
+
+    Iterating over the pipeline yields the output of the last stage as soon as it is ready.
+    """
+
+    def __init__(self, source: Iterable, stages: list, queue_size: int = 2):
+        """
+        Initialize the StreamPipeline.
+
+        Args:
+            source (Iterable): Produces the input items, typically `read_frames(...)`.
+            stages (list): (name, function) pairs applied in order; a function returning None drops the item.
+            queue_size (int, optional): Capacity of each queue between stages. Defaults to 2.
+        """
+        try:
+            self.source = source
+            self.stages = stages
+            self._stop = threading.Event()
+            self._queues = [DropOldestQueue(queue_size) for _ in range(len(stages) + 1)]
+            self._threads = [threading.Thread(target=self._capture, name="stream-capture", daemon=True)]
+            for index, (name, function) in enumerate(stages):
+                self._threads.append(threading.Thread(
+                    target=self._work, args=(function, self._queues[index], self._queues[index + 1]),
+                    name=f"stream-{name}", daemon=True
+                ))
+            self.processed = {name: 0 for name, _ in stages}
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _capture(self) -> None:
+        """
+        Push items from the source into the first queue, dropping stale ones when the stages fall behind.
+        """
+        try:
+            for item in self.source:
+                if self._stop.is_set():
+                    break
+                self._queues[0].put(item)
+        except Exception as e:
+            logging.error(f"Stream source failed: {e}")
+        finally:
+            # Release the underlying capture as soon as the pipeline is done with it
+            if hasattr(self.source, "close"):
+                self.source.close()
+            self._queues[0].put(_END_OF_STREAM)
+
+    def _work(self, function: Callable, inbox: DropOldestQueue, outbox: DropOldestQueue) -> None:
+        """
+        Apply one stage to every item that reaches it until the end of the stream.
+        """
+        name = threading.current_thread().name[len("stream-"):]
+        while not self._stop.is_set():
+            try:
+                item = inbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END_OF_STREAM:
+                break
+            try:
+                result = function(item)
+            except Exception as e:
+                logging.error(f"Stream stage {name} failed on a frame: {e}")
+                continue
+            if result is not None:
+                self.processed[name] += 1
+                outbox.put(result)
+        outbox.put(_END_OF_STREAM)
+
+    def start(self) -> "StreamPipeline":
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Signal every stage to finish and log how many items each queue dropped.
+        """
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1.0)
+        dropped = [q.dropped for q in self._queues]
+        logging.info(f"Stream stopped, processed per stage: {self.processed}, dropped per queue: {dropped}")
+
+    def __iter__(self) -> Iterator:
+        outbox = self._queues[-1]
+        while not self._stop.is_set():
+            try:
+                item = outbox.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _END_OF_STREAM:
+                break
+            yield item
+
+
+def iter_mjpeg(pipeline: StreamPipeline, boundary: str = "frame") -> Iterator[bytes]:
+    """
+    Wraps the encoded JPEG frames of a pipeline as multipart/x-mixed-replace parts and stops it when the client goes away.
+
+    Args:
+        pipeline (StreamPipeline): A started pipeline whose last stage yields JPEG bytes.
+        boundary (str, optional): The multipart boundary. Defaults to "frame".
+
+    Yields:
+        bytes: One multipart part per frame.
+    """
+    try:
+        for jpeg in pipeline:
+            yield (
+                f"--{boundary}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode()
+                + jpeg + b"\r\n"
+            )
+    finally:
+        pipeline.stop()
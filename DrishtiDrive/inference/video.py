@@ -0,0 +1,86 @@
+import json
+from typing import Callable, Iterable, Iterator
+
+import cv2
+
+from DrishtiDrive.inference.streaming import open_video_source
+from DrishtiDrive.inference.formatting import detections_to_dict
+
+
+def iter_video_frames(source: str, frame_stride: int = 1) -> Iterator[tuple]:
+    """
+    Lazily decodes every `frame_stride`-th frame of a video.
+
+    Skipped frames are only grabbed, not decoded, so a stride above one also saves decode time.
+
+    Args:
+        source (str): A video file path or stream URL.
+        frame_stride (int, optional): Decode one frame out of every `frame_stride`. Defaults to 1.
+
+    Yields:
+        tuple: (frame index, timestamp in milliseconds, BGR frame).
+    """
+    capture = open_video_source(source)
+    try:
+        fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+        index = 0
+        while True:
+            if index % frame_stride:
+                if not capture.grab():
+                    break
+            else:
+                ok, frame = capture.read()
+                if not ok:
+                    break
+                timestamp = index * 1000.0 / fps if fps > 0 else capture.get(cv2.CAP_PROP_POS_MSEC)
+                yield index, round(timestamp, 1), frame
+            index += 1
+    finally:
+        capture.release()
+
+
+def iter_batches(items: Iterable, batch_size: int) -> Iterator[list]:
+    """
+    Groups an iterable into lists of at most `batch_size` items without materialising it.
+    """
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def predict_video(predict_batch: Callable[[list], list], source: str, names: list,
+                  batch_size: int = 8, frame_stride: int = 1) -> Iterator[dict]:
+    """
+    Runs batched detection over a video and yields the detections of each frame as soon as its batch is done.
+
+    Only one batch of frames is held in memory at a time, whatever the length of the video.
+
+    Args:
+        predict_batch (Callable[[list], list]): Maps a list of BGR frames to a list of (N, 6) detection arrays.
+        source (str): A video file path or stream URL.
+        names (list): The class names indexed by class id.
+        batch_size (int, optional): Number of frames per forward pass. Defaults to 8.
+        frame_stride (int, optional): Process one frame out of every `frame_stride`. Defaults to 1.
+
+    Yields:
+        dict: The frame index, its timestamp and its detections in the `detections_to_dict` layout.
+    """
+    for batch in iter_batches(iter_video_frames(source, frame_stride), batch_size):
+        results = predict_batch([frame for _, _, frame in batch])
+        for (index, timestamp, frame), detections in zip(batch, results):
+            record = {"frame": index, "timestamp_ms": timestamp}
+            record.update(detections_to_dict(detections, names, frame.shape))
+            yield record
+
+
+def iter_ndjson(records: Iterable[dict]) -> Iterator[bytes]:
+    """
+    Serialises records as newline-delimited JSON, one line per record.
+    """
+    for record in records:
+        yield (json.dumps(record, separators=(",", ":")) + "\n").encode()
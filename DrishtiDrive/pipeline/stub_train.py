@@ -0,0 +1,93 @@
+"""
+Stand-in for the training launcher that prints synthetic learning curves instead of training.
+
+It prints the same per-epoch `DRISHTI_METRICS {json}` lines as the real launcher, so sweeps,
+early stopping and the job API can be exercised without a dataset, yolov5 or torch. The final
+value and speed of each curve are derived from a hash of the hyperparameters, so a given
+setting always gives the same curve.
+
+Usage:
+    python -m DrishtiDrive.pipeline.stub_train --epochs 30 --params '{"lr0": 0.01}' [--cpus 0,1]
+"""
+
+import sys
+import json
+import math
+import time
+import hashlib
+import argparse
+import numpy as np
+from datetime import datetime
+
+from DrishtiDrive.utils.main_utils import limit_cpus, parse_cpu_ids
+from DrishtiDrive.utils.training_metrics_utils import format_metrics_line
+
+
+# Images in a synthetic epoch
+STUB_EPOCH_IMAGES = 128
+
+
+def learning_curve(params: dict, epochs: int, noise: float = 0.005) -> np.ndarray:
+    """
+    The synthetic mAP@0.5:0.95 after each epoch of a training run with some hyperparameters.
+
+    Returns:
+        np.ndarray: One value per epoch, rising towards a plateau set by the hyperparameters.
+    """
+    digest = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).digest()
+    seed = int.from_bytes(digest[:8], 'little')
+    rng = np.random.default_rng(seed)
+    plateau = 0.2 + 0.5 * rng.random()
+    time_constant = 2.0 + 10.0 * rng.random()
+    epoch = np.arange(1, epochs + 1)
+    return np.clip(plateau * (1 - np.exp(-epoch / time_constant)) + rng.normal(0, noise, epochs), 0.0, 1.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--epochs", type=int, required=True)
+    parser.add_argument("--params", type=json.loads, default={}, help="hyperparameters as a JSON object")
+    parser.add_argument("--epoch-seconds", type=float, default=0.2, help="simulated duration of an epoch")
+    parser.add_argument("--cpus", type=parse_cpu_ids, help="comma-separated CPU cores to run on")
+    args = parser.parse_args()
+
+    if args.cpus:
+        limit_cpus(args.cpus)
+
+    start = time.perf_counter()
+    curve = learning_curve(args.params, args.epochs)
+    # A fixed split of every epoch between waiting on data, compute and validation
+    wait, compute, validation = 0.2 * args.epoch_seconds, 0.7 * args.epoch_seconds, 0.1 * args.epoch_seconds
+    for epoch, value in enumerate(curve):
+        time.sleep(args.epoch_seconds)
+        loss = 0.1 * (1 - value)
+        sys.stdout.write(format_metrics_line({
+            'event': 'epoch',
+            'epoch': epoch,
+            'epochs': args.epochs,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'images': STUB_EPOCH_IMAGES,
+            'batches': math.ceil(STUB_EPOCH_IMAGES / args.params.get('batch_size', 16)),
+            'epoch_time': args.epoch_seconds,
+            'train_time': wait + compute,
+            'val_time': validation,
+            'dataloader_wait': wait,
+            'compute_time': compute,
+            'dataloader_wait_fraction': wait / (wait + compute) if wait + compute else 0.0,
+            'images_per_sec': STUB_EPOCH_IMAGES / (wait + compute) if wait + compute else 0.0,
+            'losses': {'box_loss': loss, 'obj_loss': loss, 'cls_loss': loss},
+            'val_losses': {'val_box_loss': loss, 'val_obj_loss': loss, 'val_cls_loss': loss},
+            'metrics': {'precision': float(value), 'recall': float(value), 'map50': float(min(1.5 * value, 1.0)),
+                        'map50_95': float(value)},
+            'lr': [args.params.get('lr0', 0.01)] * 3,
+        }))
+        sys.stdout.flush()
+    sys.stdout.write(format_metrics_line({
+        'event': 'end',
+        'time': datetime.now().isoformat(timespec='seconds'),
+        'total_time': time.perf_counter() - start,
+    }))
+
+
+if __name__ == "__main__":
+    main()
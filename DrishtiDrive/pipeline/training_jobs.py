@@ -0,0 +1,354 @@
+"""
+Background training jobs: each job runs the training pipeline in its own low-priority process.
+
+The server only enqueues jobs and watches them; the pipeline itself runs in a child started with
+    python -m DrishtiDrive.pipeline.training_jobs <job_dir>
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import signal
+import threading
+import subprocess
+import traceback
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Iterator
+
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.logger import logging
+from DrishtiDrive.entity.config_entity import TrainingJobConfig
+from DrishtiDrive.utils.training_metrics_utils import parse_metrics_line, summarize_epochs
+
+
+# Job states; the last three are final
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = 'queued', 'running', 'succeeded', 'failed', 'cancelled'
+FINAL_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+# How often the dispatcher checks running jobs and progress streams poll for new output, in seconds
+POLL_INTERVAL = 0.5
+
+# Seconds a cancelled job gets to exit after SIGTERM before it is killed
+CANCEL_GRACE_SECONDS = 10.0
+
+
+class JobQueueFullError(RuntimeError):
+    """
+    Raised when a job is submitted while the queue already holds its maximum number of jobs.
+    """
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class TrainingJobManager:
+    """
+    Queues training jobs and runs at most `max_concurrent_jobs` of them at a time, each in its own process.
+
+    Job processes run at a lower CPU priority, with their threads and CPU affinity limited
+    to the cores not reserved for serving, so predictions keep their capacity during a retrain.
+    Job state lives in memory and in `job.json` in the job directory, next to the job's log.
+    """
+
+    def __init__(self, training_job_config: TrainingJobConfig):
+        """
+        Initialize the TrainingJobManager and start its dispatcher thread.
+
+        Args:
+            training_job_config (TrainingJobConfig): The configuration for training jobs.
+        """
+        try:
+            self.training_job_config = training_job_config
+            self._jobs = OrderedDict()
+            self._queue = deque()
+            self._processes = {}
+            self._lock = threading.Condition()
+            self._load_jobs()
+            self._dispatcher = threading.Thread(target=self._dispatch, name="TrainingJobDispatcher", daemon=True)
+            self._dispatcher.start()
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.training_job_config.jobs_dir, job_id)
+
+    def _load_jobs(self) -> None:
+        """
+        Loads the jobs of previous server runs; the ones that had not finished are marked failed.
+        """
+        jobs_dir = self.training_job_config.jobs_dir
+        if not os.path.isdir(jobs_dir):
+            return
+        jobs = []
+        for job_id in os.listdir(jobs_dir):
+            try:
+                with open(os.path.join(jobs_dir, job_id, 'job.json')) as job_file:
+                    jobs.append(json.load(job_file))
+            except (OSError, ValueError):
+                continue
+        for job in sorted(jobs, key=lambda job: job['created_at']):
+            job.pop('cancel_requested', None)
+            self._jobs[job['job_id']] = job
+            if job['status'] not in FINAL_STATES:
+                job['error'] = "The server stopped before the job finished"
+                self._finish(job, FAILED)
+
+    def _save(self, job: dict) -> None:
+        path = os.path.join(self._job_dir(job['job_id']), 'job.json')
+        with open(path + '.tmp', 'w') as job_file:
+            json.dump(job, job_file, indent=2)
+        os.replace(path + '.tmp', path)
+
+    def submit(self, options: dict = None) -> dict:
+        """
+        Queues a training job.
+
+        Args:
+            options (dict, optional): Pipeline options, `force` (bool) and `stages` (list). Defaults to None.
+
+        Returns:
+            dict: The new job.
+
+        Raises:
+            JobQueueFullError: If `max_queued_jobs` jobs are already waiting.
+        """
+        with self._lock:
+            if len(self._queue) >= self.training_job_config.max_queued_jobs:
+                raise JobQueueFullError(f"{len(self._queue)} training jobs are already queued")
+            job_id = uuid.uuid4().hex[:12]
+            job = {
+                'job_id': job_id,
+                'status': QUEUED,
+                'options': options or {},
+                'created_at': _now(),
+                'started_at': None,
+                'finished_at': None,
+                'exit_code': None,
+                'error': None,
+                'result': None,
+            }
+            os.makedirs(self._job_dir(job_id), exist_ok=True)
+            self._save(job)
+            self._jobs[job_id] = job
+            self._queue.append(job_id)
+            self._lock.notify_all()
+            logging.info(f"Queued training job {job_id} with options {job['options']}")
+            return dict(job)
+
+    def get(self, job_id: str):
+        """
+        Returns a copy of a job, or None if there is no such job.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def list(self) -> list:
+        """
+        Returns copies of all jobs, oldest first.
+        """
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    def cancel(self, job_id: str):
+        """
+        Cancels a queued job, or stops a running one together with the processes it started.
+
+        Returns:
+            dict: The job, or None if there is no such job.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job['status'] in FINAL_STATES:
+                return dict(job) if job is not None else None
+            if job['status'] == QUEUED:
+                self._queue.remove(job_id)
+                self._finish(job, CANCELLED)
+                return dict(job)
+            process = self._processes[job_id]
+            job['cancel_requested'] = True
+
+        logging.info(f"Cancelling training job {job_id}")
+        self._signal(process, signal.SIGTERM)
+        try:
+            process.wait(timeout=CANCEL_GRACE_SECONDS)
+        except subprocess.TimeoutExpired:
+            self._signal(process, signal.SIGKILL if hasattr(signal, 'SIGKILL') else signal.SIGTERM)
+            process.wait()
+        with self._lock:
+            self._reap()
+            self._lock.notify_all()
+        return self.get(job_id)
+
+    @staticmethod
+    def _signal(process: subprocess.Popen, signum: int) -> None:
+        """
+        Signals the job's whole process group, so the training subprocess stops as well.
+        """
+        try:
+            if hasattr(os, 'killpg'):
+                os.killpg(process.pid, signum)
+            else:
+                process.terminate()
+        except ProcessLookupError:
+            pass
+
+    def _finish(self, job: dict, status: str, exit_code: int = None) -> None:
+        job['status'] = status
+        job['exit_code'] = exit_code
+        job['finished_at'] = _now()
+        result_path = os.path.join(self._job_dir(job['job_id']), 'result.json')
+        if os.path.exists(result_path):
+            with open(result_path) as result_file:
+                result = json.load(result_file)
+            job['result'], job['error'] = result.get('artifact'), result.get('error')
+        elif status == FAILED and job['error'] is None:
+            job['error'] = f"The job process exited with code {exit_code}, see its output.log"
+        self._save(job)
+        logging.info(f"Training job {job['job_id']} {status}")
+
+    def _reap(self) -> None:
+        """
+        Records the final state of job processes that have exited. Called with the lock held.
+        """
+        for job_id, process in list(self._processes.items()):
+            exit_code = process.poll()
+            if exit_code is None:
+                continue
+            del self._processes[job_id]
+            job = self._jobs[job_id]
+            if job.pop('cancel_requested', False):
+                status = CANCELLED
+            else:
+                status = SUCCEEDED if exit_code == 0 else FAILED
+            self._finish(job, status, exit_code)
+
+    def _start(self, job: dict) -> None:
+        """
+        Launches the job process with a low priority and limited to the CPUs not reserved for serving.
+        """
+        config = self.training_job_config
+        cpus = max((os.cpu_count() or 1) - config.reserved_serving_cpus, 1)
+        env = dict(os.environ)
+        for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+            env[variable] = str(cpus)
+        env['DRISHTI_TRAINING_CPUS'] = str(cpus)
+        env['DRISHTI_TRAINING_NICE'] = str(config.nice)
+
+        job_dir = self._job_dir(job['job_id'])
+        with open(os.path.join(job_dir, 'output.log'), 'ab') as log_file:
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'DrishtiDrive.pipeline.training_jobs', job_dir],
+                stdout=log_file,
+                stderr=subprocess.STDOUT,
+                env=env,
+                # Own process group, so cancelling reaches train.py and any other grandchildren
+                start_new_session=True,
+            )
+        self._processes[job['job_id']] = process
+        job['status'] = RUNNING
+        job['started_at'] = _now()
+        job['pid'] = process.pid
+        self._save(job)
+        logging.info(f"Started training job {job['job_id']} as process {process.pid} on {cpus} CPUs")
+
+    def _dispatch(self) -> None:
+        """
+        Reaps finished job processes and starts queued jobs while there are free slots.
+        """
+        while True:
+            with self._lock:
+                self._reap()
+                while self._queue and len(self._processes) < self.training_job_config.max_concurrent_jobs:
+                    job = self._jobs[self._queue.popleft()]
+                    try:
+                        self._start(job)
+                    except Exception as e:
+                        job['error'] = str(e)
+                        self._finish(job, FAILED)
+
+                self._lock.wait(POLL_INTERVAL)
+
+    def iter_progress(self, job_id: str) -> Iterator[dict]:
+        """
+        Follows a job's output until it finishes.
+
+        Yields:
+            dict: `{"metrics": record}` for every training metrics record, `{"log": line}` for
+            every other output line, then `{"job": job}` with the final job.
+        """
+        log_path = os.path.join(self._job_dir(job_id), 'output.log')
+        position = 0
+        while True:
+            job = self.get(job_id)
+            if os.path.exists(log_path):
+                with open(log_path, 'rb') as log_file:
+                    log_file.seek(position)
+                    data = log_file.read()
+                # Only complete lines; a partial last line is picked up on the next poll
+                complete = data[:data.rfind(b'\n') + 1]
+                position += len(complete)
+                for line in complete.decode(errors='replace').splitlines():
+                    record = parse_metrics_line(line)
+                    yield {'log': line} if record is None else {'metrics': record}
+            if job['status'] in FINAL_STATES:
+                yield {'job': job}
+                return
+            time.sleep(POLL_INTERVAL)
+
+    def metrics(self, job_id: str):
+        """
+        Collects the training metrics a job has reported so far.
+
+        Returns:
+            dict: The metrics records and their summary, or None if there is no such job.
+        """
+        if self.get(job_id) is None:
+            return None
+        log_path = os.path.join(self._job_dir(job_id), 'output.log')
+        records = []
+        if os.path.exists(log_path):
+            with open(log_path, 'rb') as log_file:
+                records = [record for record in map(parse_metrics_line, log_file) if record is not None]
+        return {'records': records, 'summary': summarize_epochs(records)}
+
+
+def run_job(job_dir: str) -> int:
+    """
+    Entry point of a job process: runs the training pipeline and records its artifact or error.
+    """
+    cpus = int(os.environ.get('DRISHTI_TRAINING_CPUS', '0'))
+    if cpus and hasattr(os, 'sched_setaffinity'):
+        # The last cores go to training, serving threads keep the first ones
+        available = sorted(os.sched_getaffinity(0))
+        os.sched_setaffinity(0, available[-cpus:])
+    if hasattr(os, 'nice'):
+        os.nice(int(os.environ.get('DRISHTI_TRAINING_NICE', '0')))
+
+    result_path = os.path.join(job_dir, 'result.json')
+    try:
+        with open(os.path.join(job_dir, 'job.json')) as job_file:
+            options = json.load(job_file)['options']
+
+        from dataclasses import asdict
+        from DrishtiDrive.pipeline.training_pipeline import TrainingPipeline
+
+        artifact = TrainingPipeline(force=options.get('force', False), stages=options.get('stages')).run_pipeline()
+        result = {'artifact': asdict(artifact) if artifact is not None else None}
+        exit_code = 0
+    except BaseException as e:
+        traceback.print_exc()
+        result = {'error': str(e)}
+        exit_code = 1
+    with open(result_path, 'w') as result_file:
+        json.dump(result, result_file, indent=2)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(run_job(sys.argv[1]))
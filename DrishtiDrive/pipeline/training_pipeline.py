@@ -1,16 +1,45 @@
 import sys, os
+import argparse
+from typing import Callable
 from DrishtiDrive.exception import AppException
 from DrishtiDrive.logger import logging
 from DrishtiDrive.components.data_ingestion import DataIngestion
-from DrishtiDrive.components.data_validation import DataValidation
-from DrishtiDrive.entity.config_entity import DataIngestionConfig, DataValidationConfig
-from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact, DataValidationArtifact
+from DrishtiDrive.components.data_validation import DataValidation, feature_store_digest
+from DrishtiDrive.components.image_store import ImageStore
+from DrishtiDrive.components.model_trainer import ModelTrainer
+from DrishtiDrive.components.model_exporter import ModelExporter
+from DrishtiDrive.components.hyperparameter_sweep import HyperparameterSweep
+from DrishtiDrive.entity.config_entity import (DataIngestionConfig, DataValidationConfig, ImageStoreConfig,
+                                               ModelTrainerConfig, ModelExporterConfig, HyperparameterSweepConfig)
+from DrishtiDrive.entity.artifacts_entity import (DataIngestionArtifact, DataValidationArtifact, ImageStoreArtifact,
+                                                  ModelTrainerArtifact, ModelExporterArtifact,
+                                                  HyperparameterSweepArtifact)
+from DrishtiDrive.utils.fingerprint_utils import (compute_fingerprint, load_stage_record, save_stage_record,
+                                                  artifact_outputs_exist)
+from DrishtiDrive.utils import download_utils, manifest_utils, image_store_utils, evaluation_utils
+from DrishtiDrive.pipeline import yolov5_train
+
+
+# Pipeline stages in run order
+STAGES = ('data_ingestion', 'data_validation', 'image_store', 'model_trainer', 'model_exporter')
 
 
 class TrainingPipeline:
-    def __init__(self):
+    def __init__(self, force: bool = False, stages: list = None):
+        """
+        Args:
+            force (bool, optional): Re-run every stage even if its fingerprint is unchanged. Defaults to False.
+            stages (list, optional): Stages to re-run even if their fingerprint is unchanged. Defaults to None.
+        """
+        self.force = force
+        self.forced_stages = set(stages or [])
+        self.run_ids = {}
         self.data_ingestion_config = DataIngestionConfig()
         self.data_validation_config = DataValidationConfig()
+        self.image_store_config = ImageStoreConfig()
+        self.model_trainer_config = ModelTrainerConfig()
+        self.model_exporter_config = ModelExporterConfig()
+        self.hyperparameter_sweep_config = HyperparameterSweepConfig()
 
     def start_data_ingestion(self) -> DataIngestionArtifact:
         try:
@@ -46,9 +75,194 @@ class TrainingPipeline:
             raise AppException(e, sys)
         
     
+    def start_image_store(self, data_validation_artifact: DataValidationArtifact) -> ImageStoreArtifact:
+        logging.info("Starting start_image_store method of TrainingPipeline class")
+        try:
+            image_store = ImageStore(
+                image_store_config=self.image_store_config,
+                data_validation_artifact=data_validation_artifact
+            )
+            image_store_artifact = image_store.initiate_image_store()
+            logging.info("Exited start_image_store method of TrainingPipeline class")
+            return image_store_artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+
+    def start_model_trainer(self, data_ingestion_artifact: DataIngestionArtifact,
+                            image_store_artifact: ImageStoreArtifact = None) -> ModelTrainerArtifact:
+        try:
+            model_trainer = ModelTrainer(
+                model_trainer_config=self.model_trainer_config,
+                feature_store_file_path=data_ingestion_artifact.feature_store_file_path,
+                image_store_artifact=image_store_artifact
+            )
+            model_trainer_artifact = model_trainer.initiate_model_trainer()
+            return model_trainer_artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+
+    def start_model_exporter(self, data_ingestion_artifact: DataIngestionArtifact,
+                             model_trainer_artifact: ModelTrainerArtifact) -> ModelExporterArtifact:
+        logging.info("Starting start_model_exporter method of TrainingPipeline class")
+        try:
+            model_exporter = ModelExporter(
+                model_exporter_config=self.model_exporter_config,
+                model_trainer_artifact=model_trainer_artifact,
+                feature_store_file_path=data_ingestion_artifact.feature_store_file_path
+            )
+            model_exporter_artifact = model_exporter.initiate_model_exporter()
+            logging.info("Exited start_model_exporter method of TrainingPipeline class")
+            return model_exporter_artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+
+    def start_hyperparameter_sweep(self, data_ingestion_artifact: DataIngestionArtifact,
+                                   image_store_artifact: ImageStoreArtifact = None) -> HyperparameterSweepArtifact:
+        logging.info("Starting start_hyperparameter_sweep method of TrainingPipeline class")
+        try:
+            hyperparameter_sweep = HyperparameterSweep(
+                hyperparameter_sweep_config=self.hyperparameter_sweep_config,
+                model_trainer_config=self.model_trainer_config,
+                feature_store_file_path=data_ingestion_artifact.feature_store_file_path,
+                image_store_artifact=image_store_artifact
+            )
+            hyperparameter_sweep_artifact = hyperparameter_sweep.initiate_hyperparameter_sweep()
+            logging.info("Exited start_hyperparameter_sweep method of TrainingPipeline class")
+            return hyperparameter_sweep_artifact
+
+        except Exception as e:
+            raise AppException(e, sys)
+
+
+    def _run_stage(self, stage: str, stage_dir: str, config, upstream: list, modules: list, artifact_class, run,
+                   input_digest: Callable[[], str] = None):
+        """
+        Runs a stage unless its fingerprint matches its last run, in which case the stored artifact is reused.
+
+        Args:
+            stage (str): The stage name, one of STAGES.
+            stage_dir (str): The artifact directory of the stage, where its fingerprint is kept.
+            config: The config dataclass of the stage.
+            upstream (list): The stages whose artifacts the stage consumes.
+            modules (list): The modules implementing the stage, their source is its code version.
+            artifact_class: The artifact dataclass of the stage.
+            run (Callable): Runs the stage and returns its artifact.
+            input_digest (Callable[[], str], optional): Digests input files that can change in place
+                without a new upstream run. Only called when there is a previous run to compare with,
+                and again after the run. Defaults to None.
+
+        Returns:
+            The artifact of the stage.
+        """
+        upstream_run_ids = [self.run_ids[name] for name in upstream]
+
+        def fingerprint() -> str:
+            inputs = input_digest() if input_digest is not None else ''
+            return compute_fingerprint(stage, config, upstream_run_ids, modules, inputs)
+
+        record = load_stage_record(stage_dir)
+        forced = self.force or stage in self.forced_stages
+        if not forced and record is not None and record['fingerprint'] == fingerprint() \
+                and artifact_outputs_exist(record['artifact']):
+            logging.info(f"Skipping {stage}: inputs, config and code are unchanged since {record['finished_at']}")
+            self.run_ids[stage] = record['run_id']
+            return artifact_class(**record['artifact'])
+
+        artifact = run()
+        self.run_ids[stage] = save_stage_record(stage_dir, fingerprint(), artifact)['run_id']
+        return artifact
+
+
+    def _run_data_stages(self) -> tuple:
+        """
+        Runs data ingestion, validation and the image store.
+
+        Returns:
+            tuple: The data ingestion, data validation and image store artifacts.
+        """
+        data_ingestion_artifact = self._run_stage(
+            'data_ingestion', self.data_ingestion_config.data_ingestion_dir, self.data_ingestion_config,
+            [], [sys.modules[DataIngestion.__module__], download_utils], DataIngestionArtifact,
+            self.start_data_ingestion,
+        )
+        data_validation_artifact = self._run_stage(
+            'data_validation', self.data_validation_config.data_validation_dir, self.data_validation_config,
+            ['data_ingestion'], [sys.modules[DataValidation.__module__], manifest_utils], DataValidationArtifact,
+            lambda: self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact),
+            # Files edited in the feature store do not change the ingestion run
+            lambda: feature_store_digest(data_ingestion_artifact.feature_store_file_path,
+                                         self.data_validation_config.manifest_file_path),
+        )
+        if not data_validation_artifact.validation_status:
+            raise ValueError(
+                f"Data validation failed, see {self.data_validation_config.report_file_path}"
+            )
+
+        image_store_artifact = self._run_stage(
+            'image_store', self.image_store_config.image_store_dir, self.image_store_config,
+            ['data_validation'], [sys.modules[ImageStore.__module__], image_store_utils], ImageStoreArtifact,
+            lambda: self.start_image_store(data_validation_artifact=data_validation_artifact),
+        )
+        return data_ingestion_artifact, data_validation_artifact, image_store_artifact
+
+
     def run_pipeline(self):
         try:
-            data_ingestion_artifact = self.start_data_ingestion()
-            data_validation_artifact = self.start_data_validation(data_ingestion_artifact=data_ingestion_artifact)
+            data_ingestion_artifact, data_validation_artifact, image_store_artifact = self._run_data_stages()
+            model_trainer_artifact = self._run_stage(
+                'model_trainer', self.model_trainer_config.model_trainer_dir, self.model_trainer_config,
+                ['data_validation', 'image_store'], [sys.modules[ModelTrainer.__module__], yolov5_train],
+                ModelTrainerArtifact,
+                lambda: self.start_model_trainer(data_ingestion_artifact=data_ingestion_artifact,
+                                                 image_store_artifact=image_store_artifact),
+            )
+            if self.model_trainer_config.node_rank != 0:
+                # The other hosts of a distributed run only train, host 0 exports the model
+                return None
+            model_exporter_artifact = self._run_stage(
+                'model_exporter', self.model_exporter_config.model_exporter_dir, self.model_exporter_config,
+                ['data_validation', 'model_trainer'], [sys.modules[ModelExporter.__module__], evaluation_utils],
+                ModelExporterArtifact,
+                lambda: self.start_model_exporter(data_ingestion_artifact=data_ingestion_artifact,
+                                                  model_trainer_artifact=model_trainer_artifact),
+            )
+            return model_exporter_artifact
         except Exception as e:
-            raise AppException(e, sys)
\ No newline at end of file
+            raise AppException(e, sys)
+
+
+    def run_sweep(self) -> HyperparameterSweepArtifact:
+        """
+        Runs the data stages, then a hyperparameter sweep instead of a single training run.
+        """
+        try:
+            data_ingestion_artifact, _, image_store_artifact = self._run_data_stages()
+            return self.start_hyperparameter_sweep(data_ingestion_artifact=data_ingestion_artifact,
+                                                   image_store_artifact=image_store_artifact)
+        except Exception as e:
+            raise AppException(e, sys)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the DrishtiDrive training pipeline.")
+    parser.add_argument("--force", action="store_true", help="re-run every stage")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=[],
+                        help="re-run these stages even if their fingerprint is unchanged")
+    parser.add_argument("--sweep", action="store_true",
+                        help="run a hyperparameter sweep instead of training and exporting one model")
+    parser.add_argument("--stub-trainer", action="store_true",
+                        help="run sweep trials with synthetic learning curves instead of yolov5")
+    args = parser.parse_args()
+    pipeline = TrainingPipeline(force=args.force, stages=args.stages)
+    if args.sweep:
+        if args.stub_trainer:
+            pipeline.hyperparameter_sweep_config.trainer = 'stub'
+        pipeline.run_sweep()
+    else:
+        pipeline.run_pipeline()
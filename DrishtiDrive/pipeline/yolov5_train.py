@@ -0,0 +1,345 @@
+"""
+Runs yolov5's train.py in this process with DrishtiDrive hooks installed.
+
+Besides yolov5's own output, one `DRISHTI_METRICS {json}` line is printed per epoch with its
+throughput, dataloader wait and compute time, losses and mAP. With --probe-batches, training
+stops early after one `probe` record measuring throughput.
+
+Usage, from the repository root:
+    python -m DrishtiDrive.pipeline.yolov5_train [--image-store STORE --image-store-index INDEX] [--cpus 0,1]
+        -- <train.py arguments>
+
+Started by torch.distributed.run with `--device cpu`, every process trains as one rank of a
+gloo data-parallel run, on its share of the host's cores.
+"""
+
+import os
+import sys
+import math
+import time
+import argparse
+import functools
+from contextlib import contextmanager
+from datetime import datetime
+
+from DrishtiDrive.constant.application import YOLOV5_DIR
+from DrishtiDrive.utils.image_store_utils import ImageStoreReader
+from DrishtiDrive.utils.training_metrics_utils import format_metrics_line
+from DrishtiDrive.utils.main_utils import limit_cpus, parse_cpu_ids
+
+
+# Order of the values yolov5 passes to its on_fit_epoch_end callback
+FIT_EPOCH_KEYS = ('box_loss', 'obj_loss', 'cls_loss', 'precision', 'recall', 'map50', 'map50_95',
+                  'val_box_loss', 'val_obj_loss', 'val_cls_loss', 'lr0', 'lr1', 'lr2')
+
+
+def use_image_store(reader: ImageStoreReader) -> None:
+    """
+    Makes yolov5's dataset read images from the memory-mapped image store instead of decoding them.
+
+    yolov5's `load_image` returns the image resized so that its longest side equals the
+    training size, which is exactly the unpadded content of a store row, so the patched
+    version returns that read-only view. Images missing from the store fall back to decoding,
+    as do the rare ones whose row cannot match: stored for the other kind of dataset (training
+    rows are resized for augmentation) or with a side yolov5 rounds up past the training size.
+    Dataloader workers inherit the patch and the mapping through fork, the default on Linux.
+    """
+    from utils.dataloaders import LoadImagesAndLabels
+
+    load_image_from_disk = LoadImagesAndLabels.load_image
+
+    def load_image(self, i):
+        row = reader.find(self.im_files[i])
+        if row is None or reader.image_size != self.img_size:
+            return load_image_from_disk(self, i)
+        image = reader.content(row)
+        height, width = (int(side) for side in reader.columns['shapes'][row])
+        scale = self.img_size / max(height, width)
+        if image.shape[:2] != (math.ceil(height * scale), math.ceil(width * scale)) or \
+                (reader.columns['splits'][row] == 'train') != bool(self.augment):
+            return load_image_from_disk(self, i)
+        return image, (height, width), image.shape[:2]
+
+    LoadImagesAndLabels.load_image = load_image
+
+
+class ProbeFinished(Exception):
+    """
+    Raised from a training callback to end a probe run once its batches are measured.
+    """
+
+
+class TrainingTelemetry:
+    """
+    yolov5 callbacks that time every epoch and print one metrics record per epoch to stdout.
+
+    The time between the end of a batch (or the start of the epoch) and the start of the next
+    batch is spent waiting on the dataloader, the time from the start to the end of a batch is
+    compute. Only the main process of a distributed run prints records.
+
+    In a probe run, training stops after `probe_warmup + probe_batches` batches with one
+    `probe` record measured over the last `probe_batches` of them.
+    """
+
+    def __init__(self, epochs: int, stream=None, probe_batches: int = 0, probe_warmup: int = 0):
+        self.epochs = epochs
+        self.stream = stream or sys.stdout
+        self.enabled = int(os.getenv('RANK', -1)) in (-1, 0)
+        # Every rank trains on an equal shard, so the main process scales its counts to the whole run
+        self.world_size = int(os.getenv('WORLD_SIZE', 1))
+        self.probe_batches = probe_batches
+        self.probe_warmup = probe_warmup
+        self.probe_seen = 0
+        self.run_start = time.perf_counter()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.epoch_start = self.mark = time.perf_counter()
+        self.batch_start = None
+        self.train_end = None
+        self.images = self.batches = 0
+        self.wait = self.compute = 0.0
+
+    def register(self, callbacks) -> None:
+        """
+        Registers the telemetry hooks on a yolov5 `Callbacks` instance.
+        """
+        for hook in ('on_train_epoch_start', 'on_train_batch_start', 'on_train_batch_end',
+                     'on_train_epoch_end', 'on_fit_epoch_end', 'on_train_end'):
+            callbacks.register_action(hook, name='drishti_telemetry', callback=getattr(self, hook))
+
+    def emit(self, record: dict) -> None:
+        if self.enabled:
+            self.stream.write(format_metrics_line(record))
+            self.stream.flush()
+
+    def on_train_epoch_start(self, *args, **kwargs) -> None:
+        self._reset()
+
+    def on_train_batch_start(self, *args, **kwargs) -> None:
+        self.batch_start = time.perf_counter()
+        self.wait += self.batch_start - self.mark
+
+    def on_train_batch_end(self, *args, **kwargs) -> None:
+        self.mark = time.perf_counter()
+        if self.batch_start is not None:
+            self.compute += self.mark - self.batch_start
+        self.batches += 1
+        # The image batch is the only 4-d tensor among the arguments, whatever their order in this yolov5 version
+        images = next((arg for arg in args if getattr(arg, 'ndim', None) == 4), None)
+        self.images += len(images) * self.world_size if images is not None else 0
+        if self.probe_batches:
+            self._check_probe()
+
+    def _check_probe(self) -> None:
+        self.probe_seen += 1
+        if self.probe_seen == self.probe_warmup:
+            # Warm-up batches, with worker start-up and allocator growth, are left out of the measurement
+            self.images = self.batches = 0
+            self.wait = self.compute = 0.0
+        elif self.probe_seen >= self.probe_warmup + self.probe_batches:
+            busy = self.wait + self.compute
+            self.emit({
+                'event': 'probe',
+                'time': datetime.now().isoformat(timespec='seconds'),
+                'images': self.images,
+                'batches': self.batches,
+                'dataloader_wait': self.wait,
+                'compute_time': self.compute,
+                'dataloader_wait_fraction': self.wait / busy if busy else 0.0,
+                'images_per_sec': self.images / busy if busy else 0.0,
+            })
+            raise ProbeFinished()
+
+    def on_train_epoch_end(self, *args, **kwargs) -> None:
+        self.train_end = time.perf_counter()
+
+    def on_fit_epoch_end(self, log_vals, epoch, *args, **kwargs) -> None:
+        end = time.perf_counter()
+        train_end = self.train_end or end
+        train_time = train_end - self.epoch_start
+        values = dict(zip(FIT_EPOCH_KEYS, (float(value) for value in log_vals)))
+        self.emit({
+            'event': 'epoch',
+            'epoch': int(epoch),
+            'epochs': self.epochs,
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'world_size': self.world_size,
+            'images': self.images,
+            'batches': self.batches,
+            'epoch_time': end - self.epoch_start,
+            'train_time': train_time,
+            'val_time': end - train_end,
+            'dataloader_wait': self.wait,
+            'compute_time': self.compute,
+            'dataloader_wait_fraction': self.wait / train_time if train_time else 0.0,
+            'images_per_sec': self.images / train_time if train_time else 0.0,
+            'losses': {key: values[key] for key in ('box_loss', 'obj_loss', 'cls_loss') if key in values},
+            'val_losses': {key: values[key] for key in ('val_box_loss', 'val_obj_loss', 'val_cls_loss')
+                           if key in values},
+            'metrics': {key: values[key] for key in ('precision', 'recall', 'map50', 'map50_95') if key in values},
+            'lr': [values[key] for key in ('lr0', 'lr1', 'lr2') if key in values],
+        })
+
+    def on_train_end(self, *args, **kwargs) -> None:
+        self.emit({
+            'event': 'end',
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'total_time': time.perf_counter() - self.run_start,
+        })
+
+
+def local_cpu_share(cpus: list) -> list:
+    """
+    The cores of this process when several ranks of a distributed run share a host: an equal,
+    disjoint share of `cpus` per local rank.
+    """
+    local_rank = int(os.getenv('LOCAL_RANK', -1))
+    local_world_size = int(os.getenv('LOCAL_WORLD_SIZE', 1))
+    if local_rank == -1 or local_world_size <= 1 or len(cpus) < local_world_size:
+        return cpus
+    share = len(cpus) // local_world_size
+    return cpus[local_rank * share:(local_rank + 1) * share]
+
+
+def train_cpu_ddp(train, opt, callbacks) -> None:
+    """
+    Runs yolov5's train() as one rank of a data-parallel run on CPU with the gloo backend.
+
+    yolov5's main() only sets up distributed training on CUDA and only wraps CUDA models in
+    DistributedDataParallel, so this sets up the run itself:
+
+    - the gloo process group, and yolov5's rank-0-first barriers without CUDA device ids;
+    - weights broadcast from rank 0 when the optimizer is built, since every rank seeds its
+      own initialization;
+    - gradients averaged across ranks right before every optimizer step, in one all-reduce of
+      a flat buffer rather than one per parameter. With gradient accumulation this is once per
+      `accumulate` batches, and yolov5's gradient clipping runs on each rank's own gradients first.
+
+    Everything else is yolov5's own distributed code: a DistributedSampler gives every rank
+    its shard of the dataset, each rank trains on batch_size / WORLD_SIZE images, and only
+    rank 0 validates and writes checkpoints.
+    """
+    import torch
+    import torch.distributed as dist
+    import utils.dataloaders
+    import utils.torch_utils
+    from pathlib import Path
+    from utils.general import check_file, check_yaml, increment_path
+
+    world_size = int(os.getenv('WORLD_SIZE', 1))
+    if opt.batch_size % world_size:
+        raise ValueError(f"--batch-size {opt.batch_size} must be a multiple of WORLD_SIZE {world_size}")
+
+    @contextmanager
+    def torch_distributed_zero_first(local_rank: int):
+        if local_rank not in (-1, 0):
+            dist.barrier()
+        yield
+        if local_rank == 0:
+            dist.barrier()
+
+    for module in (train, utils.dataloaders, utils.torch_utils):
+        if hasattr(module, 'torch_distributed_zero_first'):
+            module.torch_distributed_zero_first = torch_distributed_zero_first
+
+    def average_gradients(parameters: list) -> None:
+        grads = [parameter.grad for parameter in parameters if parameter.grad is not None]
+        if not grads:
+            return
+        flat = torch.cat([grad.reshape(-1) for grad in grads])
+        dist.all_reduce(flat)
+        flat.div_(world_size)
+        for grad, averaged in zip(grads, flat.split([grad.numel() for grad in grads])):
+            grad.copy_(averaged.view_as(grad))
+
+    smart_optimizer = train.smart_optimizer
+
+    def synchronized_optimizer(model, *args, **kwargs):
+        # train() builds the optimizer right after the model, before any forward pass
+        with torch.no_grad():
+            for tensor in model.state_dict().values():
+                dist.broadcast(tensor, src=0)
+        optimizer = smart_optimizer(model, *args, **kwargs)
+        parameters = [parameter for parameter in model.parameters() if parameter.requires_grad]
+        step = optimizer.step
+
+        # scaler.step(optimizer) ends in optimizer.step(), with or without AMP
+        @functools.wraps(step)
+        def synchronized_step(*step_args, **step_kwargs):
+            with torch.no_grad():
+                average_gradients(parameters)
+            return step(*step_args, **step_kwargs)
+
+        optimizer.step = synchronized_step
+        return optimizer
+
+    train.smart_optimizer = synchronized_optimizer
+
+    dist.init_process_group(backend='gloo')
+    try:
+        # The part of yolov5's main() a fresh, non-resumed run needs
+        opt.data, opt.cfg, opt.hyp, opt.weights, opt.project = (
+            check_file(opt.data), check_yaml(opt.cfg), check_yaml(opt.hyp), str(opt.weights), str(opt.project)
+        )
+        opt.save_dir = str(increment_path(Path(opt.project) / opt.name, exist_ok=opt.exist_ok))
+        train.train(opt.hyp, opt, torch.device('cpu'), callbacks)
+    finally:
+        dist.destroy_process_group()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--yolov5-dir", default=YOLOV5_DIR)
+    parser.add_argument("--image-store", help="uint8 tensor file of the image store")
+    parser.add_argument("--image-store-index", help="index file of the image store")
+    parser.add_argument("--cpus", type=parse_cpu_ids, help="comma-separated CPU cores to train on")
+    parser.add_argument("--probe-batches", type=int, default=0,
+                        help="stop after measuring this many batches, for batch size and worker probing")
+    parser.add_argument("--probe-warmup", type=int, default=0, help="batches run before a probe measurement")
+    parser.add_argument("train_args", nargs=argparse.REMAINDER, help="arguments passed on to train.py after --")
+    args = parser.parse_args()
+    train_args = args.train_args[1:] if args.train_args[:1] == ["--"] else args.train_args
+
+    cpus = args.cpus
+    if int(os.getenv('LOCAL_WORLD_SIZE', 1)) > 1:
+        available = sorted(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else \
+            list(range(os.cpu_count() or 1))
+        cpus = local_cpu_share(cpus or available)
+    if cpus:
+        # Before train.py imports torch, which sizes its thread pool once
+        limit_cpus(cpus)
+
+    reader = None
+    if args.image_store:
+        reader = ImageStoreReader(os.path.abspath(args.image_store), os.path.abspath(args.image_store_index))
+
+    # train.py resolves its own files relative to the yolov5 checkout
+    yolov5_dir = os.path.abspath(args.yolov5_dir)
+    os.chdir(yolov5_dir)
+    sys.path.insert(0, yolov5_dir)
+    import train
+
+    from utils.callbacks import Callbacks
+
+    if reader is not None:
+        use_image_store(reader)
+
+    sys.argv = ["train.py"] + train_args
+    opt = train.parse_opt()
+    callbacks = Callbacks()
+    TrainingTelemetry(epochs=opt.epochs, probe_batches=args.probe_batches,
+                      probe_warmup=args.probe_warmup).register(callbacks)
+    try:
+        if int(os.getenv('LOCAL_RANK', -1)) != -1 and opt.device == 'cpu':
+            train_cpu_ddp(train, opt, callbacks)
+        else:
+            train.main(opt, callbacks=callbacks)
+    except ProbeFinished:
+        # Skip joining the dataloader workers, the probe has all it needs
+        sys.stdout.flush()
+        os._exit(0)
+
+
+if __name__ == "__main__":
+    main()
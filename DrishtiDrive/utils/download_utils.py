@@ -0,0 +1,253 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from DrishtiDrive.logger import logging
+
+
+# Files smaller than this are fetched over a single connection
+PARALLEL_MIN_BYTES = 64 * 2 ** 20
+
+# Bytes downloaded between two saves of the range progress file
+PROGRESS_SAVE_BYTES = 16 * 2 ** 20
+
+# Client errors that may go away on their own: request timeout and too many requests
+RETRYABLE_CLIENT_ERRORS = (408, 429)
+
+
+def file_sha256(file_path: str, chunk_size: int = 2 ** 20) -> str:
+    """
+    Computes the hex SHA-256 digest of a file.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        while chunk := file.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_checksum(file_path: str, sha256: str) -> bool:
+    """
+    Checks a file against an expected SHA-256 digest; an empty digest accepts any file.
+    """
+    return not sha256 or file_sha256(file_path) == sha256.lower()
+
+
+def _local_path(url: str) -> str:
+    return urllib.request.url2pathname(urllib.parse.urlparse(url).path)
+
+
+def probe(url: str, timeout: float) -> tuple:
+    """
+    Looks up the size of a remote file and whether its server accepts byte ranges.
+
+    Args:
+        url (str): An http(s):// or file:// URL.
+        timeout (float): The socket timeout in seconds.
+
+    Returns:
+        tuple: The size in bytes or None if unknown, and True if byte ranges are supported.
+    """
+    if urllib.parse.urlparse(url).scheme == 'file':
+        return os.path.getsize(_local_path(url)), True
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, method='HEAD'), timeout=timeout) as response:
+            size = response.headers.get('Content-Length')
+            ranges = response.headers.get('Accept-Ranges', '').lower() == 'bytes'
+            return (int(size) if size else None), ranges
+    except urllib.error.HTTPError:
+        # Some servers reject HEAD; fall back to a plain streamed download
+        return None, False
+
+
+def open_range(url: str, start: int, timeout: float, end: int = None) -> tuple:
+    """
+    Opens a URL for reading from byte `start`, up to byte `end` inclusive if given.
+
+    Returns:
+        tuple: A readable stream and True if it starts at `start`; False means the
+        server ignored the range and the stream starts at byte zero.
+    """
+    if urllib.parse.urlparse(url).scheme == 'file':
+        stream = open(_local_path(url), 'rb')
+        stream.seek(start)
+        return stream, True
+    request = urllib.request.Request(url)
+    if start > 0 or end is not None:
+        request.add_header('Range', f"bytes={start}-{'' if end is None else end}")
+    response = urllib.request.urlopen(request, timeout=timeout)
+    return response, start == 0 or response.status == 206
+
+
+def _copy_stream(stream, target, limit: int, chunk_size: int, on_progress=None) -> int:
+    """
+    Copies up to `limit` bytes (all of them if None) from a stream into an open file.
+    """
+    copied = 0
+    while limit is None or copied < limit:
+        chunk = stream.read(chunk_size if limit is None else min(chunk_size, limit - copied))
+        if not chunk:
+            break
+        target.write(chunk)
+        copied += len(chunk)
+        if on_progress is not None:
+            on_progress(len(chunk))
+    return copied
+
+
+def _with_retries(function, retries: int, description: str):
+    """
+    Calls `function` until it succeeds, backing off exponentially, at most `retries` extra times.
+
+    Only server errors, timeouts and connection errors are retried; other 4xx responses such
+    as a wrong URL or an expired link are raised at once.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return function()
+        except (OSError, urllib.error.URLError) as e:
+            if isinstance(e, urllib.error.HTTPError) and 400 <= e.code < 500 \
+                    and e.code not in RETRYABLE_CLIENT_ERRORS:
+                raise
+            if attempt == retries:
+                raise
+            delay = min(2 ** attempt, 30)
+            logging.warning(f"{description} failed ({e}), retrying in {delay}s")
+            time.sleep(delay)
+
+
+def _download_stream(url: str, part_path: str, size: int, chunk_size: int, timeout: float, retries: int) -> None:
+    """
+    Downloads over one connection, resuming from the bytes already in the partial file.
+    """
+    def attempt():
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if size is not None and offset == size:
+            return
+        if size is not None and offset > size:
+            offset = 0
+        stream, ranged = open_range(url, offset, timeout)
+        with stream, open(part_path, 'ab' if offset and ranged else 'wb') as target:
+            if offset and not ranged:
+                logging.info("Server ignored the range request, restarting the download")
+            _copy_stream(stream, target, None, chunk_size)
+        if size is not None and os.path.getsize(part_path) < size:
+            raise OSError(f"connection closed after {os.path.getsize(part_path)} of {size} bytes")
+
+    _with_retries(attempt, retries, f"Download of {url}")
+
+
+def _download_ranges(url: str, part_path: str, size: int, num_connections: int, chunk_size: int,
+                     timeout: float, retries: int) -> None:
+    """
+    Downloads `num_connections` byte ranges concurrently into a preallocated partial file.
+
+    The bytes finished in each range are saved to a JSON file next to the partial file,
+    so an interrupted download resumes every range where it stopped.
+    """
+    state_path = part_path + '.ranges.json'
+    step = -(-size // num_connections)
+    ranges = [[start, min(start + step, size) - 1] for start in range(0, size, step)]
+
+    done = [0] * len(ranges)
+    if os.path.exists(part_path) and os.path.exists(state_path):
+        with open(state_path) as state_file:
+            state = json.load(state_file)
+        if state.get('size') == size and state.get('ranges') == ranges:
+            done = state['done']
+    if not any(done):
+        with open(part_path, 'wb') as target:
+            target.truncate(size)
+
+    lock = threading.Lock()
+    unsaved = [0]
+
+    def save_state():
+        with open(state_path + '.tmp', 'w') as state_file:
+            json.dump({'size': size, 'ranges': ranges, 'done': done}, state_file)
+        os.replace(state_path + '.tmp', state_path)
+
+    def fetch(index: int):
+        start, end = ranges[index]
+
+        def on_progress(count: int):
+            with lock:
+                done[index] += count
+                unsaved[0] += count
+                if unsaved[0] >= PROGRESS_SAVE_BYTES:
+                    save_state()
+                    unsaved[0] = 0
+
+        def attempt():
+            offset = start + done[index]
+            if offset > end:
+                return
+            stream, ranged = open_range(url, offset, timeout, end)
+            if not ranged:
+                stream.close()
+                raise OSError("server ignored the range request")
+            # Unbuffered, so the saved progress never counts bytes still sitting in a Python buffer
+            with stream, open(part_path, 'r+b', buffering=0) as target:
+                target.seek(offset)
+                _copy_stream(stream, target, end + 1 - offset, chunk_size, on_progress)
+            if start + done[index] <= end:
+                raise OSError(f"range {start}-{end} closed early")
+
+        _with_retries(attempt, retries, f"Range {start}-{end} of {url}")
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix='Download') as executor:
+            for future in [executor.submit(fetch, index) for index in range(len(ranges))]:
+                future.result()
+    finally:
+        with lock:
+            save_state()
+    os.remove(state_path)
+
+
+def download_file(url: str, file_path: str, sha256: str = '', num_connections: int = 4, chunk_size: int = 2 ** 20,
+                  timeout: float = 60.0, retries: int = 5) -> str:
+    """
+    Downloads a file in chunks with resume, optional parallel byte ranges and checksum verification.
+
+    Data is written to `<file_path>.part` and only renamed to `file_path` once complete and
+    verified, so `file_path` never holds a truncated download. Re-running after an
+    interruption continues from the partial file instead of starting over.
+
+    Args:
+        url (str): An http(s):// or file:// URL.
+        file_path (str): Where to store the file.
+        sha256 (str, optional): Expected hex SHA-256 digest; empty skips verification. Defaults to ''.
+        num_connections (int, optional): Concurrent range requests for large files. Defaults to 4.
+        chunk_size (int, optional): Bytes read per network read. Defaults to 1 MiB.
+        timeout (float, optional): Socket timeout in seconds. Defaults to 60.
+        retries (int, optional): Retries per connection after a network error. Defaults to 5.
+
+    Returns:
+        str: `file_path`.
+
+    Raises:
+        ValueError: If the downloaded file does not match `sha256`.
+    """
+    part_path = file_path + '.part'
+    size, ranges = _with_retries(lambda: probe(url, timeout), retries, f"Probe of {url}")
+    logging.info(f"Downloading {url} ({'unknown size' if size is None else f'{size / 2 ** 20:.1f} MB'})")
+
+    start = time.perf_counter()
+    if ranges and size is not None and size >= PARALLEL_MIN_BYTES and num_connections > 1:
+        _download_ranges(url, part_path, size, num_connections, chunk_size, timeout, retries)
+    else:
+        _download_stream(url, part_path, size, chunk_size, timeout, retries)
+
+    if not verify_checksum(part_path, sha256):
+        os.remove(part_path)
+        raise ValueError(f"Checksum mismatch for {url}, expected sha256 {sha256}")
+    os.replace(part_path, file_path)
+    logging.info(f"Downloaded {os.path.getsize(file_path) / 2 ** 20:.1f} MB in {time.perf_counter() - start:.1f}s")
+    return file_path
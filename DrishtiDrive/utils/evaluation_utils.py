@@ -0,0 +1,130 @@
+import numpy as np
+
+
+# IoU thresholds of the COCO-style mAP@0.5:0.95
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+
+
+def box_iou(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+    """
+    Computes the pairwise IoU of two sets of x1, y1, x2, y2 boxes.
+
+    Args:
+        boxes_a (np.ndarray): Boxes of shape (N, 4).
+        boxes_b (np.ndarray): Boxes of shape (M, 4).
+
+    Returns:
+        np.ndarray: IoU matrix of shape (N, M).
+    """
+    top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+    bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+    intersection = np.clip(bottom_right - top_left, 0, None).prod(2)
+    area_a = (boxes_a[:, 2:] - boxes_a[:, :2]).prod(1)
+    area_b = (boxes_b[:, 2:] - boxes_b[:, :2]).prod(1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+def yolo_to_xyxy(labels: np.ndarray, image_shape: tuple) -> np.ndarray:
+    """
+    Converts normalised YOLO labels to pixel boxes.
+
+    Args:
+        labels (np.ndarray): Rows of class, centre x, centre y, width, height in [0, 1].
+        image_shape (tuple): The height and width of the image.
+
+    Returns:
+        np.ndarray: Rows of class, x1, y1, x2, y2 in pixels.
+    """
+    height, width = image_shape[:2]
+    boxes = np.empty_like(labels)
+    boxes[:, 0] = labels[:, 0]
+    boxes[:, 1] = (labels[:, 1] - labels[:, 3] / 2) * width
+    boxes[:, 2] = (labels[:, 2] - labels[:, 4] / 2) * height
+    boxes[:, 3] = (labels[:, 1] + labels[:, 3] / 2) * width
+    boxes[:, 4] = (labels[:, 2] + labels[:, 4] / 2) * height
+    return boxes
+
+
+def match_detections(detections: np.ndarray, ground_truth: np.ndarray) -> np.ndarray:
+    """
+    Marks each detection as a true positive at every IoU threshold, matching each ground truth box at most once.
+
+    Args:
+        detections (np.ndarray): Rows of x1, y1, x2, y2, confidence, class.
+        ground_truth (np.ndarray): Rows of class, x1, y1, x2, y2.
+
+    Returns:
+        np.ndarray: Boolean array of shape (N, len(IOU_THRESHOLDS)).
+    """
+    correct = np.zeros((len(detections), len(IOU_THRESHOLDS)), dtype=bool)
+    if len(detections) == 0 or len(ground_truth) == 0:
+        return correct
+
+    iou = box_iou(ground_truth[:, 1:], detections[:, :4])
+    same_class = ground_truth[:, 0:1] == detections[:, 5]
+    for index, threshold in enumerate(IOU_THRESHOLDS):
+        gt_index, det_index = np.nonzero((iou >= threshold) & same_class)
+        if len(gt_index) == 0:
+            continue
+        # Highest IoU pairs first, then keep the first pair of every detection and of every ground truth box
+        order = np.argsort(-iou[gt_index, det_index], kind="stable")
+        gt_index, det_index = gt_index[order], det_index[order]
+        _, first = np.unique(det_index, return_index=True)
+        gt_index, det_index = gt_index[first], det_index[first]
+        _, first = np.unique(gt_index, return_index=True)
+        correct[det_index[first], index] = True
+    return correct
+
+
+def average_precision(recall: np.ndarray, precision: np.ndarray) -> float:
+    """
+    Computes the area under a precision-recall curve with 101-point interpolation, as in COCO.
+
+    Each of the recall levels 0, 0.01, ..., 1 takes the best precision at that recall or any
+    higher one, or 0 if the detections never reach it.
+    """
+    if len(recall) == 0:
+        return 0.0
+    # Precision envelope: best precision at this recall or any higher one
+    envelope = np.flip(np.maximum.accumulate(np.flip(precision)))
+    first = np.searchsorted(recall, np.linspace(0, 1, 101), side='left')
+    reached = first < len(recall)
+    return float(np.where(reached, envelope[np.minimum(first, len(recall) - 1)], 0.0).mean())
+
+
+def compute_map(detections: list, ground_truths: list) -> dict:
+    """
+    Computes mAP@0.5 and mAP@0.5:0.95 over a set of images.
+
+    Args:
+        detections (list): One array per image with rows of x1, y1, x2, y2, confidence, class.
+        ground_truths (list): One array per image with rows of class, x1, y1, x2, y2 in pixels.
+
+    Returns:
+        dict: `map50`, `map50_95` and the number of images and ground truth boxes evaluated.
+    """
+    correct = np.concatenate([match_detections(d, g) for d, g in zip(detections, ground_truths)] or
+                             [np.zeros((0, len(IOU_THRESHOLDS)), dtype=bool)])
+    all_detections = np.concatenate([d[:, :6] for d in detections] or [np.zeros((0, 6), dtype=np.float32)])
+    gt_classes = np.concatenate([g[:, 0] for g in ground_truths] or [np.zeros(0)]).astype(int)
+
+    order = np.argsort(-all_detections[:, 4], kind="stable")
+    correct, det_classes = correct[order], all_detections[order, 5].astype(int)
+
+    ap = []
+    for cls in np.unique(gt_classes):
+        of_class = det_classes == cls
+        num_gt = int((gt_classes == cls).sum())
+        true_positives = np.cumsum(correct[of_class], axis=0)
+        false_positives = np.cumsum(~correct[of_class], axis=0)
+        recall = true_positives / num_gt
+        precision = true_positives / np.maximum(true_positives + false_positives, 1)
+        ap.append([average_precision(recall[:, t], precision[:, t]) for t in range(len(IOU_THRESHOLDS))])
+
+    ap = np.array(ap).reshape(-1, len(IOU_THRESHOLDS))
+    return {
+        "map50": float(ap[:, 0].mean()) if len(ap) else 0.0,
+        "map50_95": float(ap.mean()) if len(ap) else 0.0,
+        "images": len(ground_truths),
+        "instances": int(len(gt_classes)),
+    }
@@ -0,0 +1,112 @@
+import os
+import json
+import uuid
+import hashlib
+import dataclasses
+from datetime import datetime
+
+
+# File written next to every stage artifact
+FINGERPRINT_FILE_NAME = "fingerprint.json"
+
+
+def module_digest(modules: list) -> str:
+    """
+    Hashes the source files of some modules, as the code version of a stage.
+    """
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, 'rb') as source:
+            digest.update(source.read())
+    return digest.hexdigest()
+
+
+def config_values(config) -> dict:
+    """
+    The fields of a config dataclass that can change a stage's output.
+
+    Fields whose metadata sets `fingerprint` to False, such as worker counts, the rendezvous of a
+    distributed run or per-host log paths, only change how a stage runs. They are left out, so moving
+    to another machine or host does not invalidate every stage.
+    """
+    runtime_only = {
+        config_field.name for config_field in dataclasses.fields(config)
+        if not config_field.metadata.get('fingerprint', True)
+    }
+    return {
+        name: value for name, value in dataclasses.asdict(config).items()
+        if name not in runtime_only
+    }
+
+
+def compute_fingerprint(stage: str, config, upstream_run_ids: list, modules: list, inputs: str = '') -> str:
+    """
+    Fingerprints a stage run from its config, the runs it consumes, its code and the content of its inputs.
+
+    Args:
+        stage (str): The stage name.
+        config: The config dataclass of the stage.
+        upstream_run_ids (list): The run ids of the stages whose artifacts are inputs.
+        modules (list): The modules implementing the stage.
+        inputs (str, optional): A content digest of input files that can change in place. Defaults to ''.
+
+    Returns:
+        str: A hex SHA-256 digest.
+    """
+    payload = {
+        'stage': stage,
+        'config': config_values(config),
+        'upstream': upstream_run_ids,
+        'code': module_digest(modules),
+        'inputs': inputs,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def load_stage_record(stage_dir: str):
+    """
+    Reads the fingerprint record of a stage's last run, or None if there is none.
+    """
+    record_path = os.path.join(stage_dir, FINGERPRINT_FILE_NAME)
+    if not os.path.exists(record_path):
+        return None
+    try:
+        with open(record_path) as record_file:
+            return json.load(record_file)
+    except (OSError, ValueError):
+        return None
+
+
+def save_stage_record(stage_dir: str, fingerprint: str, artifact) -> dict:
+    """
+    Records a finished stage run next to its artifact.
+
+    Every run gets a new run id; downstream fingerprints include it, so re-running a stage
+    invalidates everything that consumed its previous output.
+
+    Returns:
+        dict: The saved record.
+    """
+    record = {
+        'fingerprint': fingerprint,
+        'run_id': uuid.uuid4().hex,
+        'finished_at': datetime.now().isoformat(timespec='seconds'),
+        'artifact': dataclasses.asdict(artifact),
+    }
+    os.makedirs(stage_dir, exist_ok=True)
+    record_path = os.path.join(stage_dir, FINGERPRINT_FILE_NAME)
+    with open(record_path + '.tmp', 'w') as record_file:
+        json.dump(record, record_file, indent=2)
+    os.replace(record_path + '.tmp', record_path)
+    return record
+
+
+def artifact_outputs_exist(artifact: dict) -> bool:
+    """
+    Checks that every path recorded in an artifact still exists. Paths left as None are outputs
+    the stage does not produce on this host, e.g. the model on the other hosts of a distributed run.
+    """
+    return all(
+        os.path.exists(value) for name, value in artifact.items()
+        if name.endswith('_path') and isinstance(value, str)
+    )
@@ -0,0 +1,94 @@
+import os
+import numpy as np
+
+from DrishtiDrive.inference.preprocessing import LetterboxMeta
+
+
+# Version of the row layout, bumped whenever the same image would be stored differently
+STORE_FORMAT_VERSION = 2
+
+# Index columns besides the image size and format version, in file order
+INDEX_COLUMNS = ('paths', 'splits', 'hashes', 'offsets', 'shapes', 'scales', 'pads', 'content_shapes')
+
+
+class ImageStoreReader:
+    """
+    Zero-copy reader of an image store: letterboxed uint8 BGR images in one memory-mapped file.
+
+    Every process that opens the store maps the same file, so the images live once in the
+    page cache however many dataloader workers read them. Rows are read-only views.
+    """
+
+    def __init__(self, store_file_path: str, index_file_path: str):
+        """
+        Initialize the ImageStoreReader.
+
+        Args:
+            store_file_path (str): The uint8 tensor file of shape (N, S, S, 3).
+            index_file_path (str): The index of the store, written next to it.
+        """
+        self.store_file_path = store_file_path
+        self.index_file_path = index_file_path
+        with np.load(index_file_path, allow_pickle=False) as index:
+            self.image_size = int(index['image_size'])
+            # Stores written before the index recorded a version rounded the content size to nearest
+            self.format_version = int(index['format_version']) if 'format_version' in index.files else 1
+            self.columns = {name: index[name] for name in INDEX_COLUMNS}
+        self._rows = {path: row for row, path in enumerate(self.columns['paths'].tolist())}
+        self._open()
+
+    def _open(self) -> None:
+        size = self.image_size
+        count = len(self.columns['paths'])
+        self.images = np.memmap(self.store_file_path, dtype=np.uint8, mode='r', shape=(count, size, size, 3)) \
+            if count else np.zeros((0, size, size, 3), dtype=np.uint8)
+
+    def __getstate__(self):
+        # Pickle only the paths and index, never the mapped pixels; spawned workers re-map the file
+        state = self.__dict__.copy()
+        del state['images']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return len(self.columns['paths'])
+
+    def __getitem__(self, row: int) -> np.ndarray:
+        """
+        The letterboxed image of a row, a read-only view of shape (S, S, 3).
+        """
+        return self.images[row]
+
+    def find(self, image_path: str):
+        """
+        Returns the row of an image file, or None if it is not in the store.
+        """
+        return self._rows.get(os.path.realpath(image_path))
+
+    def content(self, row: int) -> np.ndarray:
+        """
+        The resized image of a row without its padding, a read-only view with the longest side equal to S.
+        """
+        left, top = self.columns['pads'][row]
+        height, width = self.columns['content_shapes'][row]
+        return self.images[row, top:top + height, left:left + width]
+
+    def meta(self, rows) -> LetterboxMeta:
+        """
+        The letterbox geometry of some rows, to map detections back onto the original images.
+        """
+        rows = np.asarray(rows)
+        return LetterboxMeta(
+            scales=self.columns['scales'][rows].astype(np.float32),
+            pads=self.columns['pads'][rows].astype(np.float32),
+            shapes=self.columns['shapes'][rows],
+        )
+
+    def split_rows(self, split: str) -> np.ndarray:
+        """
+        The rows of one dataset split.
+        """
+        return np.flatnonzero(self.columns['splits'] == split)
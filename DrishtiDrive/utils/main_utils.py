@@ -104,3 +104,104 @@ def encodeImageIntoBase64(imagepath):
     # Return the base64-encoded string
     return encoded_string
 
+
+
+# File extensions yolov5 treats as images
+IMAGE_EXTENSIONS = (".bmp", ".jpeg", ".jpg", ".png", ".tif", ".tiff", ".webp")
+
+
+def list_image_files(directory: str) -> list:
+    """
+    Lists the image files under a directory, recursively and in a stable order.
+
+    Args:
+        directory (str): The directory to search.
+
+    Returns:
+        list: The sorted image file paths.
+    """
+    return sorted(
+        os.path.join(root, name)
+        for root, _, files in os.walk(directory)
+        for name in files
+        if name.lower().endswith(IMAGE_EXTENSIONS)
+    )
+
+
+def resolve_split_dir(dataset_dir: str, split_path: str) -> str:
+    """
+    Resolves a split path from data.yaml against the dataset directory.
+
+    Roboflow exports write paths such as `../train/images` relative to a directory inside
+    the dataset, so when the plain join does not exist the leading `..` parts are dropped.
+
+    Args:
+        dataset_dir (str): The directory holding data.yaml.
+        split_path (str): The split path as written in data.yaml.
+
+    Returns:
+        str: The split image directory.
+    """
+    joined = os.path.normpath(os.path.join(dataset_dir, split_path))
+    if os.path.isdir(joined):
+        return joined
+    parts = [part for part in os.path.normpath(split_path).split(os.sep) if part != os.pardir]
+    stripped = os.path.join(dataset_dir, *parts)
+    return stripped if os.path.isdir(stripped) else joined
+
+
+def image_to_label_path(image_path: str) -> str:
+    """
+    Returns the YOLO label file that belongs to an image, following the yolov5 `images/` -> `labels/` convention.
+
+    Args:
+        image_path (str): The path to the image file.
+
+    Returns:
+        str: The path to the matching `.txt` label file.
+    """
+    head, _, tail = image_path.rpartition(f"{os.sep}images{os.sep}")
+    label_path = f"{head}{os.sep}labels{os.sep}{tail}" if head else image_path
+    return os.path.splitext(label_path)[0] + ".txt"
+
+
+def read_yolo_labels(label_path: str) -> "np.ndarray":
+    """
+    Reads a YOLO label file into an array of normalised boxes.
+
+    Args:
+        label_path (str): The path to the label file; a missing file means no objects.
+
+    Returns:
+        np.ndarray: A float32 array of shape (M, 5) with rows of class, centre x, centre y, width, height.
+    """
+    import numpy as np
+
+    if not os.path.exists(label_path):
+        return np.zeros((0, 5), dtype=np.float32)
+    with open(label_path) as label_file:
+        rows = [line.split() for line in label_file if line.strip()]
+    return np.array(rows, dtype=np.float32).reshape(-1, 5)
+
+
+def limit_cpus(cpu_ids: list) -> None:
+    """
+    Restricts the current process to some CPU cores and sizes the BLAS/OpenMP thread pools to match.
+
+    Must run before torch or numpy start their thread pools. CPU pinning is skipped where
+    the platform does not support it.
+
+    Args:
+        cpu_ids (list): The ids of the cores to run on.
+    """
+    for variable in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[variable] = str(len(cpu_ids))
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpu_ids)
+
+
+def parse_cpu_ids(value: str) -> list:
+    """
+    Parses a comma-separated list of CPU core ids such as "0,1,2".
+    """
+    return [int(cpu) for cpu in value.split(',') if cpu.strip()]
@@ -0,0 +1,151 @@
+import os
+import numpy as np
+
+
+# Bumped whenever the sample checks change, so manifests written by older checks are rebuilt
+MANIFEST_VERSION = 1
+
+# Per-sample columns, in file order
+SAMPLE_COLUMNS = ('paths', 'splits', 'image_sizes', 'image_mtimes', 'label_sizes', 'label_mtimes', 'hashes',
+                  'widths', 'heights', 'errors')
+
+# COCO area thresholds in pixels separating small, medium and large boxes
+SMALL_BOX_AREA = 32 ** 2
+LARGE_BOX_AREA = 96 ** 2
+
+
+class DatasetManifest:
+    """
+    Array-backed index of a dataset: one row per image and all label boxes flattened into one array.
+
+    Per-sample columns hold the image path and split, the size and mtime of the image and of
+    its label file (-1 when there is none), a content hash of both, the image dimensions and
+    the validation errors joined by newlines. `boxes` holds rows of class, centre x, centre y,
+    width, height for every sample, and sample `i` owns `boxes[box_offsets[i]:box_offsets[i + 1]]`.
+    """
+
+    def __init__(self, columns: dict, boxes: np.ndarray, box_offsets: np.ndarray, num_classes: int,
+                 version: int = MANIFEST_VERSION):
+        self.columns = columns
+        self.boxes = boxes
+        self.box_offsets = box_offsets
+        self.num_classes = num_classes
+        self.version = version
+        self._index = None
+
+    def __len__(self) -> int:
+        return len(self.columns['paths'])
+
+    @classmethod
+    def empty(cls, num_classes: int) -> "DatasetManifest":
+        return cls.from_records([], num_classes)
+
+    @classmethod
+    def from_records(cls, records: list, num_classes: int) -> "DatasetManifest":
+        """
+        Builds a manifest from per-sample dicts holding the column values and a `boxes` list.
+        """
+        columns = {
+            'paths': np.array([record['image'] for record in records], dtype=str),
+            'splits': np.array([record['split'] for record in records], dtype=str),
+            'image_sizes': np.array([record['image_size'] for record in records], dtype=np.int64),
+            'image_mtimes': np.array([record['image_mtime'] for record in records], dtype=np.int64),
+            'label_sizes': np.array([record['label_size'] for record in records], dtype=np.int64),
+            'label_mtimes': np.array([record['label_mtime'] for record in records], dtype=np.int64),
+            'hashes': np.array([record['hash'] for record in records], dtype='<U32'),
+            'widths': np.array([record['width'] for record in records], dtype=np.int32),
+            'heights': np.array([record['height'] for record in records], dtype=np.int32),
+            'errors': np.array(['\n'.join(record['errors']) for record in records], dtype=str),
+        }
+        counts = np.array([len(record['boxes']) for record in records], dtype=np.int64)
+        box_offsets = np.concatenate(([0], np.cumsum(counts)))
+        boxes = np.array([box for record in records for box in record['boxes']], dtype=np.float32).reshape(-1, 5)
+        return cls(columns, boxes, box_offsets, num_classes)
+
+    @classmethod
+    def load(cls, file_path: str) -> "DatasetManifest":
+        with np.load(file_path, allow_pickle=False) as data:
+            columns = {name: data[name] for name in SAMPLE_COLUMNS}
+            return cls(columns, data['boxes'], data['box_offsets'], int(data['num_classes']), int(data['version']))
+
+    def save(self, file_path: str) -> None:
+        """
+        Writes the manifest atomically, so an interrupted run never leaves a half-written file.
+        """
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        temp_path = file_path + '.tmp.npz'
+        np.savez(temp_path, boxes=self.boxes, box_offsets=self.box_offsets, num_classes=self.num_classes,
+                 version=self.version, **self.columns)
+        os.replace(temp_path, file_path)
+
+    def index(self) -> dict:
+        """
+        Maps every image path to its row.
+        """
+        if self._index is None:
+            self._index = {path: row for row, path in enumerate(self.columns['paths'].tolist())}
+        return self._index
+
+    def sample_boxes(self, row: int) -> np.ndarray:
+        """
+        The label boxes of one sample.
+        """
+        return self.boxes[self.box_offsets[row]:self.box_offsets[row + 1]]
+
+    def take(self, rows: np.ndarray) -> "DatasetManifest":
+        """
+        Returns a new manifest with the given rows, in that order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        starts, counts = self.box_offsets[rows], np.diff(self.box_offsets)[rows]
+        box_offsets = np.concatenate(([0], np.cumsum(counts)))
+        # Ragged gather: every taken box index is its sample's old start plus its position within the sample
+        box_index = np.repeat(starts - box_offsets[:-1], counts) + np.arange(box_offsets[-1])
+        columns = {name: column[rows] for name, column in self.columns.items()}
+        return DatasetManifest(columns, self.boxes[box_index], box_offsets, self.num_classes, self.version)
+
+    @staticmethod
+    def concatenate(manifests: list) -> "DatasetManifest":
+        first = manifests[0]
+        columns = {name: np.concatenate([m.columns[name] for m in manifests]) for name in SAMPLE_COLUMNS}
+        box_offsets = [np.zeros(1, dtype=np.int64)]
+        total = 0
+        for m in manifests:
+            box_offsets.append(m.box_offsets[1:] + total)
+            total += m.box_offsets[-1]
+        boxes = np.concatenate([m.boxes for m in manifests])
+        return DatasetManifest(columns, boxes, np.concatenate(box_offsets), first.num_classes, first.version)
+
+    def _box_mask(self, split: str = None) -> np.ndarray:
+        if split is None:
+            return np.ones(len(self.boxes), dtype=bool)
+        return np.repeat(self.columns['splits'] == split, np.diff(self.box_offsets))
+
+    def class_counts(self, split: str = None) -> np.ndarray:
+        """
+        Number of labelled boxes of every class, over one split or all of them.
+        """
+        classes = self.boxes[self._box_mask(split), 0].astype(np.int64)
+        classes = classes[(classes >= 0) & (classes < self.num_classes)]
+        return np.bincount(classes, minlength=self.num_classes)
+
+    def box_size_stats(self, split: str = None) -> dict:
+        """
+        Percentiles of the box width and height in pixels and the counts of small, medium and large boxes.
+        """
+        mask = self._box_mask(split)
+        counts = np.diff(self.box_offsets)
+        widths = self.boxes[mask, 3] * np.repeat(self.columns['widths'], counts)[mask]
+        heights = self.boxes[mask, 4] * np.repeat(self.columns['heights'], counts)[mask]
+        if len(widths) == 0:
+            return {'boxes': 0}
+        areas = widths * heights
+        percentiles = (5, 50, 95)
+        return {
+            'boxes': int(len(widths)),
+            'width_px': dict(zip((f"p{p}" for p in percentiles), np.percentile(widths, percentiles).round(1).tolist())),
+            'height_px': dict(zip((f"p{p}" for p in percentiles), np.percentile(heights, percentiles).round(1).tolist())),
+            'small': int((areas < SMALL_BOX_AREA).sum()),
+            'medium': int(((areas >= SMALL_BOX_AREA) & (areas < LARGE_BOX_AREA)).sum()),
+            'large': int((areas >= LARGE_BOX_AREA).sum()),
+        }
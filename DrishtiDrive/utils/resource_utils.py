@@ -0,0 +1,126 @@
+import os
+import threading
+
+
+# cgroup files holding the memory limit of a container, v2 then v1
+CGROUP_MEMORY_LIMIT_FILES = ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+
+def total_memory() -> int:
+    """
+    The memory available to this machine or container in bytes, the smaller of the
+    physical memory and the cgroup limit. Returns 0 if it cannot be determined.
+    """
+    try:
+        physical = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        physical = 0
+    for limit_file in CGROUP_MEMORY_LIMIT_FILES:
+        try:
+            with open(limit_file) as limit:
+                value = limit.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and (not physical or int(value) < physical):
+            return int(value)
+    return physical
+
+
+def _parent_pids() -> dict:
+    """
+    Maps the pid of every process to that of its parent, from /proc.
+    """
+    parents = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                # The command name may contain spaces, the fields after it do not
+                fields = stat.read().rpartition(')')[2].split()
+        except OSError:
+            continue
+        parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def process_tree_pids(pid: int) -> list:
+    """
+    The pid of a process and of all its descendants.
+    """
+    children = {}
+    for child, parent in _parent_pids().items():
+        children.setdefault(parent, []).append(child)
+    pids, stack = [], [pid]
+    while stack:
+        current = stack.pop()
+        pids.append(current)
+        stack.extend(children.get(current, []))
+    return pids
+
+
+def process_memory(pid: int) -> int:
+    """
+    The memory of one process in bytes.
+
+    Uses the proportional set size, which splits pages shared between processes, such as
+    those of forked dataloader workers, so the memory of a process tree is not counted twice.
+    Falls back to the resident set size on kernels without smaps_rollup.
+    """
+    for path, key in ((f'/proc/{pid}/smaps_rollup', 'Pss:'), (f'/proc/{pid}/status', 'VmRSS:')):
+        try:
+            with open(path) as status:
+                for line in status:
+                    if line.startswith(key):
+                        return int(line.split()[1]) * 1024
+        except OSError:
+            continue
+    return 0
+
+
+def process_tree_memory(pid: int) -> int:
+    """
+    The memory of a process and all its descendants in bytes.
+    """
+    return sum(process_memory(child) for child in process_tree_pids(pid))
+
+
+class PeakMemorySampler:
+    """
+    Samples the memory of this process tree in the background and keeps the peak above
+    what the tree used when sampling started.
+
+    Only supported on Linux; elsewhere `supported` is False and the peak stays 0.
+
+    Usage:
+        with PeakMemorySampler() as sampler:
+            run_child_processes()
+        peak = sampler.peak_bytes
+    """
+
+    def __init__(self, interval: float = 0.2):
+        self.interval = interval
+        self.supported = os.path.isdir('/proc/self')
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self, baseline: int) -> None:
+        while True:
+            self.peak_bytes = max(self.peak_bytes, process_tree_memory(os.getpid()) - baseline)
+            if self._stop.wait(self.interval):
+                return
+
+    def __enter__(self):
+        if self.supported:
+            baseline = process_tree_memory(os.getpid())
+            self._thread = threading.Thread(target=self._sample, args=(baseline,), name="PeakMemorySampler",
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        return False
@@ -0,0 +1,90 @@
+import os
+import json
+
+
+# Marks the output lines of the training process that carry a metrics record
+METRICS_LINE_PREFIX = "DRISHTI_METRICS "
+
+# Fraction of the training time spent waiting on the dataloader above which an epoch counts as input-bound
+INPUT_BOUND_WAIT_FRACTION = 0.5
+
+
+def format_metrics_line(record: dict) -> str:
+    """
+    Formats a metrics record as one output line of the training process.
+    """
+    return METRICS_LINE_PREFIX + json.dumps(record, separators=(",", ":")) + "\n"
+
+
+def parse_metrics_line(line):
+    """
+    Extracts the metrics record from an output line, or returns None if it carries none.
+
+    The marker may follow other output on the same line, such as a progress bar redrawn
+    with carriage returns by the other output stream.
+
+    Args:
+        line (str | bytes): One output line.
+
+    Returns:
+        dict: The metrics record, or None.
+    """
+    if isinstance(line, bytes):
+        line = line.decode(errors='replace')
+    start = line.find(METRICS_LINE_PREFIX)
+    if start < 0:
+        return None
+    try:
+        return json.loads(line[start + len(METRICS_LINE_PREFIX):])
+    except ValueError:
+        return None
+
+
+def read_metrics(metrics_file_path: str) -> list:
+    """
+    Reads the records of a metrics JSONL file, an empty list if it does not exist.
+
+    A final line cut short, by a training process killed while writing it, is skipped.
+    """
+    if not os.path.exists(metrics_file_path):
+        return []
+    records = []
+    with open(metrics_file_path) as metrics_file:
+        for line in metrics_file:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # Only the last line can lack its newline
+                if line.endswith('\n'):
+                    raise
+    return records
+
+
+def summarize_epochs(records: list) -> dict:
+    """
+    Summarizes the epoch records of a training run.
+
+    Returns:
+        dict: The number of epochs, their mean throughput and dataloader wait fraction, the best
+        mAP@0.5:0.95 and whether training was input-bound (waiting on the dataloader) or compute-bound.
+    """
+    epochs = [record for record in records if record.get('event') == 'epoch']
+    if not epochs:
+        return {'epochs': 0}
+    wait = sum(record['dataloader_wait'] for record in epochs)
+    compute = sum(record['compute_time'] for record in epochs)
+    train_time = sum(record['train_time'] for record in epochs)
+    images = sum(record['images'] for record in epochs)
+    wait_fraction = wait / train_time if train_time else 0.0
+    return {
+        'epochs': len(epochs),
+        'images_per_sec': images / train_time if train_time else 0.0,
+        'epoch_time': sum(record['epoch_time'] for record in epochs) / len(epochs),
+        'dataloader_wait': wait,
+        'compute_time': compute,
+        'dataloader_wait_fraction': wait_fraction,
+        'best_map50_95': max(record['metrics'].get('map50_95', 0.0) for record in epochs),
+        'bound': 'input' if wait_fraction > INPUT_BOUND_WAIT_FRACTION else 'compute',
+    }
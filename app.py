@@ -1,90 +1,519 @@
 from DrishtiDrive.logger import logging
 from DrishtiDrive.exception import AppException
-from DrishtiDrive.utils.main_utils import decodeImage, encodeImageIntoBase64
+from DrishtiDrive.inference.preprocessing import decode_image_bytes
 import sys,os
+import io
+import time
+import shutil
+import tempfile
+import base64
+import itertools
+import cv2
 
-from flask import Flask, request, jsonify, render_template, Response
+from flask import Flask, Request, request, jsonify, render_template, Response, g
 from flask_cors import CORS, cross_origin
-from DrishtiDrive.pipeline.training_pipeline import TrainingPipeline
-from DrishtiDrive.constant.training_pipeline.application import APP_HOST, APP_PORT
+from DrishtiDrive.pipeline.training_pipeline import STAGES
+from DrishtiDrive.pipeline.training_jobs import TrainingJobManager, JobQueueFullError
+from DrishtiDrive.constant.application import (APP_HOST, APP_PORT, INFERENCE_MAX_UPLOAD_BYTES, PREDICT_DEFAULT_FORMAT,
+                                               PREDICT_DEFAULT_ENCODING, PREDICT_DEFAULT_IMAGE_FORMAT,
+                                               PREDICT_DEFAULT_QUALITY, PREDICT_DEFAULT_MAX_SIDE)
+from DrishtiDrive.entity.config_entity import (InferenceConfig, BatchSchedulerConfig, StreamConfig, VideoInferenceConfig,
+                                               PredictionCacheConfig, TrainingJobConfig, MetricsConfig)
+from DrishtiDrive.inference.detector import Detector
+from DrishtiDrive.inference.batching import BatchScheduler, SchedulerFullError
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from DrishtiDrive.inference.cache import PredictionCache
+from DrishtiDrive.inference.metrics import ServingMetrics, PROMETHEUS_CONTENT_TYPE
+from DrishtiDrive.inference.rendering import draw_detections, encode_image, IMAGE_FORMATS
+from DrishtiDrive.inference.streaming import StreamPipeline, read_frames, iter_mjpeg, open_video_source
+from DrishtiDrive.inference.video import predict_video, iter_ndjson
+from DrishtiDrive.inference.formatting import detections_to_dict, pack_detections, DETECTION_LAYOUT
 
-# obj = TrainingPipeline()
-# obj.run_pipeline()
+
+VIDEO_ROUTE = '/predict/video'
+
+
+class InMemoryRequest(Request):
+    """
+    Request that keeps image uploads in memory instead of spooling large ones to a temporary file.
+
+    Video uploads keep the default spooling: they are far larger and OpenCV reads them from a file anyway.
+    """
+
+    @property
+    def max_content_length(self):
+        if self.path == VIDEO_ROUTE:
+            return VideoInferenceConfig().max_upload_bytes
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.path == VIDEO_ROUTE:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return io.BytesIO()
 
 
 app = Flask(__name__)
+app.request_class = InMemoryRequest
+app.config['MAX_CONTENT_LENGTH'] = INFERENCE_MAX_UPLOAD_BYTES
 CORS(app)
 
 class ClientApp:
     def __init__(self):
-        self.filename = 'inputimage.jpg'
-           
+        # Stage timers and counters of the serving path, served on /metrics
+        self.metrics = ServingMetrics(metrics_config=MetricsConfig())
+        self.batch_scheduler_config = BatchSchedulerConfig()
+        self.inference_config = InferenceConfig()
+        if self.inference_config.num_threads == 0:
+            # Split the cores across the workers so concurrent batches do not oversubscribe them
+            self.inference_config.num_threads = max((os.cpu_count() or 1) // self.batch_scheduler_config.num_workers, 1)
+        # Load the weights once per process instead of once per request
+        self.detector = Detector(inference_config=self.inference_config, metrics=self.metrics)
+        # Coalesce concurrent requests into batched forward passes on a bounded worker pool
+        self.scheduler = BatchScheduler(
+            predict_batch=self.detector.predict_batch,
+            batch_scheduler_config=self.batch_scheduler_config,
+            metrics=self.metrics
+        )
+        # Results of repeated images, keyed by image content, model version and inference parameters
+        self.cache = PredictionCache(prediction_cache_config=PredictionCacheConfig())
+        self.metrics.register("drishti_prediction_cache_hits_total", "counter", "Prediction cache hits.",
+                              lambda: self.cache.hits)
+        self.metrics.register("drishti_prediction_cache_misses_total", "counter", "Prediction cache misses.",
+                              lambda: self.cache.misses)
+        self.metrics.register("drishti_prediction_cache_size_bytes", "gauge", "Memory held by the prediction cache.",
+                              lambda: self.cache.size_bytes)
+        # Retraining runs in separate low-priority processes, so serving keeps its cores
+        self.training_jobs = TrainingJobManager(training_job_config=TrainingJobConfig())
+
+
+clApp = ClientApp()
+
+
+if clApp.metrics.enabled:
+    # Only hooked in while metrics are enabled, so disabled metrics cost nothing per request
+    @app.before_request
+    def startRequestTimer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def recordRequest(response):
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        clApp.metrics.observe_request(route, response.status_code, time.perf_counter() - g.request_start)
+        return response
 
-@app.route('/train')
+
+@app.route('/metrics', methods=['GET'])
+def metricsRoute():
+    """
+    Serves the serving metrics in the Prometheus text format: request counts and durations,
+    per-stage durations, batch sizes, the inference queue depth and the prediction cache counters.
+    Request rate and cache hit rate follow from the counters, e.g. rate(drishti_requests_total[1m]).
+    """
+    if not clApp.metrics.enabled:
+        return Response("Metrics are disabled", status=404)
+    return Response(clApp.metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.route('/train', methods=['POST', 'GET'])
+@cross_origin()
 def trainingRoute():
-    obj = TrainingPipeline()
-    obj.run_pipeline()
-    return 'Training successfull'
+    """
+    Queues a training pipeline run and returns its job id straight away.
+
+    Optional `force` and `stages` (JSON body or query string) are passed on to the pipeline.
+    """
+    try:
+        options = read_request_json()
+        options.update(request.args.to_dict())
+        stages = options.get('stages') or []
+        if isinstance(stages, str):
+            stages = stages.split(',')
+        unknown = sorted(set(stages) - set(STAGES))
+        if unknown:
+            raise ValueError(f"unknown stages {unknown}")
+        force = str(options.get('force', 'false')).lower() in ('1', 'true', 'yes')
+
+        job = clApp.training_jobs.submit({'force': force, 'stages': stages})
+        return jsonify(job), 202, {'Location': f"/train/{job['job_id']}"}
+
+    except JobQueueFullError as e:
+        return Response(str(e), status=503, headers={'Retry-After': '60'})
+    except ValueError as val:
+        logging.warning(f"Invalid value in request to {request.path}: {val}")
+        return Response(f"Invalid value in request: {val}", status=400)
+
+
+@app.route('/train/jobs', methods=['GET'])
+@cross_origin()
+def trainingJobsRoute():
+    return jsonify(clApp.training_jobs.list())
+
+
+@app.route('/train/<job_id>', methods=['GET'])
+@cross_origin()
+def trainingJobRoute(job_id):
+    job = clApp.training_jobs.get(job_id)
+    if job is None:
+        return Response(f"No training job {job_id}", status=404)
+    return jsonify(job)
+
+
+@app.route('/train/<job_id>/progress', methods=['GET'])
+@cross_origin()
+def trainingProgressRoute(job_id):
+    """
+    Streams the output and epoch metrics of a training job as NDJSON until it finishes, ending with the final job state.
+    """
+    if clApp.training_jobs.get(job_id) is None:
+        return Response(f"No training job {job_id}", status=404)
+    return Response(iter_ndjson(clApp.training_jobs.iter_progress(job_id)), mimetype='application/x-ndjson')
+
+
+@app.route('/train/<job_id>/metrics', methods=['GET'])
+@cross_origin()
+def trainingMetricsRoute(job_id):
+    """
+    Returns the per-epoch training metrics of a job so far, with throughput, dataloader wait and mAP.
+    """
+    metrics = clApp.training_jobs.metrics(job_id)
+    if metrics is None:
+        return Response(f"No training job {job_id}", status=404)
+    return jsonify(metrics)
+
+
+@app.route('/train/<job_id>/cancel', methods=['POST'])
+@cross_origin()
+def trainingCancelRoute(job_id):
+    job = clApp.training_jobs.cancel(job_id)
+    if job is None:
+        return Response(f"No training job {job_id}", status=404)
+    return jsonify(job)
 
 @app.route('/')
 def home():
     return render_template('index.html')
 
 
+class UnsupportedMediaTypeError(Exception):
+    """
+    Raised when a request carries neither an image upload, a raw image body nor a JSON body.
+    """
+
+
+def read_request_json() -> dict:
+    """
+    Returns the JSON body of the current request, or an empty dict if the request is not JSON.
+
+    Raises:
+        ValueError: If the body is malformed or not a JSON object.
+    """
+    if not request.is_json:
+        return {}
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        raise ValueError("the JSON body must be an object")
+    return dict(body)
+
+
+def read_request_image():
+    """
+    Returns the encoded image bytes of the current request.
+
+    Multipart uploads and raw `image/*` or `application/octet-stream` bodies are read
+    straight from the request buffer. JSON bodies carry a base64-encoded `image` field.
+
+    Raises:
+        UnsupportedMediaTypeError: If the request has none of these bodies.
+        ValueError: If a JSON body has no base64 `image` string.
+    """
+    if request.files:
+        upload = request.files.get('image') or next(iter(request.files.values()))
+        return upload.stream.getbuffer()
+    if request.mimetype.startswith('image/') or request.mimetype == 'application/octet-stream':
+        return request.get_data(cache=False)
+    if request.is_json:
+        image = read_request_json().get('image')
+        if not isinstance(image, str):
+            raise ValueError("the JSON body needs a base64 'image' string")
+        return base64.b64decode(image)
+    raise UnsupportedMediaTypeError(
+        f"Unsupported content type '{request.mimetype or 'none'}': send a multipart 'image' upload, "
+        "an image/* or application/octet-stream body, or a JSON object with a base64 'image' field"
+    )
+
+
+def read_response_options() -> dict:
+    """
+    Returns the response options of the current request.
+
+    Options are read from the multipart form, then the JSON body, then the query
+    string, with later sources taking precedence:
+
+    - `format`: `annotated` for a rendered image or `detections` for boxes only.
+    - `encoding`: `json` for a JSON body or `binary` for raw image bytes / packed float32 boxes.
+    - `image_format`, `quality`, `max_side`, `labels`: rendering options for `annotated`.
+    """
+    options = request.form.to_dict()
+    options.update({key: value for key, value in read_request_json().items() if key != 'image'})
+    options.update(request.args.to_dict())
+
+    response_format = options.get('format', PREDICT_DEFAULT_FORMAT)
+    encoding = options.get('encoding', PREDICT_DEFAULT_ENCODING)
+    image_format = options.get('image_format', PREDICT_DEFAULT_IMAGE_FORMAT)
+    if response_format not in ('annotated', 'detections'):
+        raise ValueError(f"unknown format '{response_format}'")
+    if encoding not in ('json', 'binary'):
+        raise ValueError(f"unknown encoding '{encoding}'")
+    if image_format not in IMAGE_FORMATS:
+        raise ValueError(f"unknown image_format '{image_format}'")
+
+    return {
+        'format': response_format,
+        'encoding': encoding,
+        'image_format': image_format,
+        'quality': min(max(int(options.get('quality', PREDICT_DEFAULT_QUALITY)), 1), 100),
+        'max_side': max(int(options.get('max_side', PREDICT_DEFAULT_MAX_SIDE)), 0),
+        'labels': str(options.get('labels', 'true')).lower() not in ('0', 'false', 'no'),
+    }
+
+
+def overloaded_response() -> Response:
+    """
+    Answers a request whose prediction did not finish within `request_timeout` because the worker pool is busy.
+    """
+    timeout = clApp.batch_scheduler_config.request_timeout
+    logging.warning(f"Request to {request.path} waited more than {timeout}s for inference")
+    return Response(f"Inference did not finish within {timeout}s, the server is overloaded", status=503,
+                    headers={'Retry-After': '1'})
+
+
 @app.route('/predict', methods=['POST', 'GET'])
 @cross_origin()
 def predictRoute():
     try:
-        image = request.json['image']
-        decodeImage(image, clApp.filename)
-        
-        # Debugging: Print current directory and its contents
-        print("Current Working Directory:", os.getcwd())
-        print("Files in current directory:", os.listdir(os.getcwd()))
-        print("Files in yolov5 directory:", os.listdir('yolov5'))
-        
-
-        
-        # Execute detection script with correct paths
-        os.system(f"cd yolov5 && python detect.py --weights best.pt --img 416 --conf 0.5 --source ../data/inputimage.jpg")
-        
-        # Find the latest run folder dynamically
-        exp_folder = max([os.path.join('yolov5/runs/detect', d) for d in os.listdir('yolov5/runs/detect')], key=os.path.getmtime)
-        output_image_path = os.path.join(exp_folder, 'inputimage.jpg')
-        
-        if not os.path.exists(output_image_path):
-            return Response(f"Output image not found at {output_image_path}", status=404)
-        
-        opencodedbase64 = encodeImageIntoBase64(output_image_path)
-        result = {"image": opencodedbase64.decode('utf-8')}
-        os.system("rm -rf yolov5/runs")
+        metrics = clApp.metrics
+        options = read_response_options()
+        with metrics.stage('read_image'):
+            image_bytes = read_request_image()
+        with metrics.stage('cache_lookup'):
+            cache_key = clApp.cache.make_key(image_bytes, clApp.detector.model_version, clApp.detector.inference_params)
+            cached = clApp.cache.get(cache_key)
+
+        # A cache hit in detections mode never needs the pixels
+        input_image = None
+        if cached is None or options['format'] == 'annotated':
+            with metrics.stage('image_decode'):
+                input_image = decode_image_bytes(image_bytes)
+            if input_image is None:
+                return Response("Could not decode the input image", status=400)
+
+        if cached is None:
+            with metrics.stage('inference'):
+                detections = clApp.scheduler.predict(input_image, timeout=clApp.batch_scheduler_config.request_timeout)
+            # Cached arrays are shared between requests, so freeze them
+            detections.flags.writeable = False
+            image_shape = input_image.shape
+            clApp.cache.put(cache_key, (detections, image_shape), detections.nbytes)
+        else:
+            detections, image_shape = cached
+
+        if options['format'] == 'detections':
+            if options['encoding'] == 'binary':
+                return Response(pack_detections(detections), mimetype='application/octet-stream', headers={
+                    'X-Detection-Count': str(len(detections)),
+                    'X-Detection-Layout': DETECTION_LAYOUT,
+                    'X-Image-Width': str(image_shape[1]),
+                    'X-Image-Height': str(image_shape[0]),
+                })
+            result = detections_to_dict(detections, clApp.detector.names, image_shape)
+        else:
+            with metrics.stage('render'):
+                output_image = draw_detections(input_image, detections, clApp.detector.names,
+                                               max_side=options['max_side'], labels=options['labels'])
+            with metrics.stage('image_encode'):
+                encoded = encode_image(output_image, options['image_format'], options['quality'])
+            if options['encoding'] == 'binary':
+                return Response(encoded, mimetype=f"image/{options['image_format']}")
+            with metrics.stage('base64_encode'):
+                result = {"image": base64.b64encode(encoded).decode('utf-8')}
+    except SchedulerFullError as e:
+        return Response(str(e), status=503, headers={'Retry-After': '1'})
+    except FutureTimeoutError:
+        return overloaded_response()
+    except UnsupportedMediaTypeError as e:
+        return Response(str(e), status=415)
     except ValueError as val:
-        print(val)
-        return Response("Value not found inside json data", status=400)
+        logging.warning(f"Invalid value in request to {request.path}: {val}")
+        return Response(f"Invalid value in request: {val}", status=400)
     except KeyError:
         return Response("Key value error: incorrect key passed", status=400)
     except Exception as e:
-        print(e)
-        result = "Invalid input"
+        logging.exception(f"Request to {request.path} failed: {e}")
         return Response(str(e), status=500)
 
     return jsonify(result)
 
+def save_request_video() -> str:
+    """
+    Copies the uploaded video of the current request to a temporary file in chunks and returns its path.
+
+    Accepts a multipart upload or a raw request body; returns None if the request carries neither.
+    """
+    if request.files:
+        upload = request.files.get('video') or next(iter(request.files.values()))
+        stream, suffix = upload.stream, os.path.splitext(upload.filename or '')[1]
+    elif request.content_length and not request.is_json:
+        stream, suffix = request.stream, ''
+    else:
+        return None
+
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    with os.fdopen(handle, 'wb') as target:
+        shutil.copyfileobj(stream, target)
+    return path
+
+
+def resolve_local_video(path: str, local_dir: str):
+    """
+    Returns the real path of a server-side video if it lies inside `local_dir`, otherwise None.
+    """
+    if not local_dir:
+        return None
+    root = os.path.realpath(local_dir)
+    resolved = os.path.realpath(os.path.join(root, path))
+    return resolved if os.path.commonpath([root, resolved]) == root else None
+
+
+@app.route(VIDEO_ROUTE, methods=['POST'])
+@cross_origin()
+def predictVideoRoute():
+    """
+    Runs batched detection over an uploaded or local video and streams one NDJSON line per frame as it goes.
+
+    The video comes as a multipart upload, a raw body, or a `path` (query string or JSON body)
+    inside `VideoInferenceConfig.local_dir`. `batch_size` and `frame_stride` tune the run.
+    Frames run on the shared inference worker pool, batched with other requests.
+    """
+    upload_path = None
+    try:
+        video_config = VideoInferenceConfig()
+        options = read_request_json()
+        options.update(request.args.to_dict())
+        # Frames in flight per video, at most one full batch of the scheduler
+        batch_size = min(max(int(options.get('batch_size', video_config.batch_size)), 1),
+                         clApp.batch_scheduler_config.max_batch_size)
+        frame_stride = max(int(options.get('frame_stride', video_config.frame_stride)), 1)
+
+        upload_path = save_request_video()
+        if upload_path:
+            source = upload_path
+        else:
+            source = resolve_local_video(options['path'], video_config.local_dir)
+            if source is None:
+                return Response(f"Path '{options['path']}' is not allowed", status=403)
+        # Open once up front so a bad video fails with 400 before the stream starts
+        open_video_source(source).release()
+
+        timeout = clApp.batch_scheduler_config.request_timeout
+        records = predict_video(lambda frames: clApp.scheduler.predict_many(frames, timeout=timeout), source,
+                                clApp.detector.names, batch_size=batch_size, frame_stride=frame_stride)
+        # Run the first batch before the headers go out, so an overloaded pool still gets a 503
+        first = next(records, None)
+
+        def generate(path):
+            try:
+                yield from iter_ndjson(itertools.chain([first] if first is not None else [], records))
+            except (SchedulerFullError, FutureTimeoutError) as e:
+                # Too late for a status code, the truncated stream tells the client to retry
+                logging.warning(f"Video stream from {VIDEO_ROUTE} stopped, the inference pool is overloaded: {e!r}")
+            finally:
+                if path:
+                    os.remove(path)
+
+        response = Response(generate(upload_path), mimetype='application/x-ndjson')
+        upload_path = None  # the generator owns the file from here on
+        return response
+
+    except ValueError as val:
+        logging.warning(f"Invalid value in request to {request.path}: {val}")
+        return Response(f"Invalid value in request: {val}", status=400)
+    except SchedulerFullError as e:
+        return Response(str(e), status=503, headers={'Retry-After': '1'})
+    except FutureTimeoutError:
+        return overloaded_response()
+    except KeyError:
+        return Response("Key value error: send a video upload or a 'path'", status=400)
+    except Exception as e:
+        logging.exception(f"Request to {request.path} failed: {e}")
+        return Response(str(e), status=500)
+    finally:
+        if upload_path:
+            os.remove(upload_path)
+
+
+@app.route('/predict/cache', methods=['GET'])
+@cross_origin()
+def predictionCacheRoute():
+    return jsonify(clApp.cache.stats())
+
+
 @app.route("/live", methods=['GET'])
 @cross_origin()
 def predictLive():
+    """
+    Streams annotated frames from a camera, video file or stream URL as MJPEG.
+
+    Capture, preprocessing, inference and encoding run as separate stages connected
+    by bounded queues that drop stale frames, so the stream stays real-time when
+    inference is slower than the source.
+
+    The source is the configured one unless `source` names one of `StreamConfig.allowed_sources`.
+    """
     try:
-        os.system("cd yolov5/ && python detect.py --weights best.pt --img 416 --conf 0.5 --source 0")
-        os.system("rm -rf yolov5/runs")
-        return "Camera starting!!" 
+        stream_config = StreamConfig()
+        source = request.args.get('source', stream_config.source)
+        if source != stream_config.source and source not in stream_config.allowed_sources:
+            return Response(f"Source '{source}' is not allowed", status=403)
+        max_side = max(int(request.args.get('max_side', stream_config.max_side)), 0)
+        quality = min(max(int(request.args.get('quality', stream_config.jpeg_quality)), 1), 100)
+        timeout = clApp.batch_scheduler_config.request_timeout
 
-    except ValueError as val:
-        print(val)
-        return Response("Value not found inside  json data")
-    
+        def preprocess(frame):
+            # Shrink large frames once so drawing and encoding work on the preview size
+            height, width = frame.shape[:2]
+            scale = max_side / max(height, width) if max_side else 1.0
+            if scale < 1.0:
+                with clApp.metrics.stage('live_resize'):
+                    frame = cv2.resize(frame, (round(width * scale), round(height * scale)),
+                                       interpolation=cv2.INTER_AREA)
+            return frame
+
+        def infer(frame):
+            try:
+                return frame, clApp.scheduler.predict(frame, timeout=timeout)
+            except (SchedulerFullError, FutureTimeoutError):
+                # Back-pressure: drop the frame like any other stale one, the next frame tries again
+                return None
+
+        def encode(item):
+            frame, detections = item
+            with clApp.metrics.stage('render'):
+                output_image = draw_detections(frame, detections, clApp.detector.names)
+            with clApp.metrics.stage('image_encode'):
+                return encode_image(output_image, 'jpeg', quality)
 
+        pipeline = StreamPipeline(
+            source=read_frames(source, realtime=stream_config.realtime),
+            stages=[('preprocess', preprocess), ('infer', infer), ('encode', encode)],
+            queue_size=stream_config.queue_size
+        ).start()
+        return Response(iter_mjpeg(pipeline, boundary='frame'), mimetype='multipart/x-mixed-replace; boundary=frame')
+
+    except ValueError as val:
+        logging.warning(f"Invalid value in request to {request.path}: {val}")
+        return Response(f"Invalid value in request: {val}", status=400)
 
 
 if __name__ == "__main__":
-    clApp = ClientApp()
-    app.run(host=APP_HOST, port=APP_PORT)
\ No newline at end of file
+    # Requests are isolated from each other, so the server can handle them concurrently
+    app.run(host=APP_HOST, port=APP_PORT, threaded=True)
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Benchmarks the batched NumPy post-processing against a simple per-image, per-class reference on crowded scenes.
+
+Usage:
+    python benchmarks/nms_benchmark.py --batch-size 8 --objects 150 --candidates-per-object 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DrishtiDrive.inference.preprocessing import LetterboxMeta
+from DrishtiDrive.inference.postprocessing import postprocess
+
+
+def make_crowded_batch(batch_size: int, objects: int, candidates_per_object: int, background: int,
+                       num_classes: int, image_size: int, seed: int) -> np.ndarray:
+    """
+    Builds raw YOLOv5-style output where every object is covered by many jittered, overlapping candidates.
+    """
+    rng = np.random.default_rng(seed)
+    rows = objects * candidates_per_object + background
+    prediction = np.zeros((batch_size, rows, 5 + num_classes), dtype=np.float32)
+    for image in range(batch_size):
+        centres = rng.uniform(20, image_size - 20, (objects, 2))
+        sizes = rng.uniform(10, 60, (objects, 2))
+        labels = rng.integers(0, num_classes, objects)
+
+        jitter = rng.normal(0, 2.5, (objects, candidates_per_object, 4))
+        boxes = np.concatenate([centres, sizes], 1)[:, None, :] + jitter
+        prediction[image, :objects * candidates_per_object, :4] = boxes.reshape(-1, 4)
+        prediction[image, :objects * candidates_per_object, 4] = rng.uniform(0.3, 1.0, objects * candidates_per_object)
+        class_scores = rng.uniform(0, 0.2, (objects * candidates_per_object, num_classes))
+        class_scores[np.arange(len(class_scores)), np.repeat(labels, candidates_per_object)] = rng.uniform(0.6, 1.0, len(class_scores))
+        prediction[image, :objects * candidates_per_object, 5:] = class_scores
+
+        # Low-confidence background anchors that the objectness filter should discard
+        prediction[image, objects * candidates_per_object:, :4] = rng.uniform(0, image_size, (background, 4))
+        prediction[image, objects * candidates_per_object:, 4] = rng.uniform(0, 0.1, background)
+    return prediction
+
+
+def reference_postprocess(prediction: np.ndarray, conf_threshold: float, iou_threshold: float, max_detections: int) -> list:
+    """
+    Straightforward reference: one image at a time, one class at a time, pairwise IoU in Python.
+    """
+    def iou(a, b):
+        width = max(min(a[2], b[2]) - max(a[0], b[0]), 0.0)
+        height = max(min(a[3], b[3]) - max(a[1], b[1]), 0.0)
+        intersection = width * height
+        union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - intersection
+        return intersection / (union + 1e-9)
+
+    results = []
+    for image in prediction:
+        detections = []
+        for row in image:
+            if row[4] <= conf_threshold:
+                continue
+            class_scores = row[5:] * row[4]
+            cls = int(class_scores.argmax())
+            score = float(class_scores[cls])
+            if score <= conf_threshold:
+                continue
+            cx, cy, w, h = (float(v) for v in row[:4])
+            detections.append((cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2, score, cls))
+
+        kept = []
+        for cls in sorted({d[5] for d in detections}):
+            remaining = sorted((d for d in detections if d[5] == cls), key=lambda d: -d[4])
+            while remaining:
+                best = remaining.pop(0)
+                kept.append(best)
+                remaining = [d for d in remaining if iou(best, d) <= iou_threshold]
+        kept.sort(key=lambda d: -d[4])
+        # Boxes are clipped to the image after NMS, as in yolov5; original image coordinates start at zero
+        kept = [(max(x1, 0.0), max(y1, 0.0), max(x2, 0.0), max(y2, 0.0), score, cls)
+                for x1, y1, x2, y2, score, cls in kept]
+        results.append(np.array(kept[:max_detections], dtype=np.float32).reshape(-1, 6))
+    return results
+
+
+def time_call(function, repeats: int) -> float:
+    """
+    Returns the best wall time of `repeats` calls, in milliseconds.
+    """
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--objects", type=int, default=150, help="objects per image")
+    parser.add_argument("--candidates-per-object", type=int, default=20)
+    parser.add_argument("--background", type=int, default=10000, help="low-confidence anchors per image")
+    parser.add_argument("--num-classes", type=int, default=10)
+    parser.add_argument("--image-size", type=int, default=416)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--iou", type=float, default=0.45)
+    parser.add_argument("--max-det", type=int, default=1000)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    prediction = make_crowded_batch(args.batch_size, args.objects, args.candidates_per_object, args.background,
+                                    args.num_classes, args.image_size, args.seed)
+    # Identity letterbox so both implementations report boxes in the same coordinates
+    meta = LetterboxMeta(
+        scales=np.ones(args.batch_size, dtype=np.float32),
+        pads=np.zeros((args.batch_size, 2), dtype=np.float32),
+        shapes=np.full((args.batch_size, 2), 1 << 20, dtype=np.int64),
+    )
+
+    batched = postprocess(prediction, meta, args.conf, args.iou, args.max_det)
+    reference = reference_postprocess(prediction, args.conf, args.iou, args.max_det)
+    matches = all(
+        len(a) == len(b) and np.allclose(a[:, 4:], b[:, 4:]) and np.allclose(a[:, :4], np.round(b[:, :4]))
+        for a, b in zip(batched, reference)
+    )
+
+    batched_ms = time_call(lambda: postprocess(prediction, meta, args.conf, args.iou, args.max_det), args.repeats)
+    reference_ms = time_call(lambda: reference_postprocess(prediction, args.conf, args.iou, args.max_det), max(args.repeats // 5, 1))
+
+    print(json.dumps({
+        "batch_size": args.batch_size,
+        "candidates_per_image": args.objects * args.candidates_per_object,
+        "detections_per_image": [len(d) for d in batched],
+        "matches_reference": matches,
+        "batched_ms": round(batched_ms, 3),
+        "reference_ms": round(reference_ms, 3),
+        "speedup": round(reference_ms / batched_ms, 1),
+    }, indent=2))
+    return 0 if matches else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
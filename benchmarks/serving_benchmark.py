@@ -0,0 +1,525 @@
+"""
+Load-tests the serving endpoints of app.py in-process against the stub detector backend.
+
+Starts the Flask app on a local port and drives /predict with a fixed number of concurrent
+clients that send generated JPEGs of realistic sizes. It then reads /live from a generated
+video. It reports the latency percentiles, the throughput and a per-stage breakdown of the
+/predict path as JSON. The breakdown has two parts: the stage timings the server recorded under
+load on /metrics, and each stage timed on its own per image size.
+
+The run fails when a scenario regresses beyond the baseline, and when there is no baseline
+to compare with. benchmarks/baselines/serving_benchmark.json was recorded with the default
+settings on a single-core machine. Every report records the CPU, the usable cores, the thread
+settings and the batching settings of the server, and a baseline recorded with different ones
+is refused rather than compared. On another machine save one with --save-baseline (and
+--baseline to keep it out of the repository) before changing the serving path.
+
+Usage:
+    python benchmarks/serving_benchmark.py --concurrency 1,4,16 --requests 200 --output report.json
+    python benchmarks/serving_benchmark.py --save-baseline
+    python benchmarks/serving_benchmark.py --tolerance 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import shutil
+import struct
+import argparse
+import itertools
+import platform
+import tempfile
+import threading
+import http.client
+import logging as std_logging
+from urllib.parse import quote
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "serving_benchmark.json")
+
+# Metrics compared against the baseline and whether a lower value is better
+GATED_METRICS = {
+    "predict": [(("latency_ms", "p50"), True), (("latency_ms", "p95"), True), (("latency_ms", "p99"), True),
+                (("throughput_rps",), False)],
+    "live": [(("frame_gap_ms", "p95"), True), (("delivered_fps",), False)],
+}
+
+# Environment variables that set the thread pools of the numeric libraries
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS", "NUMEXPR_NUM_THREADS")
+
+
+def parse_sizes(value: str) -> list:
+    """
+    Parses image sizes like "640x480,1920x1080" into (width, height) pairs.
+    """
+    return [tuple(int(side) for side in size.split("x")) for size in value.split(",") if size]
+
+
+def make_image(width: int, height: int, seed: int) -> np.ndarray:
+    """
+    Builds a BGR road-scene stand-in: smooth gradients, saturated boxes and sensor noise, so it compresses like a photo.
+    """
+    rng = np.random.default_rng(seed)
+    rows = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    columns = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    image = np.empty((height, width, 3), dtype=np.float32)
+    for channel in range(3):
+        weights = rng.uniform(40, 200, 3)
+        image[..., channel] = weights[0] * rows + weights[1] * columns + weights[2] * rows * columns
+    for _ in range(rng.integers(5, 20)):
+        x, y = rng.integers(0, width - 16), rng.integers(0, height - 16)
+        w, h = rng.integers(16, max(width // 5, 17)), rng.integers(16, max(height // 5, 17))
+        image[y:y + h, x:x + w] = rng.uniform(0, 255, 3)
+    image += rng.normal(0, 6, image.shape)
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def tag_jpeg(jpeg: bytes, tag: int) -> bytes:
+    """
+    Inserts a JPEG comment holding `tag` after the start marker, so every request has distinct bytes and
+    misses the prediction cache while decoding to the same pixels.
+    """
+    comment = str(tag).encode()
+    return jpeg[:2] + b"\xff\xfe" + struct.pack(">H", len(comment) + 2) + comment + jpeg[2:]
+
+
+def summarize(values: list) -> dict:
+    """
+    Returns the mean, percentiles and maximum of a list of milliseconds.
+    """
+    if not values:
+        return {"mean": None, "p50": None, "p95": None, "p99": None, "max": None}
+    values = np.asarray(values, dtype=np.float64)
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"mean": round(float(values.mean()), 3), "p50": round(float(p50), 3), "p95": round(float(p95), 3),
+            "p99": round(float(p99), 3), "max": round(float(values.max()), 3)}
+
+
+class PredictClient:
+    """
+    Builds and sends /predict requests in the chosen body and response format.
+    """
+
+    def __init__(self, port: int, images: list, body: str, response_format: str):
+        self.port = port
+        self.images = images
+        self.body = body
+        self.response_format = response_format
+        # Tags every request ever sent uniquely, so later runs do not hit the cache either
+        self._sent = itertools.count()
+
+    def request(self, index: int) -> tuple:
+        """
+        Sends request `index` and returns its status and latency in milliseconds.
+        """
+        jpeg = tag_jpeg(self.images[index % len(self.images)], next(self._sent))
+        if self.body == "json":
+            payload = json.dumps({"image": base64.b64encode(jpeg).decode(), "format": self.response_format}).encode()
+            path, headers = "/predict", {"Content-Type": "application/json"}
+        else:
+            payload = jpeg
+            path = f"/predict?format={self.response_format}&encoding=binary"
+            headers = {"Content-Type": "image/jpeg"}
+
+        start = time.perf_counter()
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        try:
+            connection.request("POST", path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except OSError:
+            status = 0
+        finally:
+            connection.close()
+        return status, (time.perf_counter() - start) * 1000.0
+
+
+def run_predict_load(client: PredictClient, concurrency: int, requests: int, warmup: int) -> dict:
+    """
+    Sends `requests` requests from `concurrency` closed-loop clients, each sending its next request as soon
+    as the previous one returns, after `warmup` untimed requests.
+    """
+    for index in range(warmup):
+        client.request(index)
+
+    latencies, statuses = [], {}
+    lock = threading.Lock()
+    next_index = [0]
+
+    def worker():
+        while True:
+            with lock:
+                index = next_index[0]
+                next_index[0] += 1
+            if index >= requests:
+                return
+            status, latency = client.request(index)
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append(latency)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": requests - statuses.get(200, 0),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(len(latencies) / duration, 3) if duration else 0.0,
+        "latency_ms": summarize(latencies),
+    }
+
+
+def make_video(path: str, width: int, height: int, fps: float, frames: int) -> None:
+    """
+    Writes a Motion-JPEG test video of slowly changing images.
+    """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, (width, height))
+    base = make_image(width, height, seed=0)
+    for frame in range(frames):
+        writer.write(np.roll(base, frame * 4, axis=1))
+    writer.release()
+
+
+def run_live(port: int, source: str, source_frames: int, fps: float) -> dict:
+    """
+    Reads the whole /live MJPEG stream of a video and measures how fast and how evenly frames arrive.
+    """
+    start = time.perf_counter()
+    arrivals = []
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request("GET", f"/live?source={quote(source)}")
+        response = connection.getresponse()
+        while True:
+            line = response.readline()
+            if not line:
+                break
+            if not line.startswith(b"--"):
+                continue
+            length = 0
+            while True:
+                header = response.readline().strip()
+                if not header:
+                    break
+                name, _, value = header.partition(b":")
+                if name.lower() == b"content-length":
+                    length = int(value)
+            response.read(length)
+            arrivals.append(time.perf_counter())
+    finally:
+        connection.close()
+
+    if not arrivals:
+        return {"source_frames": source_frames, "frames": 0, "errors": 1}
+    duration = arrivals[-1] - start
+    return {
+        "source_fps": fps,
+        "source_frames": source_frames,
+        "frames": len(arrivals),
+        "dropped_frames": source_frames - len(arrivals),
+        "errors": 0,
+        "first_frame_ms": round((arrivals[0] - start) * 1000.0, 3),
+        "delivered_fps": round(len(arrivals) / duration, 3) if duration else 0.0,
+        "frame_gap_ms": summarize(list(np.diff(arrivals) * 1000.0)),
+    }
+
+
+def read_server_stages(port: int) -> dict:
+    """
+    Reads the mean time per stage the server itself recorded over every scenario from /metrics,
+    with the mean batch size, or returns None if metrics are disabled.
+    """
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request("GET", "/metrics")
+        response = connection.getresponse()
+        body = response.read().decode()
+    finally:
+        connection.close()
+    if response.status != 200:
+        return None
+
+    sums, counts = {}, {}
+    for line in body.splitlines():
+        for name, target in (("drishti_stage_duration_seconds_sum", sums),
+                             ("drishti_stage_duration_seconds_count", counts),
+                             ("drishti_batch_size_sum", sums), ("drishti_batch_size_count", counts)):
+            if line.startswith(name + "{") or line.startswith(name + " "):
+                labels, _, value = line[len(name):].rpartition(" ")
+                stage = labels.partition('stage="')[2].partition('"')[0] or "batch_size"
+                target[stage] = float(value)
+    stages = {stage: {"count": int(counts[stage]), "mean_ms": round(sums[stage] / counts[stage] * 1000.0, 3)}
+              for stage in sums if counts.get(stage) and stage != "batch_size"}
+    if counts.get("batch_size"):
+        stages["mean_batch_size"] = round(sums["batch_size"] / counts["batch_size"], 3)
+    return stages
+
+
+def measure_stages(client_app, images: dict, repeats: int) -> dict:
+    """
+    Times every stage of the annotated JSON /predict path on its own, per image size.
+
+    The stages run one after the other in this thread, so the numbers exclude HTTP, queueing
+    and batching. At concurrency 1, the end-to-end latency minus their sum is that overhead.
+    `draw_boxes` and `draw_labels` are the drawing steps of `render`, timed again on their own.
+    """
+    from DrishtiDrive.inference.preprocessing import decode_image_bytes
+    from DrishtiDrive.inference.postprocessing import postprocess
+    from DrishtiDrive.inference.rendering import draw_boxes, draw_detections, draw_labels, encode_image
+
+    detector = client_app.detector
+    config = detector.inference_config
+    breakdown = {}
+    for size, jpegs in images.items():
+        timings = {}
+
+        def timed(stage, function, *args):
+            start = time.perf_counter()
+            result = function(*args)
+            timings.setdefault(stage, []).append((time.perf_counter() - start) * 1000.0)
+            return result
+
+        for repeat in range(repeats):
+            jpeg = tag_jpeg(jpegs[repeat % len(jpegs)], repeat)
+            encoded = base64.b64encode(jpeg)
+            image_bytes = timed("base64_decode", base64.b64decode, encoded)
+            timed("cache_key", client_app.cache.make_key, image_bytes, detector.model_version,
+                  detector.inference_params)
+            image = timed("image_decode", decode_image_bytes, image_bytes)
+            batch, meta = timed("preprocess", detector.preprocessor, [image])
+            prediction = timed("forward", detector.backend.forward, batch)
+            detections = timed("postprocess", postprocess, prediction, meta, config.conf_threshold,
+                               config.iou_threshold, config.max_detections)[0]
+            output = timed("render", draw_detections, image, detections, detector.names)
+            # The drawing steps of render on their own, on a copy since they draw in place
+            timed("draw_boxes", draw_boxes, image.copy(), detections)
+            timed("draw_labels", draw_labels, image.copy(), detections, detector.names)
+            output_bytes = timed("image_encode", encode_image, output, "jpeg", 90)
+            timed("base64_encode", base64.b64encode, output_bytes)
+
+        breakdown[f"{size[0]}x{size[1]}"] = {stage: summarize(values) for stage, values in timings.items()}
+    return breakdown
+
+
+def cpu_model() -> str:
+    """
+    Returns the CPU model name, from /proc/cpuinfo where there is one.
+    """
+    try:
+        with open("/proc/cpuinfo") as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+
+def describe_machine(batch_config) -> dict:
+    """
+    Returns the hardware, thread and batching settings a report's timings depend on.
+
+    Reports are only compared when these match.
+    """
+    return {
+        "architecture": platform.machine(),
+        "cpu_model": cpu_model(),
+        "cpu_count": os.cpu_count(),
+        "usable_cpus": len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count(),
+        "opencv_threads": cv2.getNumThreads(),
+        "thread_env": {name: os.environ.get(name) for name in THREAD_ENV_VARS},
+        "max_batch_size": batch_config.max_batch_size,
+        "max_wait_ms": batch_config.max_wait_ms,
+        "num_workers": batch_config.num_workers,
+    }
+
+
+def lookup(scenario: dict, path: tuple):
+    """
+    Returns the number at a key path of a scenario, or None if it is missing.
+    """
+    value = scenario
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value if isinstance(value, (int, float)) else None
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float, min_slack_ms: float) -> list:
+    """
+    Compares the gated metrics of every scenario with the baseline.
+
+    A latency regresses when it exceeds the baseline by more than `tolerance` of it plus
+    `min_slack_ms`. A rate regresses when it falls below the baseline by more than `tolerance` of it.
+    """
+    regressions = []
+    for name, scenario in report["scenarios"].items():
+        reference = baseline["scenarios"].get(name)
+        if reference is None:
+            continue
+        for path, lower_is_better in GATED_METRICS[scenario["endpoint"]]:
+            current, expected = lookup(scenario, path), lookup(reference, path)
+            if current is None or expected is None:
+                continue
+            if lower_is_better:
+                regressed = current > expected * (1 + tolerance) + min_slack_ms
+            else:
+                regressed = current < expected * (1 - tolerance)
+            if regressed:
+                regressions.append({
+                    "scenario": name,
+                    "metric": ".".join(path),
+                    "baseline": expected,
+                    "current": current,
+                    "change": round(current / expected - 1, 3) if expected else None,
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrent clients per run")
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=10, help="untimed requests before each level")
+    parser.add_argument("--sizes", type=parse_sizes, default="640x480,1280x720,1920x1080",
+                        help="comma-separated WIDTHxHEIGHT of the uploaded images, sent in turn")
+    parser.add_argument("--images-per-size", type=int, default=4)
+    parser.add_argument("--body", choices=("json", "raw"), default="json",
+                        help="base64 inside JSON, or raw JPEG bytes with a binary response")
+    parser.add_argument("--format", dest="response_format", choices=("annotated", "detections"),
+                        default="annotated")
+    parser.add_argument("--stub-latency-ms", type=float, default=20.0, help="simulated model time per image")
+    parser.add_argument("--stage-repeats", type=int, default=20, help="samples per stage and image size")
+    parser.add_argument("--live-seconds", type=float, default=5.0, help="length of the /live video, 0 skips /live")
+    parser.add_argument("--live-fps", type=float, default=30.0)
+    parser.add_argument("--live-size", type=parse_sizes, default="1280x720")
+    parser.add_argument("--output", help="also write the report to this file")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline report to gate against")
+    parser.add_argument("--save-baseline", action="store_true", help="save this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--min-slack-ms", type=float, default=1.0, help="allowed absolute latency regression")
+    args = parser.parse_args()
+    if not args.save_baseline and not os.path.exists(args.baseline):
+        parser.error(f"No baseline at {args.baseline}, record one with --save-baseline")
+
+    # The app reads its backend and the /live sources it may open at import time
+    live_dir = tempfile.mkdtemp()
+    live_source = os.path.join(live_dir, "live.avi")
+    os.environ["DRISHTI_INFERENCE_BACKEND"] = "stub"
+    os.environ["DRISHTI_STUB_LATENCY_MS"] = str(args.stub_latency_ms)
+    os.environ["DRISHTI_LIVE_SOURCES"] = live_source
+    from werkzeug.serving import make_server
+    import DrishtiDrive.logger
+
+    # Keep stdout for the report; the app logs to it by default
+    for handler in std_logging.getLogger().handlers:
+        if isinstance(handler, std_logging.StreamHandler) and handler.stream is sys.stdout:
+            handler.setStream(sys.stderr)
+    std_logging.getLogger("werkzeug").setLevel(std_logging.ERROR)
+    import app as serving_app
+    server = make_server("127.0.0.1", 0, serving_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="BenchmarkServer", daemon=True).start()
+    port = server.server_port
+
+    images = {
+        size: [cv2.imencode(".jpg", make_image(*size, seed=index), [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+               for index in range(args.images_per_size)]
+        for size in args.sizes
+    }
+    settings = {
+        "sizes": [f"{width}x{height}" for width, height in args.sizes],
+        "body": args.body,
+        "format": args.response_format,
+        "stub_latency_ms": args.stub_latency_ms,
+        "requests": args.requests,
+        "live_seconds": args.live_seconds,
+        "live_fps": args.live_fps,
+        "live_size": [f"{width}x{height}" for width, height in args.live_size],
+    }
+    machine = describe_machine(serving_app.clApp.batch_scheduler_config)
+    report = {
+        "settings": settings,
+        "machine": machine,
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": {},
+    }
+
+    baseline = None
+    try:
+        # Refuse a baseline that is not comparable before spending minutes on the load test
+        if not args.save_baseline:
+            with open(args.baseline) as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline["settings"] != settings:
+                parser.error(f"{args.baseline} was recorded with different settings: {baseline['settings']}")
+            if baseline.get("machine") != machine:
+                parser.error(f"{args.baseline} was recorded on a different machine: {baseline.get('machine')}, "
+                             f"this one is {machine}. Record a baseline here with --save-baseline --baseline PATH")
+
+        client = PredictClient(port, [jpeg for jpegs in images.values() for jpeg in jpegs], args.body,
+                               args.response_format)
+        for concurrency in (int(level) for level in args.concurrency.split(",") if level):
+            name = f"predict-{args.body}-{args.response_format}-c{concurrency}"
+            report["scenarios"][name] = {"endpoint": "predict",
+                                         **run_predict_load(client, concurrency, args.requests, args.warmup)}
+            print(f"{name}: {report['scenarios'][name]['latency_ms']}", file=sys.stderr)
+
+        if args.live_seconds > 0:
+            width, height = args.live_size[0]
+            source_frames = max(int(args.live_seconds * args.live_fps), 2)
+            make_video(live_source, width, height, args.live_fps, source_frames)
+            report["scenarios"]["live"] = {"endpoint": "live",
+                                           **run_live(port, live_source, source_frames, args.live_fps)}
+            print(f"live: {report['scenarios']['live'].get('frame_gap_ms')}", file=sys.stderr)
+
+        report["server_stages"] = read_server_stages(port)
+        report["stages"] = measure_stages(serving_app.clApp, images, args.stage_repeats)
+    finally:
+        server.shutdown()
+        shutil.rmtree(live_dir, ignore_errors=True)
+
+    failed = [name for name, scenario in report["scenarios"].items() if scenario["errors"]]
+    report["baseline"] = None
+    report["regressions"] = []
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+    else:
+        report["baseline"] = args.baseline
+        report["regressions"] = find_regressions(report, baseline, args.tolerance, args.min_slack_ms)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output)
+
+    for name in failed:
+        print(f"{name} had {report['scenarios'][name]['errors']} failed requests", file=sys.stderr)
+    for regression in report["regressions"]:
+        print(f"Regression in {regression['scenario']} {regression['metric']}: "
+              f"{regression['baseline']} -> {regression['current']}", file=sys.stderr)
+    return 1 if failed or report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
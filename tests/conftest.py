@@ -0,0 +1,21 @@
+import cv2
+import numpy as np
+import pytest
+import yaml
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """
+    A small YOLO dataset in the layout of the extracted feature store: two splits of three labelled images.
+    """
+    feature_store = tmp_path / "feature_store"
+    for split in ("train", "valid"):
+        (feature_store / split / "images").mkdir(parents=True)
+        (feature_store / split / "labels").mkdir(parents=True)
+        for index in range(3):
+            cv2.imwrite(str(feature_store / split / "images" / f"{index}.jpg"), np.zeros((64, 96, 3), np.uint8))
+            (feature_store / split / "labels" / f"{index}.txt").write_text(f"{index % 2} 0.5 0.5 0.25 0.25\n")
+    with open(feature_store / "data.yaml", "w") as data_file:
+        yaml.safe_dump({"train": "train/images", "val": "valid/images", "nc": 2, "names": ["a", "b"]}, data_file)
+    return feature_store
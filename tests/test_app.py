@@ -0,0 +1,136 @@
+import io
+import os
+import base64
+import dataclasses
+
+import cv2
+import numpy as np
+import pytest
+
+# The app loads its detector at import time
+os.environ.setdefault("DRISHTI_INFERENCE_BACKEND", "stub")
+os.environ.setdefault("DRISHTI_STUB_LATENCY_MS", "0")
+
+import app as serving_app  # noqa: E402
+from DrishtiDrive.entity.config_entity import StreamConfig, VideoInferenceConfig  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    return serving_app.app.test_client()
+
+
+@pytest.fixture
+def png():
+    image = np.random.default_rng(3).integers(0, 255, (48, 64, 3), dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+@pytest.fixture
+def video_dir(tmp_path, monkeypatch):
+    writer = cv2.VideoWriter(str(tmp_path / "clip.avi"), cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for index in range(5):
+        writer.write(np.full((48, 64, 3), index * 40, np.uint8))
+    writer.release()
+    monkeypatch.setattr(serving_app, "VideoInferenceConfig",
+                        lambda: dataclasses.replace(VideoInferenceConfig(), local_dir=str(tmp_path)))
+    return tmp_path
+
+
+def test_video_path_inside_the_configured_directory(client, video_dir):
+    response = client.post("/predict/video", json={"path": "clip.avi", "batch_size": 2})
+    assert response.status_code == 200
+    assert len(response.data.splitlines()) == 5
+
+
+@pytest.mark.parametrize("path", ["../clip.avi", "/etc/passwd", "frames/../../clip.avi"])
+def test_video_path_outside_the_configured_directory_is_refused(client, video_dir, path):
+    assert client.post("/predict/video", json={"path": path}).status_code == 403
+
+
+def test_video_path_is_refused_without_a_configured_directory(client, monkeypatch):
+    monkeypatch.setattr(serving_app, "VideoInferenceConfig",
+                        lambda: dataclasses.replace(VideoInferenceConfig(), local_dir=""))
+    assert client.post("/predict/video", json={"path": "clip.avi"}).status_code == 403
+
+
+def test_video_upload_runs_through_the_scheduler(client, video_dir, monkeypatch):
+    calls = []
+    predict_many = serving_app.clApp.scheduler.predict_many
+
+    def record(frames, timeout=None):
+        calls.append(len(frames))
+        return predict_many(frames, timeout=timeout)
+
+    monkeypatch.setattr(serving_app.clApp.scheduler, "predict_many", record)
+    response = client.post("/predict/video?batch_size=2", data=(video_dir / "clip.avi").read_bytes(),
+                           content_type="application/octet-stream")
+    assert response.status_code == 200
+    # The records stream out as the batches finish
+    assert len(response.data.splitlines()) == 5
+    assert calls == [2, 2, 1]
+
+
+def test_live_only_opens_allowed_sources(client, monkeypatch):
+    monkeypatch.setattr(serving_app, "StreamConfig",
+                        lambda: dataclasses.replace(StreamConfig(), source="0", allowed_sources=["allowed.avi"]))
+    assert client.get("/live?source=/etc/passwd").status_code == 403
+    assert client.get("/live?source=rtsp://elsewhere/stream").status_code == 403
+
+
+def test_predict_times_out_with_503_on_a_slow_backend(client, monkeypatch):
+    monkeypatch.setattr(serving_app.clApp.detector.backend.inference_config, "stub_latency_ms", 300)
+    monkeypatch.setattr(serving_app.clApp.batch_scheduler_config, "request_timeout", 0.05)
+    image = np.random.default_rng(7).integers(0, 255, (32, 32, 3), dtype=np.uint8)
+    response = client.post("/predict?format=detections", data=cv2.imencode(".png", image)[1].tobytes(),
+                           content_type="image/png")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def assert_detections(response):
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result["width"], result["height"]) == (64, 48)
+    assert len(result["boxes"]) == len(result["scores"]) == len(result["classes"])
+
+
+def test_predict_reads_a_json_body(client, png):
+    assert_detections(client.post("/predict", json={"image": base64.b64encode(png).decode(), "format": "detections"}))
+
+
+@pytest.mark.parametrize("content_type", ["image/png", "application/octet-stream"])
+def test_predict_reads_a_raw_body(client, png, content_type):
+    assert_detections(client.post("/predict?format=detections", data=png, content_type=content_type))
+
+
+def test_predict_reads_a_multipart_upload(client, png):
+    assert_detections(client.post("/predict", data={"image": (io.BytesIO(png), "frame.png"), "format": "detections"},
+                                  content_type="multipart/form-data"))
+
+
+@pytest.mark.parametrize("request_kwargs", [
+    {"data": "hello", "content_type": "text/plain"},
+    {"data": {"format": "detections"}, "content_type": "multipart/form-data"},
+    {},
+], ids=["text", "form-without-file", "no-body"])
+def test_predict_refuses_unsupported_content_types(client, request_kwargs):
+    assert client.post("/predict", **request_kwargs).status_code == 415
+
+
+def test_predict_refuses_a_bare_get(client):
+    assert client.get("/predict").status_code == 415
+
+
+@pytest.mark.parametrize("body", [["image"], "image", {"format": "detections"}, {"image": 7}],
+                         ids=["list", "string", "missing-image", "non-string-image"])
+def test_predict_refuses_bad_json_bodies(client, body):
+    assert client.post("/predict", json=body).status_code == 400
+
+
+def test_predict_refuses_malformed_json(client):
+    assert client.post("/predict", data="{", content_type="application/json").status_code == 400
+
+
+def test_predict_refuses_undecodable_images(client):
+    assert client.post("/predict", data=b"not an image", content_type="image/png").status_code == 400
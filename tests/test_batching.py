@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from DrishtiDrive.entity.config_entity import BatchSchedulerConfig
+from DrishtiDrive.inference.batching import BatchScheduler, SchedulerFullError
+
+
+def make_scheduler(predict_batch, **overrides):
+    config = BatchSchedulerConfig(**{"max_batch_size": 4, "max_wait_ms": 20, "num_workers": 1,
+                                     "max_queue_size": 64, **overrides})
+    return BatchScheduler(predict_batch, config)
+
+
+def test_every_caller_gets_its_own_result():
+    scheduler = make_scheduler(lambda items: [item * 2 for item in items])
+    try:
+        results = {}
+
+        def call(value):
+            results[value] = scheduler.predict(value, timeout=5)
+
+        threads = [threading.Thread(target=call, args=(value,)) for value in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == {value: value * 2 for value in range(20)}
+    finally:
+        scheduler.close()
+
+
+def test_batches_never_exceed_max_batch_size():
+    sizes = []
+
+    def predict_batch(items):
+        sizes.append(len(items))
+        return items
+
+    scheduler = make_scheduler(predict_batch, max_batch_size=3)
+    try:
+        assert scheduler.predict_many(list(range(10)), timeout=5) == list(range(10))
+    finally:
+        scheduler.close()
+    assert sum(sizes) == 10
+    assert max(sizes) <= 3
+
+
+def test_concurrent_requests_are_coalesced():
+    sizes = []
+    started, release = threading.Event(), threading.Event()
+
+    def predict_batch(items):
+        sizes.append(len(items))
+        started.set()
+        # Hold the only worker so the following requests queue up behind it
+        release.wait(5)
+        return items
+
+    scheduler = make_scheduler(predict_batch, max_batch_size=8, max_wait_ms=0)
+    try:
+        first = scheduler.submit(0)
+        started.wait(5)
+        futures = [scheduler.submit(value) for value in range(1, 6)]
+        release.set()
+        assert [future.result(timeout=5) for future in [first] + futures] == list(range(6))
+    finally:
+        scheduler.close()
+    assert sizes == [1, 5]
+
+
+def test_batch_failure_reaches_every_caller():
+    def predict_batch(items):
+        raise ValueError("model failed")
+
+    scheduler = make_scheduler(predict_batch)
+    try:
+        futures = [scheduler.submit(value) for value in range(3)]
+        for future in futures:
+            with pytest.raises(ValueError, match="model failed"):
+                future.result(timeout=5)
+    finally:
+        scheduler.close()
+
+
+def test_full_queue_is_rejected():
+    release = threading.Event()
+    started = threading.Event()
+
+    def predict_batch(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    scheduler = make_scheduler(predict_batch, max_batch_size=1, max_queue_size=1)
+    try:
+        first = scheduler.submit(0)
+        started.wait(5)
+        # The worker is busy, so the dispatcher holds the next input and the queue takes one more
+        waiting = [scheduler.submit(1)]
+        with pytest.raises(SchedulerFullError):
+            for value in range(2, 5):
+                waiting.append(scheduler.submit(value))
+        release.set()
+        assert first.result(timeout=5) == 0
+        assert [future.result(timeout=5) for future in waiting] == list(range(1, len(waiting) + 1))
+    finally:
+        scheduler.close()
+
+
+def test_closed_scheduler_rejects_inputs():
+    scheduler = make_scheduler(lambda items: items)
+    scheduler.close()
+    with pytest.raises(RuntimeError):
+        scheduler.submit(1)
+
+
+def test_close_with_a_full_queue_finishes_the_queued_inputs():
+    release = threading.Event()
+    started = threading.Event()
+
+    def predict_batch(items):
+        started.set()
+        release.wait(5)
+        return items
+
+    scheduler = make_scheduler(predict_batch, max_batch_size=1, max_queue_size=1)
+    first = scheduler.submit(0)
+    started.wait(5)
+    waiting = [scheduler.submit(1)]
+    try:
+        waiting.append(scheduler.submit(2))
+    except SchedulerFullError:
+        pass
+    closer = threading.Thread(target=scheduler.close)
+    closer.start()
+    release.set()
+    closer.join(5)
+    assert not closer.is_alive()
+    assert [future.result(timeout=1) for future in [first] + waiting] == list(range(len(waiting) + 1))
@@ -0,0 +1,74 @@
+from DrishtiDrive.entity.config_entity import PredictionCacheConfig
+from DrishtiDrive.inference.cache import PredictionCache, _ENTRY_OVERHEAD_BYTES
+
+
+def make_cache(max_bytes=1 << 20, enabled=True):
+    return PredictionCache(PredictionCacheConfig(enabled=enabled, max_bytes=max_bytes))
+
+
+def test_key_depends_on_image_model_and_params():
+    key = PredictionCache.make_key(b"image", "v1", (640, 0.25))
+    assert key == PredictionCache.make_key(memoryview(b"image"), "v1", (640, 0.25))
+    assert key != PredictionCache.make_key(b"other", "v1", (640, 0.25))
+    assert key != PredictionCache.make_key(b"image", "v2", (640, 0.25))
+    assert key != PredictionCache.make_key(b"image", "v1", (640, 0.5))
+
+
+def test_hit_and_miss_are_counted():
+    cache = make_cache()
+    key = PredictionCache.make_key(b"image", "v1", ())
+    assert cache.get(key) is None
+    cache.put(key, "detections", 100)
+    assert cache.get(key) == "detections"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_least_recently_used_entry_is_evicted_over_budget():
+    entry_size = 100 + 32 + _ENTRY_OVERHEAD_BYTES
+    cache = make_cache(max_bytes=2 * entry_size)
+    keys = [PredictionCache.make_key(bytes([i]), "v1", ()) for i in range(3)]
+    cache.put(keys[0], 0, 100)
+    cache.put(keys[1], 1, 100)
+    # Touch the first entry so the second becomes the oldest
+    cache.get(keys[0])
+    cache.put(keys[2], 2, 100)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == 0 and cache.get(keys[2]) == 2
+    assert cache.stats()["evictions"] == 1
+    assert cache.size_bytes == 2 * entry_size
+
+
+def test_replacing_a_key_does_not_leak_size():
+    cache = make_cache()
+    key = PredictionCache.make_key(b"image", "v1", ())
+    cache.put(key, "a", 100)
+    cache.put(key, "b", 100)
+    assert cache.get(key) == "b"
+    assert cache.size_bytes == 100 + len(key) + _ENTRY_OVERHEAD_BYTES
+
+
+def test_oversized_values_are_not_cached():
+    cache = make_cache(max_bytes=1000)
+    key = PredictionCache.make_key(b"image", "v1", ())
+    cache.put(key, "big", 5000)
+    assert cache.get(key) is None
+    assert cache.size_bytes == 0
+
+
+def test_disabled_cache_stores_nothing():
+    cache = make_cache(enabled=False)
+    key = PredictionCache.make_key(b"image", "v1", ())
+    cache.put(key, "detections", 100)
+    assert cache.get(key) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_clear_drops_every_entry():
+    cache = make_cache()
+    key = PredictionCache.make_key(b"image", "v1", ())
+    cache.put(key, "detections", 100)
+    cache.clear()
+    assert cache.get(key) is None
+    assert cache.size_bytes == 0
@@ -0,0 +1,38 @@
+from DrishtiDrive.components.data_validation import check_sample
+
+
+def test_valid_sample(dataset):
+    result = check_sample(str(dataset / "train" / "images" / "0.jpg"), 2)
+    assert result["errors"] == []
+    assert (result["width"], result["height"]) == (96, 64)
+    assert result["boxes"] == [(0.0, 0.5, 0.5, 0.25, 0.25)]
+
+
+def test_unchanged_sample_is_not_checked_again(dataset):
+    image_path = str(dataset / "train" / "images" / "0.jpg")
+    known_hash = check_sample(image_path, 2)["hash"]
+    assert check_sample(image_path, 2, known_hash)["unchanged"]
+
+
+def test_label_errors_are_reported_per_line(dataset):
+    (dataset / "train" / "labels" / "0.txt").write_text("0 0.5 0.5 0.25\n3 0.5 0.5 0.2 0.2\nx 0.5 0.5 0.2 0.2\n"
+                                                         "0 0.5 0.5 0 0.2\n0 0.95 0.5 0.2 0.2\n")
+    errors = check_sample(str(dataset / "train" / "images" / "0.jpg"), 2)["errors"]
+    assert [error.split(":")[0] for error in errors] == ["line 1", "line 2", "line 3", "line 4", "line 5"]
+
+
+def test_corrupt_image_is_reported(dataset):
+    image = dataset / "train" / "images" / "0.jpg"
+    image.write_bytes(image.read_bytes()[:100])
+    assert check_sample(str(image), 2)["errors"][0].startswith("image does not decode")
+
+
+def test_unreadable_image_is_reported(dataset):
+    missing = dataset / "train" / "images" / "missing.jpg"
+    result = check_sample(str(missing), 2)
+    assert result["errors"][0].startswith("image file cannot be read")
+    assert result["hash"] == ""
+    # A directory named like an image cannot be opened either
+    (dataset / "train" / "images" / "folder.jpg").mkdir()
+    assert check_sample(str(dataset / "train" / "images" / "folder.jpg"), 2)["errors"][0].startswith(
+        "image file cannot be read")
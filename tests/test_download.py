@@ -0,0 +1,157 @@
+import json
+import hashlib
+import pathlib
+import zipfile
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from DrishtiDrive.components.data_ingestion import DataIngestion
+from DrishtiDrive.entity.config_entity import DataIngestionConfig
+from DrishtiDrive.exception import AppException
+from DrishtiDrive.utils import download_utils
+from DrishtiDrive.utils.download_utils import download_file, verify_checksum
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "source.bin"
+    path.write_bytes(bytes(range(256)) * 1000)
+    return path
+
+
+def sha256(path):
+    return hashlib.sha256(path.read_bytes()).hexdigest()
+
+
+def test_download_and_verify(tmp_path, source):
+    target = tmp_path / "target.bin"
+    download_file(source.as_uri(), str(target), sha256=sha256(source), retries=0)
+    assert target.read_bytes() == source.read_bytes()
+    assert not (tmp_path / "target.bin.part").exists()
+    assert verify_checksum(str(target), sha256(source).upper())
+    assert verify_checksum(str(target), "")
+
+
+def test_checksum_mismatch_leaves_no_file(tmp_path, source):
+    target = tmp_path / "target.bin"
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        download_file(source.as_uri(), str(target), sha256="0" * 64, retries=0)
+    assert not target.exists()
+    assert not (tmp_path / "target.bin.part").exists()
+
+
+def test_resumes_a_partial_download(tmp_path, source):
+    target = tmp_path / "target.bin"
+    data = source.read_bytes()
+    # A marker prefix only survives if the download continues after it instead of starting over
+    (tmp_path / "target.bin.part").write_bytes(b"x" * 1000)
+    download_file(source.as_uri(), str(target), retries=0)
+    assert target.read_bytes() == b"x" * 1000 + data[1000:]
+
+
+def test_parallel_ranges_resume_from_saved_progress(tmp_path, source, monkeypatch):
+    monkeypatch.setattr(download_utils, "PARALLEL_MIN_BYTES", 0)
+    data = source.read_bytes()
+    size = len(data)
+    step = -(-size // 4)
+    ranges = [[start, min(start + step, size) - 1] for start in range(0, size, step)]
+    # The first range is complete, the others have not started
+    part = bytearray(size)
+    part[:step] = data[:step]
+    (tmp_path / "target.bin.part").write_bytes(bytes(part))
+    (tmp_path / "target.bin.part.ranges.json").write_text(
+        json.dumps({"size": size, "ranges": ranges, "done": [step, 0, 0, 0]}))
+
+    target = tmp_path / "target.bin"
+    download_file(source.as_uri(), str(target), sha256=sha256(source), num_connections=4, retries=0)
+    assert target.read_bytes() == data
+    assert not (tmp_path / "target.bin.part.ranges.json").exists()
+
+
+@pytest.fixture
+def http_server():
+    """
+    A local server answering GET requests with the next status of `server.statuses`, then with `server.body`.
+    """
+    class Handler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_error(405)
+
+        def do_GET(self):
+            server.requests += 1
+            status = server.statuses.pop(0) if server.statuses else 200
+            if status != 200:
+                self.send_error(status)
+                return
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(server.body)))
+            self.end_headers()
+            self.wfile.write(server.body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.statuses, server.body, server.requests = [], b"payload", 0
+    server.url = f"http://127.0.0.1:{server.server_port}/data.zip"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+
+
+def test_client_errors_are_not_retried(tmp_path, http_server, monkeypatch):
+    monkeypatch.setattr(download_utils.time, "sleep", lambda seconds: pytest.fail("a 404 must not be retried"))
+    http_server.statuses = [404]
+    with pytest.raises(urllib.error.HTTPError) as error:
+        download_file(http_server.url, str(tmp_path / "target.bin"), retries=3)
+    assert error.value.code == 404
+    assert http_server.requests == 1
+
+
+def test_server_errors_and_throttling_are_retried(tmp_path, http_server, monkeypatch):
+    delays = []
+    monkeypatch.setattr(download_utils.time, "sleep", delays.append)
+    http_server.statuses = [503, 429]
+    target = tmp_path / "target.bin"
+    download_file(http_server.url, str(target), retries=3)
+    assert target.read_bytes() == b"payload"
+    assert delays == [1, 2]
+    assert http_server.requests == 3
+
+
+def make_zip(path):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("dataset/data.yaml", "nc: 1\n")
+    return path
+
+
+def ingestion_config(tmp_path, urls, data_sha256=""):
+    directory = tmp_path / "data_ingestion"
+    return DataIngestionConfig(data_ingestion_dir=str(directory), feature_store_file_path=str(directory / "fs"),
+                               data_download_url="", data_mirror_urls=urls, data_sha256=data_sha256,
+                               download_retries=0)
+
+
+def test_falls_back_to_the_next_mirror(tmp_path):
+    archive = make_zip(tmp_path / "data.zip")
+    missing = (tmp_path / "missing.zip").as_uri()
+    config = ingestion_config(tmp_path, [missing, archive.as_uri()], sha256(archive))
+    zip_file_path = DataIngestion(config).download_data()
+    assert pathlib.Path(zip_file_path).read_bytes() == archive.read_bytes()
+
+
+def test_reuses_a_complete_download(tmp_path):
+    archive = make_zip(tmp_path / "data.zip")
+    config = ingestion_config(tmp_path, [archive.as_uri()])
+    zip_file_path = DataIngestion(config).download_data()
+    # Without any source left the existing zip must be reused
+    config.data_mirror_urls = []
+    assert DataIngestion(config).download_data() == zip_file_path
+
+
+def test_no_source_configured(tmp_path):
+    with pytest.raises(AppException, match="No dataset source configured"):
+        DataIngestion(ingestion_config(tmp_path, [])).download_data()
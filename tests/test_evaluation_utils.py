@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from DrishtiDrive.utils.evaluation_utils import average_precision, box_iou, compute_map, yolo_to_xyxy
+
+
+def detection(box, confidence, cls=0):
+    return [*box, confidence, cls]
+
+
+def test_box_iou_and_yolo_to_xyxy():
+    boxes = yolo_to_xyxy(np.array([[1, 0.5, 0.5, 0.5, 0.5]]), (100, 200))
+    assert boxes.tolist() == [[1, 50, 25, 150, 75]]
+    iou = box_iou(np.array([[0, 0, 10, 10]]), np.array([[0, 0, 10, 10], [5, 0, 15, 10], [20, 20, 30, 30]]))
+    assert np.allclose(iou, [[1, 1 / 3, 0]])
+
+
+def test_a_perfect_detector_scores_one():
+    result = compute_map([np.array([detection((10, 10, 50, 50), 0.9)])], [np.array([[0, 10, 10, 50, 50]])])
+    assert result == {"map50": 1.0, "map50_95": 1.0, "images": 1, "instances": 1}
+
+
+def test_duplicates_are_false_positives():
+    # Two images with one box each. The second detection of the first box is a duplicate, so by
+    # confidence the detections are TP, FP, TP: precision 1, 1/2, 2/3 at recall 1/2, 1/2, 1.
+    # Recall levels 0..0.5 (51 of the 101) take precision 1, levels 0.51..1 (50) take 2/3.
+    detections = [np.array([detection((0, 0, 10, 10), 0.9), detection((0, 0, 10, 10), 0.8)]),
+                  np.array([detection((20, 20, 40, 40), 0.7)])]
+    ground_truths = [np.array([[0, 0, 0, 10, 10]]), np.array([[0, 20, 20, 40, 40]])]
+    result = compute_map(detections, ground_truths)
+    assert result["map50"] == pytest.approx((51 + 50 * 2 / 3) / 101)
+    assert result["map50_95"] == pytest.approx(result["map50"])
+    assert result["instances"] == 2
+
+
+def test_loose_boxes_only_count_at_low_iou_thresholds():
+    # IoU 0.72 matches at the thresholds 0.5 to 0.7, half of the ten
+    result = compute_map([np.array([detection((0, 0, 100, 72), 0.9)])], [np.array([[0, 0, 0, 100, 100]])])
+    assert result["map50"] == 1.0
+    assert result["map50_95"] == pytest.approx(0.5)
+
+
+def test_classes_are_averaged_and_wrong_classes_do_not_match():
+    ground_truth = np.array([[0, 0, 0, 10, 10], [1, 20, 20, 30, 30]])
+    # Class 1 is only predicted on the class 0 box, so it gets no true positive
+    detections = np.array([detection((0, 0, 10, 10), 0.9, 0), detection((0, 0, 10, 10), 0.8, 1)])
+    result = compute_map([detections], [ground_truth])
+    assert result["map50"] == pytest.approx(0.5)
+
+
+def test_no_detections_or_no_images():
+    assert compute_map([np.zeros((0, 6))], [np.array([[0, 0, 0, 10, 10]])])["map50"] == 0.0
+    assert compute_map([], []) == {"map50": 0.0, "map50_95": 0.0, "images": 0, "instances": 0}
+    assert average_precision(np.zeros(0), np.zeros(0)) == 0.0
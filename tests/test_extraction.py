@@ -0,0 +1,60 @@
+import os
+import zipfile
+
+from DrishtiDrive.components.data_ingestion import DataIngestion
+from DrishtiDrive.entity.config_entity import DataIngestionConfig
+
+
+FILES = {
+    "dataset/data.yaml": b"nc: 1\n",
+    "dataset/train/images/0.jpg": b"\xff\xd8" + os.urandom(5000),
+    "dataset/train/labels/0.txt": b"0 0.5 0.5 0.2 0.2\n",
+}
+
+
+def make_ingestion(tmp_path, workers=4):
+    archive = tmp_path / "data.zip"
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_DEFLATED) as zip_ref:
+        zip_ref.writestr("dataset/", b"")
+        for name, content in FILES.items():
+            zip_ref.writestr(name, content)
+    feature_store = tmp_path / "feature_store"
+    config = DataIngestionConfig(data_ingestion_dir=str(tmp_path), feature_store_file_path=str(feature_store),
+                                 extract_num_workers=workers)
+    return DataIngestion(config), str(archive), feature_store
+
+
+def extracted_files(feature_store):
+    return {
+        os.path.relpath(os.path.join(root, name), feature_store): open(os.path.join(root, name), "rb").read()
+        for root, _, files in os.walk(feature_store) for name in files
+    }
+
+
+def test_extracts_every_member_without_the_top_level_directory(tmp_path):
+    ingestion, archive, feature_store = make_ingestion(tmp_path)
+    assert ingestion.extract_zip_file(archive) == str(feature_store)
+    expected = {os.path.join(*name.split("/")[1:]): content for name, content in FILES.items()}
+    assert extracted_files(feature_store) == expected
+
+
+def test_skips_unchanged_members_and_restores_changed_ones(tmp_path, monkeypatch):
+    ingestion, archive, feature_store = make_ingestion(tmp_path)
+    ingestion.extract_zip_file(archive)
+    label = feature_store / "train" / "labels" / "0.txt"
+    # Same size, different content, so only the CRC check can catch it
+    label.write_bytes(b"1 0.5 0.5 0.2 0.2\n")
+
+    written = []
+    extract_member = DataIngestion._extract_member
+
+    def record(self, zip_file_path, info, target_path, *args):
+        extracted = extract_member(self, zip_file_path, info, target_path, *args)
+        if extracted:
+            written.append(info.filename)
+        return extracted
+
+    monkeypatch.setattr(DataIngestion, "_extract_member", record)
+    ingestion.extract_zip_file(archive)
+    assert written == ["dataset/train/labels/0.txt"]
+    assert label.read_bytes() == FILES["dataset/train/labels/0.txt"]
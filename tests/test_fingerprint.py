@@ -0,0 +1,103 @@
+import sys
+
+from DrishtiDrive.components.data_validation import DataValidation, feature_store_digest
+from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact, DataValidationArtifact
+from DrishtiDrive.entity.config_entity import DataValidationConfig, ModelTrainerConfig
+from DrishtiDrive.pipeline.training_pipeline import TrainingPipeline
+from DrishtiDrive.utils import fingerprint_utils
+from DrishtiDrive.utils.fingerprint_utils import (artifact_outputs_exist, compute_fingerprint, load_stage_record,
+                                                  save_stage_record)
+
+
+MODULES = [fingerprint_utils]
+
+
+def test_fingerprint_changes_with_config_upstream_and_inputs():
+    config = DataValidationConfig()
+    base = compute_fingerprint("data_validation", config, ["run-1"], MODULES, "inputs")
+    assert base == compute_fingerprint("data_validation", DataValidationConfig(), ["run-1"], MODULES, "inputs")
+    assert base != compute_fingerprint("data_validation", DataValidationConfig(required_file_list=["train"]),
+                                       ["run-1"], MODULES, "inputs")
+    assert base != compute_fingerprint("data_validation", config, ["run-2"], MODULES, "inputs")
+    assert base != compute_fingerprint("data_validation", config, ["run-1"], MODULES, "other inputs")
+    assert base != compute_fingerprint("image_store", config, ["run-1"], MODULES, "inputs")
+
+
+def test_worker_counts_do_not_change_the_fingerprint():
+    assert compute_fingerprint("data_validation", DataValidationConfig(num_workers=1), [], MODULES) == \
+        compute_fingerprint("data_validation", DataValidationConfig(num_workers=8), [], MODULES)
+
+
+def test_stage_record_round_trip(tmp_path):
+    output = tmp_path / "manifest.npz"
+    output.write_bytes(b"")
+    artifact = DataValidationArtifact(validation_status=True, manifest_file_path=str(output))
+    record = save_stage_record(str(tmp_path), "abc", artifact)
+    assert load_stage_record(str(tmp_path)) == record
+    assert artifact_outputs_exist(record["artifact"])
+    output.unlink()
+    assert not artifact_outputs_exist(record["artifact"])
+    assert load_stage_record(str(tmp_path / "missing")) is None
+
+
+def run_stage(pipeline, tmp_path, inputs, runs):
+    """
+    Runs a data validation stage whose input digest is `inputs`, recording every real run in `runs`.
+    """
+    output = tmp_path / "output"
+    output.write_bytes(b"")
+
+    def run():
+        runs.append(inputs)
+        return DataValidationArtifact(validation_status=True, manifest_file_path=str(output))
+
+    return pipeline._run_stage("data_validation", str(tmp_path / "stage"), DataValidationConfig(), [],
+                               [sys.modules[DataValidation.__module__]], DataValidationArtifact, run, lambda: inputs)
+
+
+def test_unchanged_stage_is_skipped_and_changed_inputs_rerun_it(tmp_path):
+    pipeline, runs = TrainingPipeline(), []
+    run_stage(pipeline, tmp_path, "v1", runs)
+    first_run_id = pipeline.run_ids["data_validation"]
+    run_stage(pipeline, tmp_path, "v1", runs)
+    assert runs == ["v1"]
+    assert pipeline.run_ids["data_validation"] == first_run_id
+
+    run_stage(pipeline, tmp_path, "v2", runs)
+    assert runs == ["v1", "v2"]
+    assert pipeline.run_ids["data_validation"] != first_run_id
+
+
+def test_forced_stage_reruns(tmp_path):
+    pipeline, runs = TrainingPipeline(stages=["data_validation"]), []
+    run_stage(pipeline, tmp_path, "v1", runs)
+    run_stage(pipeline, tmp_path, "v1", runs)
+    assert runs == ["v1", "v1"]
+
+
+def test_feature_store_digest_tracks_content(tmp_path, dataset):
+    manifest_path = str(tmp_path / "manifest.npz")
+    digest = feature_store_digest(str(dataset), manifest_path)
+
+    config = DataValidationConfig(manifest_file_path=manifest_path, num_workers=1)
+    DataValidation(DataIngestionArtifact(data_zip_file_path="", feature_store_file_path=str(dataset)),
+                   config).build_manifest()
+    # The manifest's sample hashes stand in for reading the files, with the same result
+    assert feature_store_digest(str(dataset), manifest_path) == digest
+
+    label = dataset / "valid" / "labels" / "0.txt"
+    label.write_text("1 0.5 0.5 0.25 0.25\n")
+    edited = feature_store_digest(str(dataset), manifest_path)
+    assert edited != digest
+
+    (dataset / "data.yaml").write_text((dataset / "data.yaml").read_text() + "# comment\n")
+    assert feature_store_digest(str(dataset), manifest_path) != edited
+
+
+def test_runtime_only_fields_do_not_change_the_fingerprint(tmp_path):
+    base = compute_fingerprint("model_trainer", ModelTrainerConfig(), [], MODULES)
+    assert base == compute_fingerprint("model_trainer", ModelTrainerConfig(master_port=29600), [], MODULES)
+    assert base == compute_fingerprint("model_trainer", ModelTrainerConfig(
+        node_rank=1, master_addr="10.0.0.2", cpu_ids=[0, 1], log_file_path=str(tmp_path / "train.log")),
+        [], MODULES)
+    assert base != compute_fingerprint("model_trainer", ModelTrainerConfig(batch_size=8), [], MODULES)
@@ -0,0 +1,39 @@
+import json
+
+import numpy as np
+
+from DrishtiDrive.inference.formatting import detections_to_dict, pack_detections
+from DrishtiDrive.inference.rendering import PALETTE, draw_boxes, draw_detections
+
+
+DETECTIONS = np.array([[10, 20, 50, 60, 0.9, 1], [-5, -5, 300, 300, 0.33333334, 25]], dtype=np.float32)
+
+
+def test_scores_serialise_without_float32_noise():
+    result = detections_to_dict(DETECTIONS, [str(index) for index in range(30)], (100, 200, 3))
+    assert json.dumps(result["scores"]) == "[0.9, 0.3333]"
+    assert result["boxes"] == [[10, 20, 50, 60], [-5, -5, 300, 300]]
+    assert result["labels"] == ["1", "25"]
+    assert (result["width"], result["height"]) == (200, 100)
+
+
+def test_packed_detections_are_little_endian_float32():
+    packed = pack_detections(DETECTIONS)
+    assert np.array_equal(np.frombuffer(packed, dtype="<f4").reshape(-1, 6), DETECTIONS)
+
+
+def test_boxes_are_drawn_in_place_in_their_class_colour():
+    image = np.zeros((100, 100, 3), np.uint8)
+    assert draw_boxes(image, DETECTIONS[:1], thickness=1) is image
+    assert image[20, 30].tolist() == PALETTE[1].tolist()
+    # The inside of the box stays untouched
+    assert image[40, 30].tolist() == [0, 0, 0]
+
+
+def test_draw_detections_leaves_the_original_alone():
+    image = np.zeros((100, 100, 3), np.uint8)
+    preview = draw_detections(image, DETECTIONS, [str(index) for index in range(30)], max_side=50)
+    assert preview.shape == (50, 50, 3)
+    assert preview.any()
+    assert not image.any()
+    assert draw_detections(image, DETECTIONS[:0], []).shape == image.shape
@@ -0,0 +1,62 @@
+import os
+
+import pytest
+import yaml
+
+from DrishtiDrive.components.hyperparameter_sweep import AshaScheduler, HyperparameterSweep
+from DrishtiDrive.entity.config_entity import HyperparameterSweepConfig, ModelTrainerConfig
+from DrishtiDrive.pipeline.stub_train import learning_curve
+
+
+def test_rungs_grow_by_the_reduction_factor():
+    assert AshaScheduler(1, 30, 3).rungs == [1, 3, 9, 27]
+    assert AshaScheduler(2, 8, 2).rungs == [2, 4]
+    with pytest.raises(ValueError):
+        AshaScheduler(1, 30, 1)
+
+
+def test_only_the_top_fraction_is_promoted():
+    scheduler = AshaScheduler(1, 9, 3)
+    # The first trial at a rung has nothing to compare with and goes on
+    assert scheduler.on_result("a", 1, 0.5)
+    assert not scheduler.on_result("b", 1, 0.1)
+    assert scheduler.on_result("c", 1, 0.9)
+    # Epochs between rungs are not judged
+    assert scheduler.on_result("b", 2, 0.0)
+    # A trial is judged once per rung, at its highest rung reached
+    assert scheduler.on_result("a", 3, 0.6)
+    assert scheduler.on_result("a", 4, 0.0)
+    assert scheduler.results == {1: {"a": 0.5, "b": 0.1, "c": 0.9}, 3: {"a": 0.6}}
+
+
+def test_stub_learning_curve_is_deterministic():
+    curve = learning_curve({"lr0": 0.01}, 10)
+    assert len(curve) == 10
+    assert (curve == learning_curve({"lr0": 0.01}, 10)).all()
+    assert not (curve == learning_curve({"lr0": 0.02}, 10)).all()
+
+
+def test_stub_sweep_stops_weak_trials_and_reports_the_best(tmp_path, dataset):
+    sweep_dir = str(tmp_path / "sweep")
+    # Every core in one slot runs the trials one after another, so the stopped trials are deterministic
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    config = HyperparameterSweepConfig(
+        sweep_dir=sweep_dir, search_space={"lr0": [0.001, 0.01, 0.1], "momentum": [0.8, 0.9]}, num_trials=4,
+        max_epochs=4, min_epochs=1, reduction_factor=2, metric="map50_95", cores_per_trial=cores, trainer="stub",
+        seed=0, report_file_path=os.path.join(sweep_dir, "report.yaml"),
+    )
+    sweep = HyperparameterSweep(config, ModelTrainerConfig(), str(dataset))
+    artifact = sweep.initiate_hyperparameter_sweep()
+
+    with open(artifact.report_file_path) as report_file:
+        report = yaml.safe_load(report_file)
+    trials = report["trials"]
+    assert len(trials) == 4
+    assert {trial["status"] for trial in trials} <= {"completed", "stopped"}
+    assert report["epochs_trained"] == sum(trial["epochs"] for trial in trials)
+    assert report["epochs_trained"] < report["epochs_without_early_stopping"]
+    assert artifact.best_metric == max(trial["best_metric"] for trial in trials)
+    assert report["best_trial"] == trials[0]["name"]
+    for trial in trials:
+        assert trial["history"] == pytest.approx(learning_curve(trial["params"], 4)[:trial["epochs"]].tolist(),
+                                                 abs=1e-6)
@@ -0,0 +1,74 @@
+import math
+
+import cv2
+import numpy as np
+import pytest
+
+from DrishtiDrive.components.data_validation import DataValidation
+from DrishtiDrive.components.image_store import ImageStore
+from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact, DataValidationArtifact
+from DrishtiDrive.entity.config_entity import DataValidationConfig, ImageStoreConfig
+from DrishtiDrive.utils.image_store_utils import ImageStoreReader
+
+
+def yolov5_load_image(path, img_size, augment):
+    """
+    The resize of yolov5's LoadImagesAndLabels.load_image.
+    """
+    im = cv2.imread(path)
+    h0, w0 = im.shape[:2]
+    r = img_size / max(h0, w0)
+    if r != 1:
+        interp = cv2.INTER_LINEAR if (augment or r > 1) else cv2.INTER_AREA
+        im = cv2.resize(im, (math.ceil(w0 * r), math.ceil(h0 * r)), interpolation=interp)
+    return im
+
+
+def build_store(tmp_path, dataset, image_size):
+    manifest_path = str(tmp_path / "manifest.npz")
+    DataValidation(DataIngestionArtifact(data_zip_file_path="", feature_store_file_path=str(dataset)),
+                   DataValidationConfig(manifest_file_path=manifest_path, num_workers=1)).build_manifest()
+    store_dir = tmp_path / "image_store"
+    config = ImageStoreConfig(image_store_dir=str(store_dir), store_file_path=str(store_dir / "images.u8"),
+                              index_file_path=str(store_dir / "index.npz"), image_size=image_size, num_workers=1)
+    artifact = ImageStore(config, DataValidationArtifact(validation_status=True, manifest_file_path=manifest_path)) \
+        .initiate_image_store()
+    return ImageStoreReader(artifact.store_file_path, artifact.index_file_path)
+
+
+@pytest.mark.parametrize("image_size", [320, 640])
+def test_store_content_matches_yolov5_load_image(tmp_path, dataset, image_size):
+    # 333 * 640 / 500 = 426.24 and 333 * 320 / 500 = 213.12, where rounding up and to nearest differ
+    rng = np.random.default_rng(0)
+    for split in ("train", "valid"):
+        cv2.imwrite(str(dataset / split / "images" / "odd.png"), rng.integers(0, 255, (333, 500, 3), dtype=np.uint8))
+        (dataset / split / "labels" / "odd.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+
+    reader = build_store(tmp_path, dataset, image_size)
+    assert len(reader) == 8
+    for row, path in enumerate(reader.columns["paths"].tolist()):
+        augment = reader.columns["splits"][row] == "train"
+        expected = yolov5_load_image(path, image_size, augment)
+        assert np.array_equal(reader.content(row), expected), path
+        # The rest of the row is padding
+        padded = np.asarray(reader[row]).copy()
+        left, top = reader.columns["pads"][row]
+        padded[top:top + expected.shape[0], left:left + expected.shape[1]] = 114
+        assert np.all(padded == 114)
+
+
+def test_stores_of_an_older_format_are_rebuilt(tmp_path, dataset):
+    reader = build_store(tmp_path, dataset, 320)
+    expected = np.array(reader.images)
+    # An older store with the same images: no format version and differently resized rows
+    with np.load(reader.index_file_path) as index:
+        columns = {name: index[name] for name in index.files if name != "format_version"}
+    np.savez(reader.index_file_path, **columns)
+    stale = np.memmap(reader.store_file_path, dtype=np.uint8, mode="r+", shape=expected.shape)
+    stale[:] = 0
+    stale.flush()
+    del stale, reader
+
+    rebuilt = build_store(tmp_path, dataset, 320)
+    assert rebuilt.format_version == 2
+    assert np.array_equal(rebuilt.images, expected)
@@ -0,0 +1,102 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from DrishtiDrive.components import data_validation
+from DrishtiDrive.components.data_validation import DataValidation
+from DrishtiDrive.entity.artifacts_entity import DataIngestionArtifact
+from DrishtiDrive.entity.config_entity import DataValidationConfig
+from DrishtiDrive.utils.manifest_utils import DatasetManifest
+
+
+def record(path, split, boxes, errors=(), width=100, height=50):
+    return {"image": path, "split": split, "image_size": 10, "image_mtime": 1, "label_size": 5, "label_mtime": 1,
+            "hash": path, "width": width, "height": height, "boxes": boxes, "errors": list(errors)}
+
+
+def make_manifest():
+    return DatasetManifest.from_records([
+        record("a.jpg", "train", [(0, 0.5, 0.5, 0.1, 0.2)]),
+        record("b.jpg", "train", []),
+        record("c.jpg", "val", [(1, 0.5, 0.5, 0.05, 0.1), (1, 0.2, 0.2, 0.5, 0.5)], ["line 1: bad"], 400, 200),
+    ], num_classes=2)
+
+
+def test_take_and_concatenate_keep_boxes_with_their_samples():
+    manifest = make_manifest()
+    taken = manifest.take(np.array([2, 0]))
+    assert taken.columns["paths"].tolist() == ["c.jpg", "a.jpg"]
+    assert taken.sample_boxes(0)[:, 0].tolist() == [1, 1]
+    assert taken.sample_boxes(1).tolist() == [[0, 0.5, 0.5, np.float32(0.1), np.float32(0.2)]]
+
+    joined = DatasetManifest.concatenate([taken, manifest.take(np.array([1]))])
+    assert joined.columns["paths"].tolist() == ["c.jpg", "a.jpg", "b.jpg"]
+    assert np.diff(joined.box_offsets).tolist() == [2, 1, 0]
+    assert joined.index() == {"c.jpg": 0, "a.jpg": 1, "b.jpg": 2}
+
+
+def test_save_and_load_round_trip(tmp_path):
+    manifest = make_manifest()
+    path = str(tmp_path / "manifest.npz")
+    manifest.save(path)
+    loaded = DatasetManifest.load(path)
+    assert loaded.num_classes == 2
+    for name, column in manifest.columns.items():
+        assert loaded.columns[name].tolist() == column.tolist()
+    assert np.array_equal(loaded.boxes, manifest.boxes)
+    assert np.array_equal(loaded.box_offsets, manifest.box_offsets)
+
+
+def test_statistics():
+    manifest = make_manifest()
+    assert manifest.class_counts().tolist() == [1, 2]
+    assert manifest.class_counts("train").tolist() == [1, 0]
+    stats = manifest.box_size_stats("val")
+    assert stats["boxes"] == 2
+    # 20x20 and 200x100 pixels
+    assert (stats["small"], stats["medium"], stats["large"]) == (1, 0, 1)
+    assert stats["width_px"]["p50"] == 110.0
+
+
+def make_validation(tmp_path, feature_store):
+    config = DataValidationConfig(manifest_file_path=str(tmp_path / "manifest.npz"), num_workers=1)
+    return DataValidation(DataIngestionArtifact(data_zip_file_path="", feature_store_file_path=str(feature_store)),
+                          config)
+
+
+def test_only_new_and_changed_samples_are_checked(tmp_path, dataset, monkeypatch):
+    validation = make_validation(tmp_path, dataset)
+    first = validation.build_manifest()
+    assert len(first) == 6
+    assert first.class_counts().tolist() == [4, 2]
+
+    # Runs in-process so the checked samples can be recorded
+    checked = []
+    check_sample = data_validation.check_sample
+
+    def record_check(image_path, num_classes, known_hash=""):
+        checked.append(image_path)
+        return check_sample(image_path, num_classes, known_hash)
+
+    monkeypatch.setattr(data_validation, "check_sample", record_check)
+    monkeypatch.setattr(data_validation, "ProcessPoolExecutor", ThreadPoolExecutor)
+
+    label = dataset / "train" / "labels" / "1.txt"
+    label.write_text("1 0.5 0.5 0.25 0.25\n0 0.5 0.5 0.5 0.5\n")
+    second = validation.build_manifest()
+    assert checked == [str(dataset / "train" / "images" / "1.jpg")]
+    assert second.class_counts().tolist() == [5, 2]
+
+    checked.clear()
+    assert len(validation.build_manifest()) == 6
+    assert checked == []
+
+
+def test_invalid_samples_are_reported(tmp_path, dataset):
+    (dataset / "valid" / "labels" / "2.txt").write_text("5 0.5 0.5 0.25 0.25\n0 0.5 1.5 0.2 0.2\n")
+    summary = make_validation(tmp_path, dataset).validate_samples()
+    assert summary["splits"]["train"]["invalid"] == 0
+    assert summary["splits"]["val"]["invalid"] == 1
+    invalid, = summary["invalid_samples"]
+    assert invalid["image"].endswith("2.jpg")
+    assert len(invalid["errors"]) == 2
@@ -0,0 +1,95 @@
+import pytest
+
+from DrishtiDrive.entity.config_entity import MetricsConfig
+from DrishtiDrive.inference import metrics as metrics_module
+from DrishtiDrive.inference.metrics import Counter, Histogram, ServingMetrics
+
+
+def test_histogram_buckets_are_cumulative_and_inclusive():
+    histogram = Histogram("latency_seconds", "Latency.", [1, 0.1, 0.5], ("route",))
+    # 0.1 sits on a bound, which belongs to that bucket
+    for value in (0.05, 0.1, 0.3, 2.0):
+        histogram.observe(value, ("/predict",))
+    histogram.observe(0.2, ("/live",))
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/live",le="0.1"} 0',
+        'latency_seconds_bucket{route="/live",le="0.5"} 1',
+        'latency_seconds_bucket{route="/live",le="1"} 1',
+        'latency_seconds_bucket{route="/live",le="+Inf"} 1',
+        'latency_seconds_sum{route="/live"} 0.2',
+        'latency_seconds_count{route="/live"} 1',
+        'latency_seconds_bucket{route="/predict",le="0.1"} 2',
+        'latency_seconds_bucket{route="/predict",le="0.5"} 3',
+        'latency_seconds_bucket{route="/predict",le="1"} 3',
+        'latency_seconds_bucket{route="/predict",le="+Inf"} 4',
+        'latency_seconds_sum{route="/predict"} 2.45',
+        'latency_seconds_count{route="/predict"} 4',
+    ]
+
+
+def test_histogram_without_labels():
+    histogram = Histogram("batch_size", "Images per batch.", [1, 2, 4])
+    histogram.observe(3)
+    assert histogram.render()[2:] == ['batch_size_bucket{le="1"} 0', 'batch_size_bucket{le="2"} 0',
+                                      'batch_size_bucket{le="4"} 1', 'batch_size_bucket{le="+Inf"} 1',
+                                      "batch_size_sum 3.0", "batch_size_count 1"]
+
+
+def test_counter_sums_per_label_combination():
+    counter = Counter("requests_total", "Requests.", ("route", "status"))
+    counter.inc(("/predict", 200))
+    counter.inc(("/predict", 200), 2)
+    counter.inc(("/predict", 503))
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{route="/predict",status="200"} 3',
+        'requests_total{route="/predict",status="503"} 1',
+    ]
+
+
+def test_enabled_metrics_time_stages_and_read_collectors(monkeypatch):
+    metrics = ServingMetrics(MetricsConfig(enabled=True, latency_buckets=[0.5, 1.0]))
+    clock = iter([10.0, 10.25])
+    monkeypatch.setattr(metrics_module.time, "perf_counter", lambda: next(clock))
+    with metrics.stage("forward"):
+        pass
+    metrics.observe_request("/predict", 200, 0.75)
+    metrics.observe_batch(3)
+    metrics.register("queue_depth", "gauge", "Queued images.", lambda: 7)
+
+    text = metrics.render()
+    assert text.endswith("\n")
+    lines = text.splitlines()
+    assert 'drishti_stage_duration_seconds_bucket{stage="forward",le="0.5"} 1' in lines
+    assert 'drishti_stage_duration_seconds_sum{stage="forward"} 0.25' in lines
+    assert 'drishti_requests_total{route="/predict",status="200"} 1' in lines
+    assert 'drishti_request_duration_seconds_bucket{route="/predict",le="0.5"} 0' in lines
+    assert "drishti_batch_size_count 1" in lines
+    assert lines[-3:] == ["# HELP queue_depth Queued images.", "# TYPE queue_depth gauge", "queue_depth 7"]
+
+
+def test_disabled_metrics_record_nothing_and_never_read_the_clock(monkeypatch):
+    metrics = ServingMetrics(MetricsConfig(enabled=False))
+
+    def clock():
+        raise AssertionError("the clock was read while metrics are disabled")
+
+    monkeypatch.setattr(metrics_module.time, "perf_counter", clock)
+    timer = metrics.stage("forward")
+    assert timer is metrics.stage("decode")
+    with timer as entered:
+        assert entered is timer
+    metrics.observe_stage("forward", 1.0)
+    metrics.observe_request("/predict", 200, 1.0)
+    metrics.observe_batch(4)
+    assert not any(line and not line.startswith("#") for line in metrics.render().splitlines())
+
+
+def test_the_null_timer_does_not_swallow_exceptions():
+    with pytest.raises(ValueError):
+        with ServingMetrics(MetricsConfig(enabled=False)).stage("forward"):
+            raise ValueError("boom")
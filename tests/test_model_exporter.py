@@ -0,0 +1,74 @@
+import os
+import dataclasses
+
+import yaml
+
+from DrishtiDrive.components import model_exporter
+from DrishtiDrive.components.model_exporter import ModelExporter
+from DrishtiDrive.entity.artifacts_entity import ModelTrainerArtifact
+from DrishtiDrive.entity.config_entity import ModelExporterConfig
+from DrishtiDrive.inference.detector import Detector
+
+
+def make_exporter(tmp_path, dataset, **overrides):
+    export_dir = tmp_path / "model_exporter"
+    config = ModelExporterConfig(model_exporter_dir=str(export_dir), image_size=64, benchmark_runs=3,
+                                 report_file_path=str(export_dir / "report.yaml"), **overrides)
+    weights = tmp_path / "best.pt"
+    weights.write_bytes(b"weights")
+    return ModelExporter(config, ModelTrainerArtifact(trained_model_file_path=str(weights)), str(dataset))
+
+
+def write_model(path, content=b"model"):
+    with open(path, "wb") as model_file:
+        model_file.write(content)
+    return path
+
+
+def test_exporter_ships_the_fastest_variant(tmp_path, dataset, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "yolov5").mkdir()
+    exporter = make_exporter(tmp_path, dataset, quantization_modes=["dynamic"])
+    export_dir = exporter.model_exporter_config.model_exporter_dir
+    fp32_path = os.path.join(export_dir, "model_fp32.onnx")
+    int8_path = os.path.join(export_dir, "model_int8_dynamic.onnx")
+    monkeypatch.setattr(exporter, "export_onnx", lambda: write_model(fp32_path))
+    monkeypatch.setattr(exporter, "quantize_dynamic", lambda onnx_path: write_model(int8_path, b"int8"))
+
+    # Every variant runs on the stub backend, made slower the bigger the model
+    latency_ms = {exporter.model_trainer_artifact.trained_model_file_path: 20, fp32_path: 10, int8_path: 0}
+    monkeypatch.setattr(model_exporter, "Detector", lambda config: Detector(dataclasses.replace(
+        config, backend="stub", stub_latency_ms=latency_ms[config.weights_path], warmup_runs=0)))
+
+    artifact = exporter.initiate_model_exporter()
+
+    assert artifact.selected_variant == "onnx_int8_dynamic"
+    assert artifact.selected_model_file_path == int8_path
+    assert (tmp_path / "yolov5" / "best.onnx").read_bytes() == b"int8"
+    with open(artifact.report_file_path) as report_file:
+        report = yaml.safe_load(report_file)
+    assert report["evaluation_images"] == 3
+    assert set(report["variants"]) == {"pytorch", "onnx_fp32", "onnx_int8_dynamic"}
+    assert report["variants"]["pytorch"]["backend"] == "torch"
+    assert report["variants"]["pytorch"]["latency_ms"] > report["variants"]["onnx_int8_dynamic"]["latency_ms"]
+
+
+def test_variants_beyond_the_accuracy_budget_are_not_selected(tmp_path, dataset):
+    exporter = make_exporter(tmp_path, dataset, max_map_drop=0.01)
+    results = {
+        "pytorch": {"map50_95": 0.50, "latency_ms": 30.0},
+        "onnx_fp32": {"map50_95": 0.50, "latency_ms": 12.0},
+        "onnx_int8_dynamic": {"map50_95": 0.485, "latency_ms": 8.0},
+        "onnx_int8_static": {"map50_95": 0.30, "latency_ms": 5.0},
+    }
+    assert exporter.select_variant(results) == "onnx_fp32"
+    results["onnx_int8_dynamic"]["map50_95"] = 0.495
+    assert exporter.select_variant(results) == "onnx_int8_dynamic"
+
+
+def test_evaluation_set_subsets_the_validation_split(tmp_path, dataset):
+    images, ground_truths = make_exporter(tmp_path, dataset, evaluation_images=2)._load_evaluation_set()
+    assert len(images) == len(ground_truths) == 2
+    assert images[0].shape == (64, 96, 3)
+    # "0 0.5 0.5 0.25 0.25" on a 96x64 image
+    assert ground_truths[0].tolist() == [[0, 36, 24, 60, 40]]
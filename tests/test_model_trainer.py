@@ -0,0 +1,116 @@
+import os
+import sys
+import time
+import subprocess
+import dataclasses
+
+import numpy as np
+import yaml
+
+from DrishtiDrive.components.model_trainer import ModelTrainer
+from DrishtiDrive.entity.config_entity import ModelTrainerConfig
+from DrishtiDrive.utils.fingerprint_utils import artifact_outputs_exist
+from DrishtiDrive.utils.resource_utils import PeakMemorySampler, process_tree_pids
+
+
+def stub_trainer(tmp_path, dataset, **overrides):
+    config = ModelTrainerConfig(model_trainer_dir=str(tmp_path), metrics_file_path=str(tmp_path / "metrics.jsonl"),
+                                log_file_path=str(tmp_path / "train.log"), project_dir=str(tmp_path / "runs"),
+                                auto_tune=False, **overrides)
+    trainer = ModelTrainer(config, str(dataset))
+    # The stub trainer prints the launcher's metrics lines without training anything
+    trainer.prepare_training_command = lambda launcher_args=None: [
+        sys.executable, "-m", "DrishtiDrive.pipeline.stub_train", "--epochs", "2", "--epoch-seconds", "0.01"]
+    return trainer
+
+
+def test_other_hosts_record_no_model_and_stay_cached(tmp_path, dataset):
+    artifact = stub_trainer(tmp_path, dataset, nnodes=2, node_rank=1).initiate_model_trainer()
+    assert artifact.trained_model_file_path is None
+    assert (tmp_path / "metrics.jsonl").read_text().count('"event": "epoch"') == 2
+    # Otherwise the cached training stage would rerun on every pipeline run on this host
+    assert artifact_outputs_exist(dataclasses.asdict(artifact))
+
+
+def synthetic_probes(trainer, timings):
+    """
+    Replaces the probe runs with a table of (images/s, peak MB) per batch size and worker count, recording the calls.
+    """
+    calls = []
+
+    def probe(batch_size, num_workers):
+        calls.append((batch_size, num_workers))
+        images_per_sec, peak_memory_mb = timings[batch_size, num_workers]
+        return {"batch_size": batch_size, "num_workers": num_workers, "images_per_sec": images_per_sec,
+                "dataloader_wait_fraction": 0.1, "peak_memory_mb": peak_memory_mb, "exit_code": 0}
+
+    trainer.probe = probe
+    return calls
+
+
+def test_probe_picks_the_fastest_setting_that_fits(tmp_path, dataset):
+    trainer = stub_trainer(tmp_path, dataset, memory_limit_mb=2048, num_workers=2, cpu_ids=[0, 1, 2, 3],
+                           probe_batch_sizes=[64, 8, 32, 16], probe_num_workers=[0, 2, 4, 8],
+                           probe_report_file_path=str(tmp_path / "probe.yaml"))
+    calls = synthetic_probes(trainer, {
+        (8, 2): (100.0, 500), (16, 2): (150.0, 900), (32, 2): (140.0, 1500),
+        # 3000 MB plus 20% headroom is over the 2048 MB limit
+        (64, 2): (200.0, 3000),
+        (16, 0): (80.0, 700), (16, 4): (170.0, 1100),
+    })
+
+    assert trainer.probe_training_settings() == {"batch_size": 16, "num_workers": 4}
+    # Batch sizes in increasing order, then worker counts capped at the 4 cores
+    assert calls == [(8, 2), (16, 2), (32, 2), (64, 2), (16, 0), (16, 4)]
+    with open(tmp_path / "probe.yaml") as report_file:
+        report = yaml.safe_load(report_file)
+    assert report["chosen"] == {"batch_size": 16, "num_workers": 4}
+    assert report["memory_limit_mb"] == 2048
+    assert [probe["fits"] for probe in report["probes"]] == [True, True, True, False, True, True]
+
+
+def test_probe_stops_at_the_first_batch_size_that_does_not_fit(tmp_path, dataset):
+    trainer = stub_trainer(tmp_path, dataset, memory_limit_mb=1024, num_workers=0, cpu_ids=[0],
+                           probe_batch_sizes=[8, 16, 32], probe_num_workers=[0],
+                           probe_report_file_path=str(tmp_path / "probe.yaml"))
+    calls = synthetic_probes(trainer, {(8, 0): (50.0, 1000), (16, 0): (90.0, 400), (32, 0): (95.0, 600)})
+
+    # Nothing fits, so training falls back to the smallest batch without workers
+    assert trainer.probe_training_settings() == {"batch_size": 8, "num_workers": 0}
+    assert calls == [(8, 0)]
+
+
+def test_probe_runs_the_training_command_and_samples_its_memory(tmp_path, dataset, monkeypatch):
+    trainer = stub_trainer(tmp_path, dataset)
+    # The probe builds a trainer of its own
+    monkeypatch.setattr(ModelTrainer, "prepare_training_command", staticmethod(trainer.prepare_training_command))
+    result = trainer.probe(8, 0)
+    assert result["exit_code"] == 0
+    assert result["images_per_sec"] > 0
+    assert result["peak_memory_mb"] is not None
+
+
+def test_peak_memory_sampler_sees_memory_allocated_while_it_runs():
+    with PeakMemorySampler(interval=0.01) as sampler:
+        block = np.ones(64 * 2 ** 20, dtype=np.uint8)
+        time.sleep(0.1)
+    assert sampler.supported
+    assert sampler.peak_bytes >= 48 * 2 ** 20
+    del block
+
+
+def test_process_tree_includes_child_processes():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        assert child.pid in process_tree_pids(os.getpid())
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_peak_memory_sampler_is_inert_where_unsupported():
+    sampler = PeakMemorySampler()
+    sampler.supported = False
+    with sampler:
+        pass
+    assert sampler.peak_bytes == 0
@@ -0,0 +1,97 @@
+import numpy as np
+
+from DrishtiDrive.inference.postprocessing import nms, postprocess, xywh_to_xyxy
+from DrishtiDrive.inference.preprocessing import LetterboxMeta
+
+
+def reference_nms(boxes, scores, iou_threshold):
+    """
+    Plain greedy NMS comparing every kept box with every remaining box.
+    """
+    order = list(np.argsort(-scores, kind="stable"))
+    keep = []
+    while order:
+        best = order.pop(0)
+        keep.append(best)
+        remaining = []
+        for other in order:
+            width = min(boxes[best, 2], boxes[other, 2]) - max(boxes[best, 0], boxes[other, 0])
+            height = min(boxes[best, 3], boxes[other, 3]) - max(boxes[best, 1], boxes[other, 1])
+            intersection = max(width, 0) * max(height, 0)
+            union = ((boxes[best, 2] - boxes[best, 0]) * (boxes[best, 3] - boxes[best, 1]) +
+                     (boxes[other, 2] - boxes[other, 0]) * (boxes[other, 3] - boxes[other, 1]) - intersection)
+            if intersection / (union + 1e-9) <= iou_threshold:
+                remaining.append(other)
+        order = remaining
+    return keep
+
+
+def random_boxes(rng, count, extent=640):
+    corners = rng.uniform(0, extent, size=(count, 2))
+    sizes = rng.uniform(5, 200, size=(count, 2))
+    return np.concatenate([corners, corners + sizes], axis=1)
+
+
+def test_xywh_to_xyxy():
+    boxes = np.array([[50, 40, 20, 10]], dtype=np.float32)
+    assert xywh_to_xyxy(boxes).tolist() == [[40, 35, 60, 45]]
+
+
+def test_nms_matches_reference():
+    rng = np.random.default_rng(0)
+    for iou_threshold in (0.3, 0.45, 0.7):
+        boxes = random_boxes(rng, 300)
+        scores = rng.uniform(size=300)
+        assert nms(boxes, scores, iou_threshold).tolist() == reference_nms(boxes, scores, iou_threshold)
+
+
+def test_nms_of_nothing():
+    assert nms(np.empty((0, 4)), np.empty(0), 0.45).tolist() == []
+
+
+def make_prediction(rows_per_image, num_classes):
+    """
+    Raw output rows of cx, cy, w, h, objectness and a one-hot class score.
+    """
+    count = max(len(rows) for rows in rows_per_image)
+    prediction = np.zeros((len(rows_per_image), count, 5 + num_classes), dtype=np.float32)
+    for image, rows in enumerate(rows_per_image):
+        for anchor, (cx, cy, w, h, objectness, cls) in enumerate(rows):
+            prediction[image, anchor, :5] = (cx, cy, w, h, objectness)
+            prediction[image, anchor, 5 + cls] = 1.0
+    return prediction
+
+
+def identity_meta(batch_size, height=640, width=640):
+    return LetterboxMeta(scales=np.ones(batch_size, dtype=np.float32), pads=np.zeros((batch_size, 2), dtype=np.float32),
+                         shapes=np.tile(np.array([height, width], dtype=np.float32), (batch_size, 1)))
+
+
+def test_postprocess_suppresses_within_a_class_only():
+    rows = [(100, 100, 50, 50, 0.9, 0), (102, 100, 50, 50, 0.8, 0), (102, 100, 50, 50, 0.7, 1),
+            (400, 400, 50, 50, 0.1, 0)]
+    detections, = postprocess(make_prediction([rows], 2), identity_meta(1), 0.25, 0.45, 100)
+    assert detections[:, 5].tolist() == [0, 1]
+    assert np.allclose(detections[:, 4], [0.9, 0.7])
+    assert detections[0, :4].tolist() == [75, 75, 125, 125]
+
+
+def test_postprocess_keeps_images_apart_and_caps_detections():
+    overlapping = [(100, 100, 50, 50, 0.9, 0)]
+    spread = [(60 * i + 30, 30, 20, 20, 0.5 + 0.01 * i, 0) for i in range(8)]
+    first, second = postprocess(make_prediction([overlapping, spread], 1), identity_meta(2), 0.25, 0.45, 5)
+    assert len(first) == 1
+    assert len(second) == 5
+    # The highest scores survive the cap, in descending order
+    assert np.all(np.diff(second[:, 4]) < 0)
+    assert np.isclose(second[0, 4], 0.57)
+
+
+def test_postprocess_undoes_the_letterbox_and_clips():
+    meta = LetterboxMeta(scales=np.array([0.5], dtype=np.float32), pads=np.array([[0, 80]], dtype=np.float32),
+                         shapes=np.array([[960, 1280]], dtype=np.float32))
+    rows = [(100, 200, 40, 40, 0.9, 0), (630, 100, 40, 40, 0.8, 0)]
+    detections, = postprocess(make_prediction([rows], 1), meta, 0.25, 0.45, 100)
+    assert detections[0, :4].tolist() == [160, 200, 240, 280]
+    # 650 / 0.5 = 1300 lies beyond the 1280 pixel wide original
+    assert detections[1, :4].tolist() == [1220, 0, 1280, 80]
@@ -0,0 +1,79 @@
+import cv2
+import numpy as np
+import pytest
+
+from DrishtiDrive.inference.postprocessing import postprocess
+from DrishtiDrive.inference.preprocessing import LetterboxPreprocessor, decode_image_bytes, letterbox_geometry
+
+
+def test_letterbox_geometry_centres_the_resized_image():
+    assert letterbox_geometry(480, 640, 320) == (0.5, 320, 240, 0, 40)
+    assert letterbox_geometry(640, 480, 320) == (0.5, 240, 320, 40, 0)
+    # Never rounds a side down to nothing
+    assert letterbox_geometry(1, 1000, 100)[1:3] == (100, 1)
+
+
+def test_letterbox_scales_pads_and_converts_to_rgb():
+    image = np.zeros((48, 64, 3), dtype=np.uint8)
+    image[..., 0] = 255  # blue in BGR
+    batch, meta = LetterboxPreprocessor(32, pad_value=114)([image])
+
+    assert batch.shape == (1, 3, 32, 32) and batch.dtype == np.float32
+    assert meta.scales.tolist() == [0.5]
+    assert meta.pads.tolist() == [[0, 4]]
+    assert meta.shapes.tolist() == [[48, 64]]
+    # Blue ends up in the last RGB channel, the padding rows stay grey
+    assert np.all(batch[0, :, 4:28] == np.array([0, 0, 1], dtype=np.float32)[:, None, None])
+    assert np.allclose(batch[0, :, :4], 114 / 255)
+    assert np.allclose(batch[0, :, 28:], 114 / 255)
+
+
+def test_letterbox_round_trips_boxes_through_postprocess():
+    image = np.zeros((480, 640, 3), dtype=np.uint8)
+    image[100:200, 300:460] = 255
+    batch, meta = LetterboxPreprocessor(320)([image])
+
+    # Find the white box in the model input and feed it back as a detection
+    ys, xs = np.nonzero(batch[0, 0] == 1.0)
+    x1, y1, x2, y2 = xs.min(), ys.min(), xs.max() + 1, ys.max() + 1
+    prediction = np.zeros((1, 1, 6), dtype=np.float32)
+    prediction[0, 0] = ((x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1, 1.0, 1.0)
+    detections, = postprocess(prediction, meta, 0.25, 0.45, 10)
+    assert detections[0, :4].tolist() == [300, 100, 460, 200]
+
+
+def test_reused_buffers_leave_no_stale_pixels():
+    rng = np.random.default_rng(0)
+    wide = rng.integers(0, 255, (30, 90, 3), dtype=np.uint8)
+    tall = rng.integers(0, 255, (90, 30, 3), dtype=np.uint8)
+    square = rng.integers(0, 255, (64, 64, 3), dtype=np.uint8)
+
+    reused = LetterboxPreprocessor(64, max_batch_size=2)
+    reused([square, wide])
+    first, _ = reused([tall, square])
+    expected, _ = LetterboxPreprocessor(64, max_batch_size=2)([tall, square])
+    assert np.array_equal(first, expected)
+
+    # The batch is a view of the internal buffer, overwritten by the next call
+    second, _ = reused([wide])
+    assert np.shares_memory(first, second)
+
+
+def test_buffers_grow_for_a_larger_batch():
+    preprocessor = LetterboxPreprocessor(16, max_batch_size=1)
+    batch, meta = preprocessor([np.zeros((16, 16, 3), dtype=np.uint8)] * 3)
+    assert batch.shape == (3, 3, 16, 16)
+    assert preprocessor.capacity == 3
+    assert len(meta.scales) == 3
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+def test_decode_image_bytes_reads_any_buffer(wrap):
+    image = np.random.default_rng(1).integers(0, 255, (12, 20, 3), dtype=np.uint8)
+    encoded = cv2.imencode(".png", image)[1].tobytes()
+    assert np.array_equal(decode_image_bytes(wrap(encoded)), image)
+
+
+@pytest.mark.parametrize("data", [b"", b"not an image"])
+def test_decode_image_bytes_rejects_invalid_input(data):
+    assert decode_image_bytes(data) is None
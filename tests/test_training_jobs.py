@@ -0,0 +1,115 @@
+import os
+import sys
+import json
+import time
+import subprocess
+
+import pytest
+
+from DrishtiDrive.entity.config_entity import TrainingJobConfig
+from DrishtiDrive.pipeline import training_jobs
+from DrishtiDrive.pipeline.training_jobs import (CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobQueueFullError,
+                                                 TrainingJobManager)
+
+
+# Stands in for the pipeline in the job process: the stub trainer's metrics lines, then the job result
+STUB_JOB = """
+import os, sys, json, runpy
+job_dir, epochs, epoch_seconds, exit_code = sys.argv[1], sys.argv[2], sys.argv[3], int(sys.argv[4])
+sys.argv = ['stub_train', '--epochs', epochs, '--epoch-seconds', epoch_seconds]
+runpy.run_module('DrishtiDrive.pipeline.stub_train', run_name='__main__')
+result = {'artifact': {'epochs': int(epochs)}} if exit_code == 0 else {'error': 'stub failure'}
+with open(os.path.join(job_dir, 'result.json'), 'w') as result_file:
+    json.dump(result, result_file)
+sys.exit(exit_code)
+"""
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """
+    A job manager whose job processes run STUB_JOB with the job's `epochs`, `epoch_seconds` and `exit_code` options.
+    """
+    monkeypatch.setattr(training_jobs, "POLL_INTERVAL", 0.05)
+    popen = subprocess.Popen
+
+    def stub_popen(args, **kwargs):
+        job_dir = args[-1]
+        with open(os.path.join(job_dir, "job.json")) as job_file:
+            options = json.load(job_file)["options"]
+        return popen([sys.executable, "-c", STUB_JOB, job_dir, str(options.get("epochs", 2)),
+                      str(options.get("epoch_seconds", 0.01)), str(options.get("exit_code", 0))], **kwargs)
+
+    monkeypatch.setattr(training_jobs.subprocess, "Popen", stub_popen)
+
+    def make_manager(**overrides):
+        config = TrainingJobConfig(**{"jobs_dir": str(tmp_path / "jobs"), "max_concurrent_jobs": 1,
+                                      "max_queued_jobs": 4, "nice": 0, **overrides})
+        return TrainingJobManager(config)
+
+    return make_manager
+
+
+def wait_for_status(manager, job_id, statuses, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in statuses:
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"job {job_id} is still {manager.get(job_id)['status']}")
+
+
+def test_job_runs_and_reports_its_metrics_and_result(manager):
+    jobs = manager()
+    job = jobs.submit({"epochs": 3})
+    assert job["status"] == QUEUED
+
+    events = list(jobs.iter_progress(job["job_id"]))
+    final = events[-1]["job"]
+    assert final["status"] == SUCCEEDED
+    assert final["exit_code"] == 0
+    assert final["result"] == {"epochs": 3}
+    epochs = [event["metrics"]["epoch"] for event in events
+              if event.get("metrics", {}).get("event") == "epoch"]
+    assert epochs == [0, 1, 2]
+
+    metrics = jobs.metrics(job["job_id"])
+    assert [record["event"] for record in metrics["records"]] == ["epoch", "epoch", "epoch", "end"]
+    assert jobs.metrics("missing") is None
+
+
+def test_failed_job_keeps_its_error(manager):
+    jobs = manager()
+    job = jobs.submit({"exit_code": 1})
+    job = wait_for_status(jobs, job["job_id"], (FAILED,))
+    assert job["exit_code"] == 1
+    assert job["error"] == "stub failure"
+
+
+def test_queue_limit_and_cancellation(manager):
+    jobs = manager(max_queued_jobs=1)
+    running = jobs.submit({"epochs": 100, "epoch_seconds": 0.1})
+    wait_for_status(jobs, running["job_id"], (RUNNING,))
+    queued = jobs.submit()
+    with pytest.raises(JobQueueFullError):
+        jobs.submit()
+
+    assert jobs.cancel(queued["job_id"])["status"] == CANCELLED
+    cancelled = jobs.cancel(running["job_id"])
+    assert cancelled["status"] == CANCELLED
+    assert cancelled["exit_code"] != 0
+    assert [job["status"] for job in jobs.list()] == [CANCELLED, CANCELLED]
+    assert jobs.cancel("missing") is None
+
+
+def test_unfinished_jobs_fail_after_a_restart(manager, tmp_path):
+    jobs_dir = tmp_path / "jobs"
+    (jobs_dir / "old").mkdir(parents=True)
+    (jobs_dir / "old" / "job.json").write_text(json.dumps({
+        "job_id": "old", "status": RUNNING, "options": {}, "created_at": "2024-01-01T00:00:00",
+        "started_at": "2024-01-01T00:00:01", "finished_at": None, "exit_code": None, "error": None, "result": None,
+    }))
+    job = manager().get("old")
+    assert job["status"] == FAILED
+    assert job["error"] == "The server stopped before the job finished"
@@ -0,0 +1,154 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from DrishtiDrive.pipeline import yolov5_train
+from DrishtiDrive.pipeline.yolov5_train import FIT_EPOCH_KEYS, ProbeFinished, TrainingTelemetry
+from DrishtiDrive.utils.training_metrics_utils import (format_metrics_line, parse_metrics_line, read_metrics,
+                                                       summarize_epochs)
+
+
+def epoch_record(epoch, images, train_time, wait, map50_95):
+    return {"event": "epoch", "epoch": epoch, "images": images, "train_time": train_time, "epoch_time": train_time + 1,
+            "dataloader_wait": wait, "compute_time": train_time - wait, "metrics": {"map50_95": map50_95}}
+
+
+def test_metrics_lines_round_trip_and_survive_other_output():
+    record = {"event": "epoch", "epoch": 3, "losses": {"box_loss": 0.05}}
+    line = format_metrics_line(record)
+    assert line.endswith("\n") and "\n" not in line[:-1]
+    assert parse_metrics_line(line) == record
+    assert parse_metrics_line(line.encode()) == record
+    # A progress bar of the other output stream redrawn on the same line
+    assert parse_metrics_line("  3/10  1.2G  0.05: 100%|#####|\r" + line) == record
+
+
+@pytest.mark.parametrize("line", ["Epoch 3/10 done\n", "DRISHTI_METRICS {\"event\": \"ep", b"\xff\xfe"])
+def test_lines_without_a_complete_record_are_ignored(line):
+    assert parse_metrics_line(line) is None
+
+
+def test_read_metrics_skips_a_truncated_final_line(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    assert read_metrics(str(path)) == []
+    path.write_text(json.dumps({"epoch": 0}) + "\n\n" + json.dumps({"epoch": 1}) + "\n" + '{"epoch": 2, "ima')
+    assert read_metrics(str(path)) == [{"epoch": 0}, {"epoch": 1}]
+
+
+def test_read_metrics_rejects_a_corrupt_record_in_the_middle(tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    path.write_text('{"epoch": 0\n' + json.dumps({"epoch": 1}) + "\n")
+    with pytest.raises(ValueError):
+        read_metrics(str(path))
+
+
+def test_summarize_epochs():
+    summary = summarize_epochs([{"event": "probe"}, epoch_record(0, 100, 10.0, 6.0, 0.2),
+                                epoch_record(1, 300, 10.0, 6.0, 0.4), {"event": "end"}])
+    assert summary == {
+        "epochs": 2,
+        "images_per_sec": 20.0,
+        "epoch_time": 11.0,
+        "dataloader_wait": 12.0,
+        "compute_time": 8.0,
+        "dataloader_wait_fraction": 0.6,
+        "best_map50_95": 0.4,
+        "bound": "input",
+    }
+    assert summarize_epochs([epoch_record(0, 100, 10.0, 2.0, 0.2)])["bound"] == "compute"
+    assert summarize_epochs([{"event": "end"}]) == {"epochs": 0}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A clock for the telemetry that only moves when the test sets it.
+    """
+    now = [0.0]
+    monkeypatch.setattr(yolov5_train.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def records(stream):
+    return [parse_metrics_line(line) for line in stream.getvalue().splitlines()]
+
+
+def run_batch(telemetry, clock, start, end, images=8):
+    clock[0] = start
+    telemetry.on_train_batch_start()
+    clock[0] = end
+    telemetry.on_train_batch_end(0, None, np.zeros((images, 3, 4, 4)), [])
+
+
+def test_telemetry_times_an_epoch(clock, monkeypatch):
+    monkeypatch.setenv("WORLD_SIZE", "2")
+    monkeypatch.delenv("RANK", raising=False)
+    stream = io.StringIO()
+    telemetry = TrainingTelemetry(epochs=5, stream=stream)
+    telemetry.on_train_epoch_start()
+    run_batch(telemetry, clock, 1.0, 3.0)
+    run_batch(telemetry, clock, 3.5, 4.5)
+    clock[0] = 5.0
+    telemetry.on_train_epoch_end()
+    clock[0] = 6.0
+    telemetry.on_fit_epoch_end([0.1 * (index + 1) for index in range(len(FIT_EPOCH_KEYS))], 0)
+    clock[0] = 7.0
+    telemetry.on_train_end()
+
+    epoch, end = records(stream)
+    assert epoch["event"] == "epoch" and (epoch["epoch"], epoch["epochs"]) == (0, 5)
+    # Every rank trains on its own shard of 8-image batches
+    assert (epoch["images"], epoch["batches"], epoch["world_size"]) == (32, 2, 2)
+    assert (epoch["train_time"], epoch["val_time"], epoch["epoch_time"]) == (5.0, 1.0, 6.0)
+    assert (epoch["dataloader_wait"], epoch["compute_time"]) == (1.5, 3.0)
+    assert epoch["dataloader_wait_fraction"] == pytest.approx(0.3)
+    assert epoch["images_per_sec"] == pytest.approx(6.4)
+    assert epoch["losses"] == pytest.approx({"box_loss": 0.1, "obj_loss": 0.2, "cls_loss": 0.3})
+    assert epoch["metrics"] == pytest.approx({"precision": 0.4, "recall": 0.5, "map50": 0.6, "map50_95": 0.7})
+    assert epoch["lr"] == pytest.approx([1.1, 1.2, 1.3])
+    assert end == {"event": "end", "time": end["time"], "total_time": 7.0}
+
+
+def test_telemetry_is_silent_on_other_ranks(clock, monkeypatch):
+    monkeypatch.setenv("RANK", "1")
+    stream = io.StringIO()
+    telemetry = TrainingTelemetry(epochs=1, stream=stream)
+    telemetry.on_train_epoch_start()
+    telemetry.on_fit_epoch_end([0.0] * len(FIT_EPOCH_KEYS), 0)
+    assert stream.getvalue() == ""
+
+
+def test_probe_measures_the_batches_after_the_warmup(clock, monkeypatch):
+    monkeypatch.delenv("RANK", raising=False)
+    monkeypatch.delenv("WORLD_SIZE", raising=False)
+    stream = io.StringIO()
+    telemetry = TrainingTelemetry(epochs=1, stream=stream, probe_batches=2, probe_warmup=1)
+    telemetry.on_train_epoch_start()
+    # A slow first batch, then two that wait 1s and compute 1s
+    run_batch(telemetry, clock, 5.0, 10.0)
+    run_batch(telemetry, clock, 11.0, 12.0)
+    with pytest.raises(ProbeFinished):
+        run_batch(telemetry, clock, 13.0, 14.0)
+
+    probe, = records(stream)
+    assert probe["event"] == "probe"
+    assert (probe["images"], probe["batches"]) == (16, 2)
+    assert (probe["dataloader_wait"], probe["compute_time"]) == (2.0, 2.0)
+    assert probe["images_per_sec"] == 4.0
+
+
+def test_telemetry_registers_every_hook():
+    class Callbacks:
+        def __init__(self):
+            self.actions = {}
+
+        def register_action(self, hook, name, callback):
+            self.actions[hook] = (name, callback)
+
+    callbacks = Callbacks()
+    telemetry = TrainingTelemetry(epochs=1, stream=io.StringIO())
+    telemetry.register(callbacks)
+    assert callbacks.actions["on_fit_epoch_end"] == ("drishti_telemetry", telemetry.on_fit_epoch_end)
+    assert len(callbacks.actions) == 6